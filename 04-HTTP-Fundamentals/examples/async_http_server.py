@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Async HTTP Server Example
+
+The same routes as simple_http_server.py, served by a single asyncio event
+loop instead of a thread per connection. There is no http.server here: the
+server reads raw bytes with an asyncio.Protocol and parses HTTP/1.1 itself,
+which shows what a framework does under the hood.
+
+Things to notice:
+- Incremental parsing: bytes arrive in arbitrary pieces. The parser keeps
+  what it has and hands back each request once it is complete.
+- Pipelining: a client may send several requests without waiting for the
+  responses. They are answered one by one, in order.
+- Backpressure: if a client stops reading its responses, the transport's
+  write buffer fills up. The server then stops reading (and parsing) from
+  that client until the buffer drains, instead of queueing responses
+  without limit.
+- Keep-alive: connections stay open, with the same idle timeout and
+  max-requests-per-connection limits as simple_http_server.py.
+
+Usage:
+    python async_http_server.py
+    python async_http_server.py --port 8080 --quiet
+
+Then visit: http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from simple_http_server import (
+    IDLE_TIMEOUT, KEEP_ALIVE_HEADER, MAX_REQUESTS_PER_CONNECTION, RESPONSES, date_header
+)
+
+MAX_HEADER_SIZE = 64 * 1024  # bytes of request line + headers (431 above this)
+MAX_BODY_SIZE = 10 * 1024 * 1024  # bytes of request body (413 above this)
+WRITE_BUFFER_HIGH = 256 * 1024  # stop reading from a client with this much unsent
+BACKLOG = 1024  # connections the OS queues before accept()
+
+SERVER_HEADER = f'Server: AsyncHTTP/0.1 Python/{sys.version.split()[0]}\r\n'.encode()
+
+
+class ParseError(Exception):
+    """
+    A request the server can't accept; answered with `status`, then closed
+
+    `requests` holds the complete requests that came before it in the
+    same feed() call, which still get their responses first.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.requests = []
+
+
+class HTTPRequest:
+    """One parsed request"""
+
+    __slots__ = ('method', 'target', 'version', 'headers', 'body')
+
+    def __init__(self, method, target, version, headers):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers  # lower-case name -> value
+        self.body = b''
+
+    @property
+    def keep_alive(self):
+        """Does the client want the connection kept open after this request?"""
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.1':
+            return 'close' not in connection
+        return 'keep-alive' in connection
+
+
+class RequestParser:
+    """
+    Incremental HTTP/1.1 request parser.
+
+    feed() takes whatever bytes have arrived and returns the requests they
+    complete (possibly none, possibly several when the client pipelines).
+    Incomplete data is kept for the next call. A malformed request raises
+    ParseError, carrying the requests completed before it.
+    """
+
+    def __init__(self, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.buffer = bytearray()
+        self.request = None  # headers parsed, waiting for the body
+        self.body_length = 0
+        self.scanned = 0  # how far into buffer we've looked for \r\n\r\n
+
+    def feed(self, data):
+        self.buffer += data
+        requests = []
+        pos = 0  # consumed so far; trimmed once at the end, not per request
+        try:
+            while True:
+                if self.request is None:
+                    end = self.buffer.find(b'\r\n\r\n', max(pos, self.scanned - 3))
+                    if end < 0:
+                        self.scanned = len(self.buffer)
+                        if len(self.buffer) - pos > self.max_header_size:
+                            raise ParseError(431, 'Request headers too large')
+                        break
+                    if end - pos > self.max_header_size:
+                        raise ParseError(431, 'Request headers too large')
+                    self.request = self._parse_head(bytes(self.buffer[pos:end]))
+                    pos = end + 4
+                    self.scanned = pos
+
+                if len(self.buffer) - pos < self.body_length:
+                    break
+                self.request.body = bytes(self.buffer[pos:pos + self.body_length])
+                pos += self.body_length
+                self.scanned = pos
+                requests.append(self.request)
+                self.request = None
+                self.body_length = 0
+        except ParseError as error:
+            error.requests = requests
+            raise
+        finally:
+            del self.buffer[:pos]
+            self.scanned -= pos
+        return requests
+
+    def _parse_head(self, head):
+        lines = head.decode('latin-1').lstrip('\r\n').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3:
+            raise ParseError(400, f'Bad request line: {lines[0][:100]!r}')
+        method, target, version = parts
+        if version not in ('HTTP/1.1', 'HTTP/1.0'):
+            raise ParseError(505, f'Unsupported HTTP version: {version[:20]!r}')
+
+        headers = {}
+        for line in lines[1:]:
+            name, colon, value = line.partition(':')
+            if not colon or not name or name != name.strip():
+                raise ParseError(400, f'Bad header line: {line[:100]!r}')
+            name = name.lower()
+            value = value.strip()
+            headers[name] = f'{headers[name]}, {value}' if name in headers else value
+
+        if 'transfer-encoding' in headers:
+            raise ParseError(501, 'Transfer-Encoding is not supported')
+        length = headers.get('content-length', '0')
+        if not length.isdigit():
+            raise ParseError(400, f'Bad Content-Length: {length[:20]!r}')
+        self.body_length = int(length)
+        if self.body_length > self.max_body_size:
+            raise ParseError(413, f'Request body is larger than {self.max_body_size} bytes')
+        return HTTPRequest(method, target, version, headers)
+
+
+# ============================================================================
+# ROUTES
+# ============================================================================
+
+def json_response(status, data, headers=b''):
+    """(status, header bytes, body) for a JSON response"""
+    body = json.dumps(data, indent=2).encode()
+    head = (b'Content-type: application/json\r\n'
+            + f'Content-Length: {len(body)}\r\n'.encode() + headers)
+    return status, head, body
+
+
+def handle(request):
+    """
+    Route a request, the same way SimpleHTTPRequestHandler does.
+
+    Returns (status, header bytes, body).
+    """
+    url = urlsplit(request.target)
+    path = url.path
+
+    if request.method == 'GET':
+        # Fixed routes: the responses simple_http_server.py built at startup
+        if path in RESPONSES:
+            return RESPONSES[path].variant(
+                request.headers.get('if-none-match'),
+                request.headers.get('accept-encoding', '')
+            )
+        if path.startswith('/api/user'):
+            name = parse_qs(url.query).get('name', ['Guest'])[0]
+            return json_response(200, {
+                'greeting': f'Hello, {name}!',
+                'message': 'Welcome to our API'
+            })
+        return json_response(404, {
+            'error': 'Not Found',
+            'message': f'The path {path} does not exist',
+            'status_code': 404
+        })
+
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode())
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return json_response(400, {
+                'error': 'Invalid JSON',
+                'message': 'The request body must be valid JSON',
+                'status_code': 400
+            })
+        return json_response(201, {
+            'message': 'Data received successfully',
+            'received_data': data,
+            'status': 'created'
+        })
+
+    return json_response(501, {
+        'error': 'Not Implemented',
+        'message': f'Unsupported method {request.method}',
+        'status_code': 501
+    })
+
+
+# ============================================================================
+# CONNECTIONS
+# ============================================================================
+
+class HTTPServerProtocol(asyncio.Protocol):
+    """One instance per client connection"""
+
+    verbose = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.parser = RequestParser()
+        self.pending = deque()  # parsed requests not yet answered
+        self.requests_handled = 0
+        self.paused = False  # the client isn't reading fast enough
+        self.closing = False
+        self.last_activity = time.monotonic()
+        transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        self.idle_timer = asyncio.get_running_loop().call_later(IDLE_TIMEOUT, self.check_idle)
+
+    def connection_lost(self, exc):
+        self.closing = True
+        self.idle_timer.cancel()
+        self.pending.clear()
+
+    def data_received(self, data):
+        if self.closing:
+            return
+        self.last_activity = time.monotonic()
+        try:
+            self.pending.extend(self.parser.feed(data))
+        except ParseError as error:
+            # Answer the requests before it, then the error, then close
+            self.pending.extend(error.requests)
+            self.pending.append(error)
+        self.process()
+
+    def process(self):
+        """Answer pending requests in order until paused or closing"""
+        while self.pending and not self.paused and not self.closing:
+            item = self.pending.popleft()
+            if isinstance(item, ParseError):
+                self.send_error(item)
+                return
+            self.respond(item)
+
+    def respond(self, request):
+        self.requests_handled += 1
+        status, head, body = handle(request)
+        keep_alive = request.keep_alive and self.requests_handled < MAX_REQUESTS_PER_CONNECTION
+        self.write(status, head, body, keep_alive, request.version)
+        if self.verbose:
+            print(f'[{time.strftime("%d/%b/%Y %H:%M:%S")}] '
+                  f'"{request.method} {request.target} {request.version}" {status}')
+
+    def send_error(self, error):
+        body = f'{error.status} {error.message}\n'.encode()
+        head = f'Content-type: text/plain\r\nContent-Length: {len(body)}\r\n'.encode()
+        self.write(error.status, head, body, keep_alive=False)
+
+    def write(self, status, head, body, keep_alive, version='HTTP/1.1'):
+        if keep_alive:
+            connection = KEEP_ALIVE_HEADER if version == 'HTTP/1.1' else b'Connection: keep-alive\r\n'
+        else:
+            connection = b'Connection: close\r\n'
+        status_line = f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'.encode()
+        # writelines() can hand both pieces to the kernel without joining them
+        self.transport.writelines([
+            b''.join((status_line, SERVER_HEADER, date_header(), head, connection, b'\r\n')),
+            body
+        ])
+        if not keep_alive:
+            self.closing = True
+            self.pending.clear()
+            self.transport.close()  # after the write buffer is flushed
+
+    # Flow control: asyncio calls these when the write buffer crosses the
+    # high/low water marks
+    def pause_writing(self):
+        self.paused = True
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.paused = False
+        self.last_activity = time.monotonic()  # the client is reading
+        self.process()
+        if not self.closing and not self.paused:
+            self.transport.resume_reading()
+
+    def check_idle(self):
+        if self.closing:
+            return
+        # Idle means nothing received and, if paused, nothing sent either
+        idle = time.monotonic() - self.last_activity
+        if idle >= IDLE_TIMEOUT:
+            self.closing = True
+            self.transport.close()
+        else:
+            # Activity since the timer was set: check again later
+            delay = max(IDLE_TIMEOUT - idle, 0.1)
+            self.idle_timer = asyncio.get_running_loop().call_later(delay, self.check_idle)
+
+
+async def serve(port=8000, quiet=False):
+    HTTPServerProtocol.verbose = not quiet
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(HTTPServerProtocol, '', port, backlog=BACKLOG)
+
+    print(f"""
+    ╔════════════════════════════════════════════╗
+    ║   ⚡ Async HTTP Server Started!            ║
+    ╠════════════════════════════════════════════╣
+    ║   Listening on: http://localhost:{port}    ║
+    ║   Press Ctrl+C to stop                     ║
+    ╚════════════════════════════════════════════╝
+    """)
+    async with server:
+        await server.serve_forever()
+
+
+def raise_open_file_limit():
+    """Allow as many open sockets as the OS permits (one per connection)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass  # keep the current limit
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Async HTTP server')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    try:
+        asyncio.run(serve(args.port, quiet=args.quiet))
+    except KeyboardInterrupt:
+        print("\n\n✅ Server stopped. Goodbye!")
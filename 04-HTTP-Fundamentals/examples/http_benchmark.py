@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+HTTP Benchmark Example
+
+A small wrk-style load tester: it opens a number of connections, keeps
+each one busy sending requests for a fixed time, and reports requests per
+second and latency percentiles.
+
+By default it starts simple_http_server.py twice, once with --legacy
+(HTTP/1.0, one request per connection, one thread) and once in its normal
+mode (HTTP/1.1 keep-alive, a thread per connection), then
+async_http_server.py (keep-alive, one event loop), and compares them.
+With keep-alive, a connection is opened once and reused, so the TCP
+handshake and teardown are paid once instead of on every request.
+
+Try many connections (--connections 10000) to see where a thread per
+connection starts to hurt and an event loop doesn't.
+
+With --cpu it instead measures how much CPU time the request handler
+itself spends per request, by feeding it requests through a fake socket
+(no network involved). It compares building each response on every
+request with serving the precomputed response table.
+
+Usage:
+    python http_benchmark.py
+    python http_benchmark.py --connections 50 --duration 10 --path /api/data
+    python http_benchmark.py --url http://localhost:8000/status   # a running server
+    python http_benchmark.py --servers threaded,async --connections 10000
+    python http_benchmark.py --cpu
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import simple_http_server
+
+EXAMPLES_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(EXAMPLES_DIR, 'simple_http_server.py')
+ASYNC_SERVER_SCRIPT = os.path.join(EXAMPLES_DIR, 'async_http_server.py')
+
+# name -> (label, command line arguments)
+SERVERS = {
+    'legacy': ('HTTP/1.0, single thread', [SERVER_SCRIPT, '--legacy']),
+    'threaded': ('HTTP/1.1 keep-alive, threads', [SERVER_SCRIPT]),
+    'async': ('HTTP/1.1 keep-alive, asyncio', [ASYNC_SERVER_SCRIPT]),
+}
+
+REQUEST_TIMEOUT = 10  # seconds before a request counts as an error
+
+
+async def read_response(reader):
+    """
+    Read one response and return (status, keep_alive).
+
+    Uses Content-Length to find the end of the body when there is one,
+    otherwise reads until the server closes the connection.
+    """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    version, status = lines[0].split(' ', 2)[:2]
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip().lower()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return int(status), False
+
+    connection = headers.get('connection', '')
+    if version == 'HTTP/1.1':
+        keep_alive = connection != 'close'
+    else:
+        keep_alive = connection == 'keep-alive'
+    return int(status), keep_alive
+
+
+async def worker(host, port, request, deadline, latencies, counts):
+    """Send requests one after another until the deadline"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), REQUEST_TIMEOUT)
+                counts['connections'] += 1
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(read_response(reader), REQUEST_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ValueError):
+            counts['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)  # don't spin on a refusing server
+            continue
+
+        latencies.append(time.perf_counter() - start)
+        counts['requests'] += 1
+        if status >= 400:
+            counts['http_errors'] += 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, connections, duration):
+    """Keep `connections` connections busy for `duration` seconds"""
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    path = parsed.path or '/'
+    if parsed.query:
+        path += '?' + parsed.query
+    request = (f'GET {path} HTTP/1.1\r\n'
+               f'Host: {host}:{port}\r\n'
+               f'User-Agent: http_benchmark\r\n\r\n').encode()
+
+    latencies = []
+    counts = {'requests': 0, 'errors': 0, 'http_errors': 0, 'connections': 0}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        worker(host, port, request, deadline, latencies, counts)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(fraction):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+
+    return dict(counts,
+                rps=counts['requests'] / elapsed,
+                p50=percentile(0.50),
+                p99=percentile(0.99))
+
+
+def start_server(name, port):
+    """Start one of SERVERS and wait until it accepts connections"""
+    command = [sys.executable, *SERVERS[name][1], '--port', str(port), '--quiet']
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    async def wait_ready():
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.05)
+        raise RuntimeError(f'server on port {port} did not start')
+
+    asyncio.run(wait_ready())
+    return process
+
+
+class FakeSocket:
+    """
+    Just enough of a socket for a request handler: it reads requests from
+    a buffer and counts the bytes written back.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.sent = 0
+
+    def makefile(self, mode, buffering=-1):
+        return io.BytesIO(self.data)
+
+    def sendall(self, data):
+        self.sent += len(data)
+
+    def settimeout(self, timeout):
+        pass
+
+    def setsockopt(self, *args):
+        pass
+
+
+def handler_cpu_time(path, headers='', precomputed=True, connections=200):
+    """Average CPU seconds the handler spends on one request for `path`"""
+    per_connection = simple_http_server.MAX_REQUESTS_PER_CONNECTION
+    request = f'GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n'.encode()
+    data = request * per_connection
+
+    simple_http_server.PRECOMPUTED_RESPONSES = precomputed
+    handler = simple_http_server.SimpleHTTPRequestHandler
+    handler.verbose = False
+    try:
+        start = time.process_time()
+        for _ in range(connections):
+            handler(FakeSocket(data), ('127.0.0.1', 0), None)
+        return (time.process_time() - start) / (connections * per_connection)
+    finally:
+        simple_http_server.PRECOMPUTED_RESPONSES = True
+        handler.verbose = True
+
+
+def run_cpu_benchmark():
+    cases = [
+        ('/', ''),
+        ('/', 'Accept-Encoding: gzip\r\n'),
+        ('/api/data', ''),
+        ('/status', ''),
+    ]
+    etag = simple_http_server.RESPONSES['/'].etag
+    cases.append(('/', f'If-None-Match: {etag}\r\n'))
+
+    print("\nHandler CPU time per request (fake socket, no network)\n")
+    print(f"{'':<36} {'rebuilt us':>11} {'table us':>9} {'speedup':>8}")
+    for path, headers in cases:
+        rebuilt = handler_cpu_time(path, headers, precomputed=False)
+        table = handler_cpu_time(path, headers, precomputed=True)
+        label = path + (f' ({headers.split(":")[0]})' if headers else '')
+        print(f"{label:<36} {rebuilt * 1e6:>11.1f} {table * 1e6:>9.1f} {rebuilt / table:>7.1f}x")
+    print("\n'rebuilt' ignores Accept-Encoding and If-None-Match, so it always")
+    print("sends the full, uncompressed body.")
+
+
+def print_result(label, result):
+    print(f"{label:<28} {result['rps']:>9.0f} {result['p50']:>9.2f} {result['p99']:>9.2f}"
+          f" {result['connections']:>8} {result['errors']:>7}")
+
+
+def raise_open_file_limit():
+    """Each connection is a file descriptor, on this side too"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='wrk-style HTTP benchmark')
+    parser.add_argument('--url', help='Benchmark a server that is already running')
+    parser.add_argument('--path', default='/api/data', help='Path to request')
+    parser.add_argument('--connections', type=int, default=20, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+    parser.add_argument('--port', type=int, default=8100, help='Port for started servers')
+    parser.add_argument('--servers', default='legacy,threaded,async',
+                        help=f'Servers to compare, from: {", ".join(SERVERS)}')
+    parser.add_argument('--cpu', action='store_true',
+                        help='Measure handler CPU time per request instead')
+    args = parser.parse_args()
+
+    if args.cpu:
+        run_cpu_benchmark()
+        return
+
+    servers = args.servers.split(',')
+    for name in servers:
+        if name not in SERVERS:
+            parser.error(f'unknown server {name!r} (choose from {", ".join(SERVERS)})')
+    raise_open_file_limit()
+
+    print(f"\n{args.connections} connections, {args.duration}s per run\n")
+    print(f"{'':<28} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'conns':>8} {'errors':>7}")
+
+    if args.url:
+        result = asyncio.run(run_load(args.url, args.connections, args.duration))
+        print_result(args.url, result)
+        return
+
+    for name in servers:
+        label = SERVERS[name][0]
+        process = start_server(name, args.port)
+        try:
+            url = f'http://127.0.0.1:{args.port}{args.path}'
+            result = asyncio.run(run_load(url, args.connections, args.duration))
+        finally:
+            process.terminate()
+            process.wait()
+        print_result(label, result)
+
+    print("\n'conns' is how many TCP connections were opened. Keep-alive opens one per")
+    print("client (plus one per MAX_REQUESTS_PER_CONNECTION requests); HTTP/1.0 opens")
+    print("one per request.")
+
+
+if __name__ == '__main__':
+    main()
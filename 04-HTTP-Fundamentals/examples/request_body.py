@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Request Body Helpers
+
+Used by simple_http_server.py's do_POST to read request bodies a block at
+a time instead of all at once:
+
+- body_reader(): the body as a stream of blocks, whether its length is
+  given by Content-Length or it arrives with Transfer-Encoding: chunked.
+  A body larger than the limit is refused with 413.
+- iter_ndjson(): one JSON value per line (NDJSON), parsed as the lines
+  arrive
+- iter_json_array(): the items of one big JSON array, parsed one by one
+
+Only one block and one record are held in memory at a time, so a
+multi-gigabyte upload takes no more memory than a small one.
+"""
+
+import codecs
+import json
+import re
+import string
+
+BLOCK_SIZE = 64 * 1024  # bytes read from the socket at a time
+MAX_LINE_SIZE = 8 * 1024  # a chunk size line or a trailer line
+MAX_TRAILERS = 100  # header lines allowed after the last chunk
+MAX_RECORD_SIZE = 1024 * 1024  # one NDJSON line or array item
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')  # what could still follow a split number
+RECORD_SEPARATOR = b'\x1e'  # starts each application/json-seq record (RFC 7464)
+
+
+class BodyError(Exception):
+    """A request body the server can't accept; answered with `status`"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def body_reader(rfile, headers, max_size=None):
+    """
+    Return an iterator over the request body's blocks.
+
+    The headers are checked straight away, so a body that is too large
+    (by its Content-Length) or can't be decoded raises BodyError before
+    any of it is read. A chunked body can only be measured as it arrives:
+    iterating raises BodyError(413) once it goes past `max_size`.
+    """
+    transfer_encoding = headers.get('Transfer-Encoding')
+    content_length = headers.get('Content-Length')
+
+    if transfer_encoding is not None:
+        if content_length is not None:
+            # Two answers to "where does the body end?" are how request
+            # smuggling starts; refuse rather than pick one
+            raise BodyError(400, 'Both Transfer-Encoding and Content-Length')
+        if transfer_encoding.strip().lower() != 'chunked':
+            raise BodyError(501, f'Unsupported Transfer-Encoding: {transfer_encoding[:50]!r}')
+        return read_chunked(rfile, max_size)
+
+    if content_length is None:
+        return iter(())  # no body
+    if not content_length.isdigit():
+        raise BodyError(400, f'Bad Content-Length: {content_length[:20]!r}')
+    length = int(content_length)
+    if max_size is not None and length > max_size:
+        raise BodyError(413, f'Request body is larger than {max_size} bytes')
+    return read_length(rfile, length)
+
+
+def read_length(rfile, length):
+    """Yield exactly `length` bytes of body"""
+    remaining = length
+    while remaining:
+        data = rfile.read(min(remaining, BLOCK_SIZE))
+        if not data:
+            raise BodyError(400, 'Request body ended early')
+        remaining -= len(data)
+        yield data
+
+
+def read_chunked(rfile, max_size=None):
+    """
+    Yield the data of a chunked body.
+
+    Each chunk is "<size in hex>[;extensions]\\r\\n<data>\\r\\n"; a chunk of
+    size 0 ends the body, followed by optional trailer headers and a
+    blank line. Extensions and trailers are read and ignored.
+    """
+    total = 0
+    while True:
+        line = _read_line(rfile)
+        size_text = line.split(b';', 1)[0].strip()
+        if not size_text or not all(c in string.hexdigits for c in size_text.decode('latin-1')):
+            raise BodyError(400, f'Bad chunk size: {line[:20]!r}')
+        size = int(size_text, 16)
+        if size == 0:
+            break
+        total += size
+        if max_size is not None and total > max_size:
+            raise BodyError(413, f'Request body is larger than {max_size} bytes')
+
+        yield from read_length(rfile, size)
+        if _read_line(rfile).strip():
+            raise BodyError(400, 'Missing CRLF after chunk data')
+
+    for _ in range(MAX_TRAILERS + 1):
+        if not _read_line(rfile).strip():
+            return
+    raise BodyError(400, f'More than {MAX_TRAILERS} trailer lines')
+
+
+def _read_line(rfile):
+    line = rfile.readline(MAX_LINE_SIZE + 1)
+    if len(line) > MAX_LINE_SIZE:
+        raise BodyError(400, 'Chunk size or trailer line too long')
+    if not line.endswith(b'\n'):
+        raise BodyError(400, 'Request body ended early')
+    return line
+
+
+# ============================================================================
+# STREAMING JSON
+# ============================================================================
+
+def iter_lines(blocks, max_line=MAX_RECORD_SIZE):
+    """Split a stream of blocks into lines (without the \\n)"""
+    buffer = bytearray()
+    for block in blocks:
+        buffer += block
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            yield bytes(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line:
+            raise BodyError(413, f'A line is longer than {max_line} bytes')
+    if buffer:
+        yield bytes(buffer)  # no newline after the last line
+
+
+def iter_ndjson(blocks, max_record_size=MAX_RECORD_SIZE, json_seq=False):
+    """
+    Yield the JSON value on each non-blank line
+
+    With json_seq=True the body is application/json-seq, where each
+    record also starts with an RS (0x1E) character; it is dropped.
+    """
+    for number, line in enumerate(iter_lines(blocks, max_record_size), 1):
+        if json_seq and line.startswith(RECORD_SEPARATOR):
+            line = line[1:]
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:  # includes UnicodeDecodeError
+            raise BodyError(400, f'Invalid JSON on line {number}: {error}')
+
+
+def iter_json_array(blocks, max_item_size=MAX_RECORD_SIZE):
+    """
+    Yield the items of a body that is one JSON array, as they arrive.
+
+    json.loads() would need the whole array in memory. Instead, each item
+    is decoded with JSONDecoder.raw_decode() as soon as it is complete,
+    and only the text not yet decoded is kept.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    blocks = iter(blocks)
+    text = ''
+    # What comes next: '[', the first item or ']', an item, ',' or ']', nothing
+    state = 'open'
+    final = False
+
+    while not final:
+        block = next(blocks, None)
+        final = block is None
+        try:
+            text += utf8.decode(block or b'', final=final)
+        except UnicodeDecodeError as error:
+            raise BodyError(400, f'Request body is not UTF-8: {error}')
+
+        pos = 0
+        while True:
+            pos = WHITESPACE.match(text, pos).end()
+            if pos == len(text):
+                break
+            char = text[pos]
+            if state == 'open':
+                if char != '[':
+                    raise BodyError(400, 'Expected a JSON array')
+                pos += 1
+                state = 'first'
+            elif char == ']' and state in ('first', 'next'):
+                pos += 1
+                state = 'done'
+            elif state == 'next':
+                if char != ',':
+                    raise BodyError(400, f'Expected "," or "]", got {char!r}')
+                pos += 1
+                state = 'item'
+            elif state in ('first', 'item'):
+                try:
+                    item, end = decoder.raw_decode(text, pos)
+                except ValueError as error:  # JSONDecodeError, or a number too long
+                    if final:
+                        raise BodyError(400, f'Invalid JSON: {getattr(error, "msg", error)}')
+                    # Most likely the item isn't complete yet. If it is
+                    # really invalid, that shows once the body ends or
+                    # the item outgrows max_item_size.
+                    break
+                if not final and NUMBER_TAIL.match(text, end).end() == len(text):
+                    # Hold back an item that touches the end of the buffer:
+                    # a number might go on ("12" of "123", "1." of "1.5")
+                    break
+                yield item
+                pos = end
+                state = 'next'
+            else:
+                raise BodyError(400, 'Unexpected data after the JSON array')
+
+        text = text[pos:]
+        if len(text) > max_item_size:
+            raise BodyError(413, f'An array item is larger than {max_item_size} bytes')
+
+    if state != 'done':
+        raise BodyError(400, 'Request body ended before the JSON array was closed')
@@ -5,21 +5,431 @@ Simple HTTP Server Example
 This script demonstrates how to create a basic HTTP server using Python's
 built-in http.server module. It responds to GET requests with a simple HTML page.
 
+The server speaks HTTP/1.1 with persistent (keep-alive) connections: a
+client can send many requests over one TCP connection instead of paying
+for a new handshake each time. Each connection gets its own thread.
+
 Usage:
     python simple_http_server.py
+    python simple_http_server.py --port 8080 --quiet
+    python simple_http_server.py --legacy   # HTTP/1.0, one request at a time
+    python simple_http_server.py --static ./public   # also serve files at /static/
+    python simple_http_server.py --max-body-size 1048576   # refuse bigger POST bodies
     
 Then visit: http://localhost:8000
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
+from email.utils import formatdate, parsedate_to_datetime
+import argparse
+import gzip
+import hashlib
 import json
+import os
+import time
 from urllib.parse import parse_qs, urlparse
 
+from request_body import BodyError, body_reader, iter_json_array, iter_ndjson
+from static_files import FileCache, parse_range, resolve_path
+
+# Keep-alive settings
+IDLE_TIMEOUT = 5  # seconds a connection may sit idle before it is closed
+MAX_REQUESTS_PER_CONNECTION = 100  # then the server closes the connection
+
+KEEP_ALIVE_HEADER = (f'Keep-Alive: timeout={IDLE_TIMEOUT}, '
+                     f'max={MAX_REQUESTS_PER_CONNECTION}\r\n').encode()
+
+# Static directory mode (--static DIR): files are served under this prefix
+STATIC_PREFIX = '/static/'
+# Files kept open between requests. The shared descriptors rely on
+# os.sendfile() reading at an explicit offset; without it (Windows),
+# every request opens the file itself.
+OPEN_FILE_CACHE_SIZE = 64 if hasattr(os, 'sendfile') else 0
+
+# POST bodies: a JSON body is read whole, up to MAX_BODY_SIZE bytes (413
+# above that). STREAM_PATH instead parses the body record by record as it
+# arrives, so it takes any size in constant memory.
+MAX_BODY_SIZE = 10 * 1024 * 1024
+STREAM_PATH = '/api/stream'
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+# Serve the fixed routes from RESPONSES (built once at startup) instead of
+# rebuilding them on every request
+PRECOMPUTED_RESPONSES = True
+
+# Content of the fixed routes
+HOME_PAGE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Simple HTTP Server</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #333; }
+        .endpoint { background: #f4f4f4; padding: 10px; margin: 10px 0; }
+    </style>
+</head>
+<body>
+    <h1>🌐 Welcome to Simple HTTP Server!</h1>
+    <p>This server demonstrates basic HTTP concepts.</p>
+    
+    <h2>Available Endpoints:</h2>
+    <div class="endpoint">
+        <strong>GET /</strong> - This page
+    </div>
+    <div class="endpoint">
+        <strong>GET /api/data</strong> - Returns JSON data
+    </div>
+    <div class="endpoint">
+        <strong>GET /api/user?name=YourName</strong> - Returns personalized JSON
+    </div>
+    <div class="endpoint">
+        <strong>GET /status</strong> - Server status
+    </div>
+    
+    <h2>Try these commands in your terminal:</h2>
+    <code>curl http://localhost:8000/api/data</code><br>
+    <code>curl http://localhost:8000/api/user?name=Alice</code><br>
+    <code>curl -i http://localhost:8000/status</code>
+</body>
+</html>
+"""
+
+API_DATA = {
+    'message': 'Hello from the server!',
+    'timestamp': '2024-01-01T12:00:00Z',
+    'items': ['apple', 'banana', 'cherry']
+}
+
+SERVER_STATUS = {
+    'status': 'running',
+    'version': '1.0.0',
+    'endpoints': 4
+}
+
+
+class PrecomputedResponse:
+    """
+    A response whose bytes are all worked out once, up front.
+    
+    Holds the encoded body, a gzip-compressed copy (when that is smaller)
+    and the header lines for each, including Content-Length and an ETag.
+    Serving it is then just a lookup and a couple of writes.
+    """
+    
+    def __init__(self, status, content_type, body, headers=None):
+        self.status = status
+        self.body = body
+        # The ETag is a fingerprint of the body: clients send it back in
+        # If-None-Match and get "304 Not Modified" instead of the body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        
+        common = [('Content-type', content_type)]
+        common += list((headers or {}).items())
+        
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        self.gzip_body = compressed if len(compressed) < len(body) else None
+        if self.gzip_body:
+            # Caches must not hand the gzip copy to a client that can't read it
+            common.append(('Vary', 'Accept-Encoding'))
+            # Different bytes, so the gzip copy gets an ETag of its own
+            self.gzip_etag = self.etag[:-1] + '-gzip"'
+            self.gzip_head = self._encode(common + [
+                ('ETag', self.gzip_etag),
+                ('Content-Encoding', 'gzip'),
+                ('Content-Length', len(self.gzip_body))
+            ])
+            self.gzip_not_modified_head = self._not_modified_head(common, self.gzip_etag)
+        self.head = self._encode(common + [('ETag', self.etag), ('Content-Length', len(body))])
+        self.not_modified_head = self._not_modified_head(common, self.etag)
+    
+    def variant(self, if_none_match, accept_encoding):
+        """
+        (status, header bytes, body) to send for these request headers:
+        gzip if the client accepts it, and 304 if the client's ETag
+        matches the variant it would get.
+        """
+        if self.gzip_body and accepts_gzip(accept_encoding):
+            if etag_matches(if_none_match, self.gzip_etag):
+                return 304, self.gzip_not_modified_head, b''
+            return self.status, self.gzip_head, self.gzip_body
+        if etag_matches(if_none_match, self.etag):
+            return 304, self.not_modified_head, b''
+        return self.status, self.head, self.body
+    
+    @classmethod
+    def _not_modified_head(cls, common, etag):
+        return cls._encode([('ETag', etag)] + [
+            (name, value) for name, value in common if name == 'Vary'
+        ])
+    
+    @staticmethod
+    def _encode(headers):
+        return ''.join(f'{name}: {value}\r\n' for name, value in headers).encode('latin-1')
+
+
+def build_responses():
+    """The response table for every route whose response never changes"""
+    home = PrecomputedResponse(200, 'text/html', HOME_PAGE.encode())
+    return {
+        '/': home,
+        '/index.html': home,
+        '/api/data': PrecomputedResponse(
+            200, 'application/json', json.dumps(API_DATA, indent=2).encode(),
+            {'Access-Control-Allow-Origin': '*'}
+        ),
+        '/status': PrecomputedResponse(
+            200, 'application/json', json.dumps(SERVER_STATUS, indent=2).encode()
+        )
+    }
+
+
+RESPONSES = build_responses()
+
+
+def etag_matches(if_none_match, etag):
+    """
+    True if an If-None-Match header matches etag
+    
+    The header is either "*" or a comma-separated list of entity tags.
+    If-None-Match uses weak comparison, so W/"abc" matches "abc".
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in ('*', etag):
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip"""
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+_date_cache = [0, b'']
+
+
+def date_header():
+    """The Date header line, reformatted at most once a second"""
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache[:] = [now, f'Date: {formatdate(now, usegmt=True)}\r\n'.encode()]
+    return _date_cache[1]
+
+
 class SimpleHTTPRequestHandler(BaseHTTPRequestHandler):
     """
     Custom request handler that responds to different HTTP methods and paths.
+    
+    With protocol_version = 'HTTP/1.1' the connection stays open after a
+    response, so every response MUST say how long its body is
+    (Content-Length). Otherwise the client can't tell where one response
+    ends and the next begins. send_body() takes care of that.
     """
     
+    protocol_version = 'HTTP/1.1'
+    
+    # Socket timeout: a connection that sends nothing for this long is
+    # closed, so idle clients can't hold a thread forever
+    timeout = IDLE_TIMEOUT
+    
+    # The headers and the body are written separately. On a kept-alive
+    # connection, Nagle's algorithm would hold the body back until the
+    # client ACKs the headers, and clients delay ACKs by up to ~40ms.
+    disable_nagle_algorithm = True
+    
+    # Log every request (turned off by --quiet)
+    verbose = True
+    
+    # Static directory mode: the directory (set by run_server) and the
+    # open files shared by all connections
+    static_root = None
+    file_cache = FileCache(OPEN_FILE_CACHE_SIZE)
+    
+    # Largest POST body read into memory (set by --max-body-size)
+    max_body_size = MAX_BODY_SIZE
+    
+    def setup(self):
+        super().setup()
+        self.requests_on_connection = 0
+        self.server_header = f'Server: {self.version_string()}\r\n'.encode()
+    
+    def parse_request(self):
+        self.requests_on_connection += 1
+        return super().parse_request()
+    
+    def send_body(self, status, content_type, body, headers=None):
+        """
+        Send a complete response: status line, headers and body.
+        
+        Args:
+            status (int): HTTP status code
+            content_type (str): Value of the Content-Type header
+            body (bytes): Response body
+            headers (dict): Any extra headers
+        """
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_connection_headers()
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_connection_headers(self):
+        """Say whether the connection stays open after this response"""
+        if self.protocol_version != 'HTTP/1.1':
+            return
+        if (self.requests_on_connection >= MAX_REQUESTS_PER_CONNECTION
+                or self.close_connection):
+            # Sending "Connection: close" also makes the handler close
+            # the connection after this response
+            self.send_header('Connection', 'close')
+        else:
+            self.send_header(
+                'Keep-Alive',
+                f'timeout={IDLE_TIMEOUT}, max={MAX_REQUESTS_PER_CONNECTION}'
+            )
+    
+    def send_json(self, status, data, headers=None):
+        """Send `data` as a JSON response"""
+        body = json.dumps(data, indent=2).encode()
+        self.send_body(status, 'application/json', body, headers)
+    
+    def send_precomputed(self, response):
+        """
+        Send a PrecomputedResponse.
+        
+        Picks the 304, gzip or plain variant, then writes the status line
+        and headers in one write and the body straight from the stored
+        bytes (a memoryview, so nothing is copied on the way).
+        """
+        status, head, body = response.variant(
+            self.headers.get('If-None-Match'),
+            self.headers.get('Accept-Encoding', '')
+        )
+        
+        self.log_request(status)
+        status_line = f'{self.protocol_version} {status} {self.responses[status][0]}\r\n'
+        self.wfile.write(b''.join((
+            status_line.encode('latin-1'),
+            self.server_header,
+            date_header(),
+            head,
+            self.connection_header(),
+            b'\r\n'
+        )))
+        if body:
+            self.wfile.write(memoryview(body))
+    
+    def connection_header(self):
+        """Keep-Alive or Connection: close, as send_connection_headers() would send"""
+        if self.protocol_version != 'HTTP/1.1':
+            return b''
+        if self.requests_on_connection >= MAX_REQUESTS_PER_CONNECTION or self.close_connection:
+            self.close_connection = True
+            return b'Connection: close\r\n'
+        return KEEP_ALIVE_HEADER
+    
+    def send_static(self, url_path, head_only=False):
+        """
+        Send a file from the static directory.
+        
+        Demonstrates:
+        - Conditional requests (If-None-Match / If-Modified-Since -> 304)
+        - Range requests (206 Partial Content, 416 Range Not Satisfiable)
+        - Zero-copy sending with socket.sendfile()
+        """
+        path = resolve_path(self.static_root, url_path)
+        if path is None:
+            self.send_json(404, {
+                'error': 'Not Found',
+                'message': f'The path {self.path} does not exist',
+                'status_code': 404
+            })
+            return
+        
+        file = self.file_cache.acquire(path)
+        try:
+            self._send_file(file, head_only)
+        finally:
+            self.file_cache.release(file)
+    
+    def _send_file(self, file, head_only):
+        last_modified = formatdate(file.mtime, usegmt=True)
+        validators = {'ETag': file.etag, 'Last-Modified': last_modified}
+        
+        if self.not_modified(file):
+            self.send_response(304)
+            for name, value in validators.items():
+                self.send_header(name, value)
+            self.send_connection_headers()
+            self.end_headers()
+            return
+        
+        status, start, length = 200, 0, file.size
+        byte_range = None
+        if_range = self.headers.get('If-Range')
+        if if_range is None or if_range in (file.etag, last_modified):
+            # If-Range: only honour Range if the client's copy is current
+            byte_range = parse_range(self.headers.get('Range'), file.size)
+        if byte_range == 'unsatisfiable':
+            self.send_body(416, 'text/plain', b'Range Not Satisfiable\n',
+                           {'Content-Range': f'bytes */{file.size}'})
+            return
+        if byte_range is not None:
+            status = 206
+            start, end = byte_range
+            length = end - start + 1
+        
+        self.send_response(status)
+        self.send_header('Content-type', file.content_type)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{start + length - 1}/{file.size}')
+        for name, value in validators.items():
+            self.send_header(name, value)
+        self.send_connection_headers()
+        self.end_headers()
+        
+        if not head_only and length:
+            # The kernel copies straight from the file to the socket
+            with file.open() as f:
+                self.connection.sendfile(f, start, length)
+    
+    def not_modified(self, file):
+        """True if the client's cached copy (If-None-Match/If-Modified-Since) is current"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            # If-None-Match wins over If-Modified-Since when both are sent
+            return etag_matches(if_none_match, file.etag)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return file.mtime <= since
+        return False
+    
+    def do_HEAD(self):
+        """Handle HEAD requests for static files (headers only, no body)"""
+        path = urlparse(self.path).path
+        if self.static_root and path.startswith(STATIC_PREFIX):
+            self.send_static(path[len(STATIC_PREFIX):], head_only=True)
+        else:
+            self.send_error(405, 'HEAD is only supported for static files')
+    
     def do_GET(self):
         """
         Handle GET requests.
@@ -32,63 +442,23 @@ class SimpleHTTPRequestHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
+        # Fixed routes: serve the response prepared at startup
+        if PRECOMPUTED_RESPONSES and path in RESPONSES:
+            self.send_precomputed(RESPONSES[path])
+            return
+        
+        # Static directory mode: /static/<file>
+        if self.static_root and path.startswith(STATIC_PREFIX):
+            self.send_static(path[len(STATIC_PREFIX):])
+            return
+        
         # Route 1: Home page
         if path == '/' or path == '/index.html':
-            self.send_response(200)  # OK
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Simple HTTP Server</title>
-                <style>
-                    body { font-family: Arial, sans-serif; margin: 40px; }
-                    h1 { color: #333; }
-                    .endpoint { background: #f4f4f4; padding: 10px; margin: 10px 0; }
-                </style>
-            </head>
-            <body>
-                <h1>🌐 Welcome to Simple HTTP Server!</h1>
-                <p>This server demonstrates basic HTTP concepts.</p>
-                
-                <h2>Available Endpoints:</h2>
-                <div class="endpoint">
-                    <strong>GET /</strong> - This page
-                </div>
-                <div class="endpoint">
-                    <strong>GET /api/data</strong> - Returns JSON data
-                </div>
-                <div class="endpoint">
-                    <strong>GET /api/user?name=YourName</strong> - Returns personalized JSON
-                </div>
-                <div class="endpoint">
-                    <strong>GET /status</strong> - Server status
-                </div>
-                
-                <h2>Try these commands in your terminal:</h2>
-                <code>curl http://localhost:8000/api/data</code><br>
-                <code>curl http://localhost:8000/api/user?name=Alice</code><br>
-                <code>curl -i http://localhost:8000/status</code>
-            </body>
-            </html>
-            """
-            self.wfile.write(html.encode())
+            self.send_body(200, 'text/html', HOME_PAGE.encode())  # 200 OK
         
         # Route 2: JSON API endpoint
         elif path == '/api/data':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')  # CORS header
-            self.end_headers()
-            
-            data = {
-                'message': 'Hello from the server!',
-                'timestamp': '2024-01-01T12:00:00Z',
-                'items': ['apple', 'banana', 'cherry']
-            }
-            self.wfile.write(json.dumps(data, indent=2).encode())
+            self.send_json(200, API_DATA, {'Access-Control-Allow-Origin': '*'})  # CORS header
         
         # Route 3: Parameterized endpoint
         elif path.startswith('/api/user'):
@@ -96,99 +466,185 @@ class SimpleHTTPRequestHandler(BaseHTTPRequestHandler):
             query_params = parse_qs(parsed_path.query)
             name = query_params.get('name', ['Guest'])[0]
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
             response = {
                 'greeting': f'Hello, {name}!',
                 'message': 'Welcome to our API'
             }
-            self.wfile.write(json.dumps(response, indent=2).encode())
+            self.send_json(200, response)
         
         # Route 4: Status endpoint
         elif path == '/status':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            status = {
-                'status': 'running',
-                'version': '1.0.0',
-                'endpoints': 4
-            }
-            self.wfile.write(json.dumps(status, indent=2).encode())
+            self.send_json(200, SERVER_STATUS)
         
         # Route 5: 404 - Not Found
         else:
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
             error = {
                 'error': 'Not Found',
                 'message': f'The path {path} does not exist',
                 'status_code': 404
             }
-            self.wfile.write(json.dumps(error, indent=2).encode())
+            self.send_json(404, error)
+    
+    def handle_expect_100(self):
+        """
+        A client that sends "Expect: 100-continue" waits for the go-ahead
+        before sending its body, so a body that is too big can be refused
+        before it is uploaded at all.
+        """
+        length = self.headers.get('Content-Length', '')
+        if (length.isdigit() and int(length) > self.max_body_size
+                and urlparse(self.path).path != STREAM_PATH):
+            self.send_body_error(BodyError(
+                413, f'Request body is larger than {self.max_body_size} bytes'))
+            return False
+        return super().handle_expect_100()
+    
+    def send_body_error(self, error):
+        """
+        Answer a BodyError. Whatever is left of the body is still unread,
+        so the connection can't be used for another request.
+        """
+        self.close_connection = True
+        self.send_json(error.status, {
+            'error': self.responses[error.status][0],
+            'message': error.message,
+            'status_code': error.status
+        })
     
     def do_POST(self):
         """
         Handle POST requests.
         Demonstrates:
-        - Reading request body
+        - Reading request body (Content-Length or chunked)
         - Parsing JSON data
         - Sending appropriate response
         """
-        # Read the request body
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
+        path = urlparse(self.path).path
+        try:
+            if path == STREAM_PATH:
+                self.receive_stream()
+                return
+            # Read the request body, refusing it if it is too large
+            blocks = body_reader(self.rfile, self.headers, self.max_body_size)
+            post_data = b''.join(blocks)
+        except BodyError as error:
+            self.send_body_error(error)
+            return
         
         try:
             # Try to parse as JSON
             data = json.loads(post_data.decode())
             
             # Send success response
-            self.send_response(201)  # Created
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
             response = {
                 'message': 'Data received successfully',
                 'received_data': data,
                 'status': 'created'
             }
-            self.wfile.write(json.dumps(response, indent=2).encode())
+            self.send_json(201, response)  # Created
             
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, UnicodeDecodeError):
             # Send error response for invalid JSON
-            self.send_response(400)  # Bad Request
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
             error = {
                 'error': 'Invalid JSON',
                 'message': 'The request body must be valid JSON',
                 'status_code': 400
             }
-            self.wfile.write(json.dumps(error, indent=2).encode())
+            self.send_json(400, error)  # Bad Request
+    
+    def receive_stream(self):
+        """
+        POST /api/stream: a body of any size, processed one record at a time.
+        
+        The body is NDJSON (one JSON value per line) when the Content-Type
+        says so, otherwise one JSON array. Each record is parsed as soon as
+        it has arrived and then dropped, so memory use doesn't grow with
+        the size of the upload. Here "processing" is just counting.
+        """
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        blocks = body_reader(self.rfile, self.headers)
+        received = 0
+        
+        def counted(blocks):
+            nonlocal received
+            for block in blocks:
+                received += len(block)
+                yield block
+        
+        if content_type in NDJSON_TYPES:
+            records = iter_ndjson(counted(blocks),
+                                  json_seq=content_type == 'application/json-seq')
+        else:
+            records = iter_json_array(counted(blocks))
+        count = 0
+        kinds = {}
+        for record in records:
+            count += 1
+            kind = type(record).__name__
+            kinds[kind] = kinds.get(kind, 0) + 1
+        
+        self.send_json(200, {
+            'message': 'Stream processed',
+            'records': count,
+            'record_types': kinds,
+            'bytes': received
+        })
     
     def log_message(self, format, *args):
         """
         Custom log format to show what's happening.
         """
-        print(f"[{self.log_date_time_string()}] {format % args}")
+        if self.verbose:
+            print(f"[{self.log_date_time_string()}] {format % args}")
 
 
-def run_server(port=8000):
+class LegacyHTTPRequestHandler(SimpleHTTPRequestHandler):
+    """
+    The same routes over HTTP/1.0: one request per connection.
+    
+    Used with --legacy to compare against keep-alive.
+    """
+    
+    protocol_version = 'HTTP/1.0'
+
+
+class KeepAliveHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with room for more than a handful of waiting connections"""
+    
+    # Connections the OS queues until accept(). The default of 5 makes
+    # clients see refused or reset connections as soon as a burst arrives.
+    request_queue_size = 1024
+
+
+def run_server(port=8000, legacy=False, quiet=False, static_dir=None,
+               max_body_size=MAX_BODY_SIZE):
     """
     Start the HTTP server.
     
     Args:
         port (int): Port number to listen on (default: 8000)
+        legacy (bool): Serve HTTP/1.0 from a single thread, one request
+            per connection (the behaviour before keep-alive was added)
+        quiet (bool): Don't log every request (logging slows the server down)
+        static_dir (str): Also serve the files in this directory under
+            STATIC_PREFIX (default: no static files)
+        max_body_size (int): Largest POST body, in bytes, read into memory;
+            bigger ones get 413 (STREAM_PATH has no limit)
     """
     server_address = ('', port)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
+    if legacy:
+        handler = LegacyHTTPRequestHandler
+        httpd = HTTPServer(server_address, handler)
+    else:
+        # One thread per connection, so a client that keeps its connection
+        # open (or is slow) doesn't block everyone else
+        handler = SimpleHTTPRequestHandler
+        httpd = KeepAliveHTTPServer(server_address, handler)
+    handler.verbose = not quiet
+    handler.max_body_size = max_body_size
+    if static_dir:
+        handler.static_root = os.path.realpath(static_dir)
+        print(f"Serving files from {handler.static_root} at {STATIC_PREFIX}")
     
     print(f"""
     ╔════════════════════════════════════════════╗
@@ -207,5 +663,18 @@ def run_server(port=8000):
 
 
 if __name__ == '__main__':
-    # Start the server on port 8000
-    run_server(8000)
+    parser = argparse.ArgumentParser(description='Simple HTTP server')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--legacy', action='store_true',
+                        help='HTTP/1.0, single-threaded, no keep-alive')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+    parser.add_argument('--static', metavar='DIR',
+                        help=f'Serve the files in DIR at {STATIC_PREFIX}')
+    parser.add_argument('--max-body-size', type=int, default=MAX_BODY_SIZE, metavar='BYTES',
+                        help=f'Largest POST body to accept (default: {MAX_BODY_SIZE})')
+    args = parser.parse_args()
+    
+    if args.static and not os.path.isdir(args.static):
+        parser.error(f'{args.static} is not a directory')
+    run_server(args.port, legacy=args.legacy, quiet=args.quiet, static_dir=args.static,
+               max_body_size=args.max_body_size)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Static File Helpers
+
+Used by simple_http_server.py's static directory mode (--static DIR):
+
+- resolve_path(): map a URL path to a file inside the directory, refusing
+  anything that would escape it (../, symlinks pointing outside, ...)
+- FileCache: keeps recently served files open, so a popular file isn't
+  re-opened on every request
+- parse_range(): understand a "Range: bytes=..." request header
+
+The file contents themselves are sent with socket.sendfile(), which hands
+the copy to the kernel (os.sendfile) when the OS supports it. The bytes go
+from the page cache to the socket without passing through Python.
+"""
+
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from urllib.parse import unquote
+
+
+def resolve_path(root, url_path):
+    """
+    Return the real path of the file `url_path` refers to, or None.
+
+    `root` must be an absolute, real path (see os.path.realpath). The
+    result is always inside it: "..", encoded slashes and symlinks that
+    lead elsewhere all give None.
+    """
+    path = unquote(url_path)
+    if '\x00' in path or '\\' in path:
+        return None
+    # normpath folds "a/../b" and "//"; a leading "/" keeps ".." from
+    # climbing above the root at this stage
+    path = posixpath.normpath('/' + path).lstrip('/')
+    full = os.path.realpath(os.path.join(root, *path.split('/')))
+    if os.path.commonpath([root, full]) != root:
+        return None
+    if os.path.isdir(full):
+        full = os.path.join(full, 'index.html')
+    return full if os.path.isfile(full) else None
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header for a file of `size` bytes.
+
+    Returns (start, end) with `end` inclusive, 'unsatisfiable' if the
+    range lies outside the file, or None to ignore the header and send the
+    whole file (malformed headers and multiple ranges).
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None  # multipart/byteranges responses aren't supported
+    first, dash, last = spec.partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:
+            # "-500": the last 500 bytes
+            length = int(last)
+            if length <= 0:
+                return 'unsatisfiable'
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        return 'unsatisfiable'
+    return start, min(end, size - 1)
+
+
+class OpenFile:
+    """A file kept open by FileCache, plus what the headers need to know"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        # fstat, not stat: describe the file that was actually opened
+        stat = os.fstat(self.fd)
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        # Changes whenever the file is replaced or modified
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.refs = 0
+        self.cached = True
+
+    def open(self):
+        """A file object for this request (the descriptor stays open)"""
+        return open(self.fd, 'rb', buffering=0, closefd=False)
+
+
+class FileCache:
+    """
+    An LRU cache of open file descriptors.
+
+    Every request still stat()s the file, so changes are picked up
+    straight away, but the file is only opened once. Files are reference
+    counted: one that is evicted while a request is still sending it is
+    closed when that request releases it.
+    """
+
+    def __init__(self, max_open=64):
+        self.max_open = max_open
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, path):
+        """Return an OpenFile for `path` (call release() when done)"""
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and entry.identity == identity:
+                self._files.move_to_end(path)
+                entry.refs += 1
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if entry is not None:
+                self._evict(path)
+
+        # Open outside the lock; a slow disk shouldn't block other requests
+        entry = OpenFile(path)
+        entry.refs = 1
+        with self._lock:
+            if self.max_open <= 0 or path in self._files:
+                entry.cached = False  # another thread cached it first
+            else:
+                self._files[path] = entry
+                while len(self._files) > self.max_open:
+                    self._evict(next(iter(self._files)))
+        return entry
+
+    def release(self, entry):
+        with self._lock:
+            entry.refs -= 1
+            close = entry.refs == 0 and not entry.cached
+        if close:
+            os.close(entry.fd)
+
+    def close(self):
+        """Evict every file (each is closed once no request uses it)"""
+        with self._lock:
+            for path in list(self._files):
+                self._evict(path)
+
+    def _evict(self, path):
+        # Caller holds the lock
+        entry = self._files.pop(path)
+        entry.cached = False
+        if entry.refs == 0:
+            os.close(entry.fd)
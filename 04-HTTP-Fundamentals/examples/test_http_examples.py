@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+HTTP EXAMPLE TESTS
+==================
+
+Table-driven tests for the parsing code behind simple_http_server.py and
+async_http_server.py. Most tests run in-process on byte strings; the
+rest start simple_http_server.py on a free port in a background thread.
+
+Usage:
+    pytest test_http_examples.py
+"""
+
+import asyncio
+import gzip
+import http.client
+import io
+import json
+import os
+import re
+import threading
+
+import pytest
+
+import simple_http_server
+from async_http_server import HTTPServerProtocol, ParseError, RequestParser
+from request_body import BodyError, body_reader, iter_json_array, iter_ndjson, read_chunked
+from static_files import FileCache, parse_range, resolve_path
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Serve tmp_path/static at /static/ from a thread; yields a connection factory"""
+    static = tmp_path / 'static'
+    static.mkdir()
+    handler = simple_http_server.SimpleHTTPRequestHandler
+    monkeypatch.setattr(handler, 'verbose', False)
+    monkeypatch.setattr(handler, 'static_root', os.path.realpath(static))
+    monkeypatch.setattr(handler, 'file_cache', FileCache())
+    httpd = simple_http_server.KeepAliveHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def connect():
+        return http.client.HTTPConnection('127.0.0.1', httpd.server_port, timeout=5)
+
+    connect.static = static
+    yield connect
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(conn, path, headers=None):
+    """GET path on a kept-alive connection, return (response, body)"""
+    conn.request('GET', path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def collect(blocks):
+    return b''.join(blocks)
+
+
+def body_error(fn, *args, **kwargs):
+    """Run fn to completion and return the BodyError it raised"""
+    with pytest.raises(BodyError) as excinfo:
+        result = fn(*args, **kwargs)
+        if result is not None:
+            list(result)
+    return excinfo.value
+
+
+# ============================================================================
+# REQUEST BODIES
+# ============================================================================
+
+@pytest.mark.parametrize('wire, body', [
+    (b'5\r\nhello\r\n0\r\n\r\n', b'hello'),
+    (b'5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n', b'hello world'),
+    (b'A;name=value\r\n0123456789\r\n0\r\n\r\n', b'0123456789'),
+    (b'a\r\n0123456789\r\n0\r\nX-Trailer: 1\r\n\r\n', b'0123456789'),
+    (b'0\r\n\r\n', b''),
+])
+def test_read_chunked(wire, body):
+    """Chunk sizes, extensions and trailers are decoded"""
+    assert collect(read_chunked(io.BytesIO(wire))) == body
+
+
+@pytest.mark.parametrize('wire, status', [
+    (b'zz\r\nhello\r\n0\r\n\r\n', 400),  # not hex
+    (b'\r\n', 400),  # no size at all
+    (b'5\r\nhelloXX0\r\n\r\n', 400),  # no CRLF after the data
+    (b'5\r\nhel', 400),  # ends inside a chunk
+    (b'5\r\nhello\r\n', 400),  # no last chunk
+    (b'5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n', 413),  # over max_size=10
+    (b'1' * 9000 + b'\r\n', 400),  # size line too long
+    (b'0\r\n' + b'X: 1\r\n' * 101 + b'\r\n', 400),  # too many trailers
+])
+def test_read_chunked_rejects(wire, status):
+    """Malformed or oversized chunked bodies raise BodyError"""
+    assert body_error(read_chunked, io.BytesIO(wire), max_size=10).status == status
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({'Transfer-Encoding': 'chunked', 'Content-Length': '5'}, 400),
+    ({'Transfer-Encoding': 'gzip'}, 501),
+    ({'Content-Length': '-1'}, 400),
+    ({'Content-Length': '11'}, 413),
+])
+def test_body_reader_checks_headers(headers, status):
+    """Conflicting, unsupported or too-large framing is refused up front"""
+    assert body_error(body_reader, io.BytesIO(b''), headers, max_size=10).status == status
+
+
+def test_body_reader_content_length():
+    """Exactly Content-Length bytes are read, and a short body is an error"""
+    rfile = io.BytesIO(b'helloEXTRA')
+    assert collect(body_reader(rfile, {'Content-Length': '5'})) == b'hello'
+    assert collect(body_reader(io.BytesIO(b''), {})) == b''
+    assert body_error(body_reader, io.BytesIO(b'hi'), {'Content-Length': '5'}).status == 400
+
+
+ARRAY = '[1.5, -2e10, 0.25E-3, 12345, "café \\u00e9", {"k": [true, null]}, [], false]'
+
+
+def test_json_array_split_at_every_offset():
+    """Where the blocks split doesn't change what is decoded"""
+    body = ARRAY.encode()
+    expected = json.loads(body)
+    for offset in range(len(body) + 1):
+        assert list(iter_json_array([body[:offset], body[offset:]])) == expected, offset
+
+
+def test_json_array_one_byte_blocks():
+    """Even a body that arrives a byte at a time decodes correctly"""
+    body = (' ' + ARRAY + ' ').encode()
+    assert list(iter_json_array(body[i:i + 1] for i in range(len(body)))) == json.loads(body)
+
+
+@pytest.mark.parametrize('body, status', [
+    (b'{"not": "an array"}', 400),
+    (b'[1 2]', 400),
+    (b'[1, ]', 400),
+    (b'[1.]', 400),
+    (b'[1, 2', 400),
+    (b'[1] [2]', 400),
+    (b'["\xff"]', 400),
+    (b'["' + b'x' * 200 + b'"]', 413),
+])
+def test_json_array_rejects(body, status):
+    """Invalid arrays are 400, an item over the limit is 413"""
+    blocks = [body[i:i + 16] for i in range(0, len(body), 16)]
+    assert body_error(iter_json_array, blocks, max_item_size=100).status == status
+
+
+def test_ndjson_lines():
+    """One value per line, blank lines skipped, last newline optional"""
+    body = b'{"id": 1}\n\n[2]\n"three"'
+    for offset in range(len(body) + 1):
+        assert list(iter_ndjson([body[:offset], body[offset:]])) == [{'id': 1}, [2], 'three']
+    assert body_error(iter_ndjson, [b'{"id": 1}\n{oops}\n']).message.startswith(
+        'Invalid JSON on line 2')
+
+
+def test_json_seq_records():
+    """application/json-seq records start with RS, which is dropped"""
+    body = b'\x1e{"id": 1}\n\x1e[2]\n'
+    assert list(iter_ndjson([body], json_seq=True)) == [{'id': 1}, [2]]
+    assert body_error(iter_ndjson, [body]).status == 400
+
+
+def test_stream_endpoint_split_float(server):
+    """A float whose '.' is the last byte of a 64 KiB block is still valid"""
+    head = b'[' + b'0,' * 20000
+    padding = b' ' * (65535 - len(head) - 1)
+    body = head + padding + b'1.5]'
+    assert body.index(b'.') == 65535
+
+    conn = server()
+    for content_type, payload, records in (
+            ('application/json', body, 20001),
+            ('application/json-seq', b'\x1e{"id": 1}\n\x1e1.5\n', 2)):
+        conn.request('POST', '/api/stream', body=payload, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        result = json.loads(response.read())
+        assert response.status == 200, result
+        assert result['records'] == records
+    conn.close()
+
+# ============================================================================
+# ASYNC REQUEST PARSER
+# ============================================================================
+
+GET = b'GET /status HTTP/1.1\r\nHost: localhost\r\n\r\n'
+POST = (b'POST /api/data HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        b'Content-Length: 11\r\n\r\n{"id": 123}')
+BAD = b'NONSENSE\r\n\r\n'
+
+
+def test_parser_split_at_every_offset():
+    """A request split anywhere, even inside \\r\\n\\r\\n, is parsed once complete"""
+    wire = GET + POST
+    for offset in range(len(wire) + 1):
+        parser = RequestParser()
+        requests = parser.feed(wire[:offset]) + parser.feed(wire[offset:])
+        assert [(r.method, r.target, r.body) for r in requests] == [
+            ('GET', '/status', b''), ('POST', '/api/data', b'{"id": 123}')], offset
+        assert not parser.buffer
+
+
+def test_parser_pipelined_requests():
+    """Several requests in one chunk all come back, in order"""
+    requests = RequestParser().feed(GET + POST + GET)
+    assert [request.method for request in requests] == ['GET', 'POST', 'GET']
+    assert requests[0].headers['host'] == 'localhost'
+    assert requests[0].keep_alive
+
+
+@pytest.mark.parametrize('wire, status', [
+    (BAD, 400),
+    (b'GET / HTTP/2.0\r\n\r\n', 505),
+    (b'GET / HTTP/1.1\r\nNo colon here\r\n\r\n', 400),
+    (b'GET / HTTP/1.1\r\n Host: x\r\n\r\n', 400),
+    (b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n', 501),
+    (b'POST / HTTP/1.1\r\nContent-Length: -5\r\n\r\n', 400),
+    (b'POST / HTTP/1.1\r\nContent-Length: 101\r\n\r\n', 413),
+    (b'GET / HTTP/1.1\r\nX: ' + b'x' * 200, 431),
+])
+def test_parser_rejects(wire, status):
+    """Malformed or oversized requests raise ParseError with the right status"""
+    with pytest.raises(ParseError) as excinfo:
+        RequestParser(max_header_size=100, max_body_size=100).feed(wire)
+    assert excinfo.value.status == status
+
+
+def test_parser_error_keeps_earlier_requests():
+    """Requests completed before a bad one travel with the ParseError"""
+    with pytest.raises(ParseError) as excinfo:
+        RequestParser().feed(GET + POST + BAD)
+    assert [request.method for request in excinfo.value.requests] == ['GET', 'POST']
+
+
+class FakeTransport:
+    """Just enough of an asyncio transport to drive HTTPServerProtocol"""
+
+    def __init__(self):
+        self.written = bytearray()
+        self.closed = False
+
+    def set_write_buffer_limits(self, high):
+        pass
+
+    def writelines(self, data):
+        self.written += b''.join(data)
+
+    def close(self):
+        self.closed = True
+
+
+def serve_bytes(*chunks):
+    """Feed chunks to a protocol instance; return the transport it wrote to"""
+    async def run():
+        protocol = HTTPServerProtocol()
+        transport = FakeTransport()
+        protocol.connection_made(transport)
+        for chunk in chunks:
+            protocol.data_received(chunk)
+        protocol.connection_lost(None)
+        return transport
+    return asyncio.run(run())
+
+
+def statuses(written):
+    return [int(status) for status in re.findall(rb'HTTP/1\.1 (\d{3}) [A-Z]', written)]
+
+
+def test_protocol_answers_good_requests_before_error(monkeypatch):
+    """A pipelined good request still gets its response ahead of the 400"""
+    monkeypatch.setattr(HTTPServerProtocol, 'verbose', False)
+    transport = serve_bytes(GET + POST + BAD)
+    assert statuses(transport.written) == [200, 201, 400]
+    assert transport.closed
+
+
+def test_protocol_split_headers(monkeypatch):
+    """Headers arriving over several reads give one response"""
+    monkeypatch.setattr(HTTPServerProtocol, 'verbose', False)
+    transport = serve_bytes(GET[:10], GET[10:30], GET[30:])
+    assert statuses(transport.written) == [200]
+    assert not transport.closed
+
+
+# ============================================================================
+# STATIC FILES
+# ============================================================================
+
+@pytest.fixture
+def static_root(tmp_path):
+    """A static directory with a file, a subdirectory and a file outside it"""
+    root = tmp_path / 'root'
+    (root / 'docs').mkdir(parents=True)
+    (root / 'hello.txt').write_text('hello')
+    (root / 'docs' / 'index.html').write_text('<h1>docs</h1>')
+    (tmp_path / 'secret.txt').write_text('secret')
+    try:
+        os.symlink(tmp_path / 'secret.txt', root / 'escape.txt')
+        os.symlink(root / 'hello.txt', root / 'alias.txt')
+    except (OSError, NotImplementedError):
+        pass  # no symlinks here (Windows without the privilege)
+    return os.path.realpath(root)
+
+
+@pytest.mark.parametrize('url_path, expected', [
+    ('hello.txt', 'hello.txt'),
+    ('/hello.txt', 'hello.txt'),
+    ('docs/', 'docs/index.html'),
+    ('docs', 'docs/index.html'),
+    ('docs/../hello.txt', 'hello.txt'),
+    ('%68ello.txt', 'hello.txt'),
+    ('alias.txt', 'hello.txt'),
+    ('../secret.txt', None),
+    ('../../secret.txt', None),
+    ('%2e%2e/secret.txt', None),
+    ('..%2Fsecret.txt', None),
+    ('..%5Csecret.txt', None),
+    ('hello.txt%00.png', None),
+    ('escape.txt', None),
+    ('missing.txt', None),
+])
+def test_resolve_path(static_root, url_path, expected):
+    """Only files inside the root resolve; traversal and escaping symlinks don't"""
+    if 'alias' in url_path and not os.path.islink(os.path.join(static_root, 'alias.txt')):
+        pytest.skip('symlinks not supported')
+    result = resolve_path(static_root, url_path)
+    if expected is None:
+        assert result is None
+    else:
+        assert result == os.path.join(static_root, *expected.split('/'))
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('bytes=0-4', (0, 4)),
+    ('bytes=5-', (5, 9)),
+    ('bytes=-3', (7, 9)),
+    ('bytes=-30', (0, 9)),
+    ('bytes=8-100', (8, 9)),
+    ('bytes=10-', 'unsatisfiable'),
+    ('bytes=-0', 'unsatisfiable'),
+    ('bytes=5-2', None),
+    ('bytes=0-1,4-5', None),
+    ('bytes=abc', None),
+    ('items=0-4', None),
+])
+def test_parse_range(header, expected):
+    """Single byte ranges for a 10-byte file; anything else is ignored or 416"""
+    assert parse_range(header, 10) == expected
+
+
+def test_static_ranges_and_validators(server):
+    """206/416 for ranges, If-Range falls back to 200, validators give 304"""
+    (server.static / 'data.txt').write_bytes(b'0123456789')
+    conn = server()
+
+    response, body = get(conn, '/static/data.txt')
+    assert (response.status, body) == (200, b'0123456789')
+    etag = response.getheader('ETag')
+    last_modified = response.getheader('Last-Modified')
+
+    response, body = get(conn, '/static/data.txt', {'Range': 'bytes=2-4'})
+    assert (response.status, body) == (206, b'234')
+    assert response.getheader('Content-Range') == 'bytes 2-4/10'
+    response, body = get(conn, '/static/data.txt', {'Range': 'bytes=20-'})
+    assert response.status == 416
+
+    response, body = get(conn, '/static/data.txt', {'Range': 'bytes=2-4', 'If-Range': etag})
+    assert response.status == 206
+    response, body = get(conn, '/static/data.txt',
+                         {'Range': 'bytes=2-4', 'If-Range': '"stale"'})
+    assert (response.status, body) == (200, b'0123456789')
+
+    for headers in ({'If-None-Match': etag}, {'If-None-Match': f'"x", W/{etag}'},
+                    {'If-Modified-Since': last_modified}):
+        response, body = get(conn, '/static/data.txt', headers)
+        assert (response.status, body) == (304, b'')
+    response, _ = get(conn, '/static/data.txt',
+                      {'If-None-Match': '"x"', 'If-Modified-Since': last_modified})
+    assert response.status == 200  # If-None-Match wins
+
+    response, _ = get(conn, '/static/../test_http_examples.py')
+    assert response.status == 404
+    conn.close()
+
+
+# ============================================================================
+# PRECOMPUTED RESPONSES
+# ============================================================================
+
+@pytest.mark.parametrize('if_none_match, matches', [
+    (None, False),
+    ('', False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('*', True),
+    ('"x", "abc"', True),
+    ('"x","abc"', True),
+    ('"x" , W/"abc"', True),
+    ('"abcd"', False),
+    ('"x", "y"', False),
+    ('abc', False),
+])
+def test_etag_matches(if_none_match, matches):
+    """Lists with or without spaces, weak tags and * all compare weakly"""
+    assert simple_http_server.etag_matches(if_none_match, '"abc"') is matches
+
+
+def test_precomputed_variants():
+    """gzip has its own ETag, and a 304 carries the ETag of the variant chosen"""
+    response = simple_http_server.PrecomputedResponse(
+        200, 'text/plain', b'hello ' * 100, {'X-Extra': 'yes'})
+    assert response.gzip_etag == response.etag[:-1] + '-gzip"'
+
+    status, head, body = response.variant(None, '')
+    assert (status, body) == (200, response.body)
+    assert f'ETag: {response.etag}\r\n'.encode() in head
+    assert b'X-Extra: yes\r\n' in head and b'Content-Encoding' not in head
+
+    status, head, body = response.variant(None, 'br, gzip;q=0.5')
+    assert (status, gzip.decompress(body)) == (200, response.body)
+    assert f'ETag: {response.gzip_etag}\r\n'.encode() in head
+    assert b'Content-Encoding: gzip\r\n' in head and b'Vary: Accept-Encoding\r\n' in head
+    assert response.variant(None, 'gzip;q=0')[2] == response.body
+
+    # Each ETag only validates its own variant
+    assert response.variant(response.etag, '')[0] == 304
+    assert response.variant(response.etag, 'gzip')[0] == 200
+    status, head, body = response.variant(f'W/{response.gzip_etag}', 'gzip')
+    assert (status, body) == (304, b'')
+    assert head == (f'ETag: {response.gzip_etag}\r\nVary: Accept-Encoding\r\n').encode()
+    assert response.variant(response.gzip_etag, '')[0] == 200
+
+
+def test_precomputed_small_body_not_compressed():
+    """A body gzip can't shrink is only ever sent as is"""
+    response = simple_http_server.PrecomputedResponse(200, 'text/plain', b'hi')
+    assert response.gzip_body is None
+    status, head, body = response.variant(None, 'gzip')
+    assert (status, body) == (200, b'hi')
+    assert b'Vary' not in head
+    assert response.variant('*', 'gzip')[0] == 304
+
+
+def test_precomputed_routes_served(server):
+    """The fixed routes come from the table, with working conditional requests"""
+    conn = server()
+    home = simple_http_server.HOME_PAGE.encode()
+    response, body = get(conn, '/', {'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert gzip.decompress(body) == home
+    etag = response.getheader('ETag')
+    assert etag.endswith('-gzip"')
+
+    response, body = get(conn, '/', {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert (response.status, body) == (304, b'')
+    response, body = get(conn, '/', {'If-None-Match': etag})
+    assert (response.status, body) == (200, home)
+    conn.close()
+
+
+# ============================================================================
+# KEEP-ALIVE
+# ============================================================================
+
+@pytest.mark.parametrize('path', ['/', '/api/user?name=Ada', '/missing'])
+def test_keep_alive_reuses_connection(server, path):
+    """Several responses, each with a Content-Length, over one connection"""
+    conn = server()
+    get(conn, path)
+    sock = conn.sock
+    for _ in range(3):
+        response, body = get(conn, path)
+        assert int(response.getheader('Content-Length')) == len(body)
+        assert response.getheader('Keep-Alive')
+        assert not response.will_close
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_keep_alive_limits(server, monkeypatch):
+    """The server closes after MAX_REQUESTS_PER_CONNECTION or when asked to"""
+    monkeypatch.setattr(simple_http_server, 'MAX_REQUESTS_PER_CONNECTION', 2)
+    for path in ('/', '/api/user'):  # precomputed and rebuilt responses
+        conn = server()
+        response, _ = get(conn, path)
+        assert not response.will_close
+        response, _ = get(conn, path)
+        assert response.getheader('Connection') == 'close'
+        assert response.will_close
+        conn.close()
+
+    conn = server()
+    response, _ = get(conn, '/api/user', {'Connection': 'close'})
+    assert response.will_close
+    conn.close()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Async TCP Client: Connection Pool and Pipelining
+
+tcp_socket_client.py sends a message, then waits for the answer before
+sending the next one, over a single connection. Most of its time goes
+into waiting for round trips. This client, for the framed echo server
+(tcp_socket_server.py --framed):
+
+- keeps a pool of connections open and spreads requests over them
+- pipelines: sends many requests on a connection without waiting for
+  the answers. Each request starts with an 8-byte correlation ID; the
+  server echoes binary frames unchanged, so the ID in an answer says
+  which request it belongs to.
+- gives every request a timeout
+- reconnects a dropped connection in the background, waiting longer
+  after each failed attempt (exponential backoff, with jitter so many
+  clients don't all retry at the same moment)
+
+    async with PipelinedClient('localhost', 9000, connections=4) as client:
+        reply = await client.request(b'hello')
+
+Usage (a benchmark against the threaded server, which it starts):
+    python async_tcp_client.py
+    python async_tcp_client.py --connections 8 --concurrency 1000 --size 256
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+from framing import BINARY, FrameDecoder, FrameError, frame_header, receive_frame, send_frames
+
+REQUEST_TIMEOUT = 5.0  # seconds for an answer
+CONNECT_TIMEOUT = 5.0  # seconds for a connection attempt
+MAX_IN_FLIGHT = 1024  # requests waiting for an answer, per connection
+RECONNECT_DELAY = 0.1  # seconds before the first reconnect attempt
+MAX_RECONNECT_DELAY = 10.0  # backoff stops growing here
+
+REQUEST_ID = struct.Struct('>Q')  # the correlation ID in front of every payload
+
+
+class ClientProtocol(asyncio.BufferedProtocol):
+    """
+    Receives frames for one PooledConnection.
+
+    As a BufferedProtocol, the event loop reads straight into the
+    FrameDecoder's buffer, so answers aren't copied on the way in.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.decoder = FrameDecoder()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        return self.decoder.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        self.decoder.buffer_updated(nbytes)
+        try:
+            for msg_type, payload in self.decoder.frames():
+                # Skips the server's welcome message (a text frame)
+                if msg_type == BINARY and len(payload) >= REQUEST_ID.size:
+                    self.connection.answer(payload)
+        except FrameError:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.connection.lost()
+
+    # Flow control: the transport's write buffer is full / has drained
+    def pause_writing(self):
+        self.connection.writable.clear()
+
+    def resume_writing(self):
+        self.connection.writable.set()
+
+
+class PooledConnection:
+    """One connection of the pool; reconnects whenever it drops"""
+
+    def __init__(self, client):
+        self.client = client
+        self.transport = None
+        self.pending = {}  # request ID -> future for the answer
+        self.connected = asyncio.Event()
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.slots = asyncio.Semaphore(client.max_in_flight)
+        self._lost = None
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        """Connect, wait until the connection drops, repeat"""
+        loop = asyncio.get_running_loop()
+        failures = 0
+        while True:
+            try:
+                transport, _ = await asyncio.wait_for(
+                    loop.create_connection(lambda: ClientProtocol(self),
+                                           self.client.host, self.client.port),
+                    self.client.connect_timeout)
+            except (OSError, asyncio.TimeoutError):
+                # Back off: 0.1s, 0.2s, 0.4s, ... up to the maximum, each
+                # scaled by a random factor
+                delay = min(self.client.max_reconnect_delay,
+                            self.client.reconnect_delay * 2 ** failures)
+                failures += 1
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+
+            failures = 0
+            self.transport = transport
+            transport.get_extra_info('socket').setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._lost = loop.create_future()
+            self.connected.set()
+            await self._lost
+
+            # Dropped: the requests on this connection won't be answered
+            self.connected.clear()
+            self.transport = None
+            self.writable.set()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Connection lost'))
+            self.pending.clear()
+            self.client.reconnects += 1
+            await asyncio.sleep(self.client.reconnect_delay * random.uniform(0.5, 1.0))
+
+    def send(self, request_id, payload):
+        """Write one request frame: header, ID and payload, without joining them"""
+        self.transport.writelines([
+            frame_header(REQUEST_ID.size + len(payload), BINARY),
+            REQUEST_ID.pack(request_id),
+            payload
+        ])
+
+    def answer(self, payload):
+        request_id, = REQUEST_ID.unpack_from(payload)
+        future = self.pending.pop(request_id, None)
+        if future is not None and not future.done():  # else it timed out
+            future.set_result(bytes(payload[REQUEST_ID.size:]))
+
+    def lost(self):
+        if self._lost is not None and not self._lost.done():
+            self._lost.set_result(None)
+
+    async def close(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        if self.transport is not None:
+            self.transport.close()
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError('Client closed'))
+
+
+class PipelinedClient:
+    """
+    A pool of pipelined connections to the framed echo server.
+
+    request() sends on the connected connection with the fewest requests
+    in flight and waits for the matching answer.
+    """
+
+    def __init__(self, host='localhost', port=9000, connections=4,
+                 timeout=REQUEST_TIMEOUT, max_in_flight=MAX_IN_FLIGHT,
+                 connect_timeout=CONNECT_TIMEOUT, reconnect_delay=RECONNECT_DELAY,
+                 max_reconnect_delay=MAX_RECONNECT_DELAY):
+        self.host = host
+        self.port = port
+        self.pool_size = connections
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.connect_timeout = connect_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.pool = []
+        self.ids = itertools.count()
+        self.reconnects = 0
+
+    async def start(self):
+        """Open the pool and wait until at least one connection is up"""
+        self.pool = [PooledConnection(self) for _ in range(self.pool_size)]
+        try:
+            await asyncio.wait_for(self._wait_connected(), self.connect_timeout)
+        except BaseException:
+            await self.close()  # stop the reconnect loops
+            raise
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self.pool))
+        self.pool = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def request(self, payload, timeout=None):
+        """
+        Send `payload` and return the server's answer.
+
+        Raises asyncio.TimeoutError if there is no answer in time, and
+        ConnectionError if the connection drops first.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = loop.time() + timeout
+
+        # The common case (a connection is up and has room) doesn't wait
+        # at all; wait_for() costs a task, so it is only used otherwise
+        connection = self._pick()
+        if connection is None:
+            connection = await asyncio.wait_for(self._wait_connected(), timeout)
+        if connection.slots.locked() or not connection.writable.is_set():
+            await asyncio.wait_for(self._wait_ready(connection), deadline - loop.time())
+        else:
+            await connection.slots.acquire()
+
+        try:
+            if connection.transport is None:
+                raise ConnectionError('Connection lost')
+            request_id = next(self.ids)
+            future = loop.create_future()
+            # A timer, rather than wait_for(), for the answer's timeout
+            timer = loop.call_at(deadline, self._expire, future)
+            connection.pending[request_id] = future
+            try:
+                connection.send(request_id, payload)
+                return await future
+            finally:
+                timer.cancel()
+                connection.pending.pop(request_id, None)
+        finally:
+            connection.slots.release()
+
+    @staticmethod
+    def _expire(future):
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+
+    def _pick(self):
+        """The connected connection with the fewest requests in flight, or None"""
+        best = None
+        for connection in self.pool:
+            if connection.connected.is_set() and (
+                    best is None or len(connection.pending) < len(best.pending)):
+                best = connection
+        return best
+
+    async def _wait_connected(self):
+        while True:
+            connection = self._pick()
+            if connection is not None:
+                return connection
+            waiters = [asyncio.create_task(connection.connected.wait())
+                       for connection in self.pool]
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    @staticmethod
+    async def _wait_ready(connection):
+        """Take one of the connection's slots, then wait until it can be written to"""
+        await connection.slots.acquire()
+        try:
+            await connection.writable.wait()
+        except BaseException:
+            connection.slots.release()
+            raise
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tcp_socket_server.py')
+
+
+def start_server(port):
+    """tcp_socket_server.py --framed (threads) in a subprocess"""
+    command = [sys.executable, SERVER_SCRIPT, '--framed', '--quiet', '--mode', 'threads',
+               '--host', '127.0.0.1', '--port', str(port)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def percentile(latencies, fraction):
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+
+
+def run_blocking(host, port, size, duration):
+    """The tcp_socket_client.py way: one socket, send, wait for the answer, repeat"""
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    decoder = FrameDecoder()
+    receive_frame(sock, decoder)  # welcome
+    payload = os.urandom(size)
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        sent = time.perf_counter()
+        send_frames(sock, [(BINARY, payload)])
+        receive_frame(sock, decoder)
+        latencies.append(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - start
+    sock.close()
+    return latencies, elapsed, 0
+
+
+async def run_pipelined(host, port, connections, concurrency, size, duration):
+    """`concurrency` requests kept in flight over `connections` connections"""
+    payload = os.urandom(size)
+    latencies = []
+    errors = 0
+
+    async with PipelinedClient(host, port, connections=connections) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    reply = await client.request(payload)
+                except (ConnectionError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                if reply != payload:
+                    raise RuntimeError('answer does not match the request')
+                latencies.append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed, errors
+
+
+def print_result(label, latencies, elapsed, errors):
+    latencies.sort()
+    print(f"{label:<32} {len(latencies) / elapsed:>9.0f} {percentile(latencies, 0.5):>8.2f} "
+          f"{percentile(latencies, 0.99):>8.2f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipelined, pooled TCP client benchmark')
+    parser.add_argument('--connections', type=int, default=4, help='Connections in the pool')
+    parser.add_argument('--concurrency', type=int, default=256,
+                        help='Requests in flight across the pool')
+    parser.add_argument('--size', type=int, default=64, help='Payload size in bytes')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+    parser.add_argument('--port', type=int, default=9300, help='Port for the server')
+    args = parser.parse_args()
+
+    host = '127.0.0.1'
+    server = start_server(args.port)
+    try:
+        print(f"\n{args.size}-byte messages to tcp_socket_server.py --framed (threads), "
+              f"{args.duration}s per run\n")
+        print(f"{'':<32} {'msg/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        print_result('blocking, 1 at a time', *run_blocking(host, args.port, args.size,
+                                                            args.duration))
+        runs = [(1, 1), (1, args.concurrency // args.connections),
+                (args.connections, args.concurrency)]
+        for connections, concurrency in runs:
+            label = f'{connections} conn, {concurrency} in flight'
+            print_result(label, *asyncio.run(run_pipelined(
+                host, args.port, connections, concurrency, args.size, args.duration)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Message Framing over TCP
+
+TCP delivers a stream of bytes, not messages. Two send() calls may arrive
+in one recv() (coalescing), and one send() may take several recv() calls
+(fragmentation). Treating each recv() as one message only works for
+small messages on a quiet network.
+
+A framing protocol marks where each message ends. This one puts a length
+prefix in front of every message:
+
+    +----------------+-------------+------------------+
+    | varint header  | type (opt.) | payload          |
+    +----------------+-------------+------------------+
+
+The header is (payload length << 1) | has_type, encoded as a varint: 7
+bits per byte, with the top bit meaning "more bytes follow". Messages
+under 64 bytes cost one byte of header, under 8 KiB two bytes. If the
+lowest bit is set, one message-type byte follows.
+
+Receiving: FrameDecoder reads straight into one reusable buffer
+(recv_into) and hands out payloads as memoryviews of that buffer, so no
+message is copied on the way in.
+
+Sending: send_frames() passes each header and payload to the kernel as
+separate buffers in one sendmsg() call (scatter-gather), so many
+messages go out in one system call without being joined first.
+
+Used by tcp_socket_server.py and tcp_socket_client.py with --framed.
+"""
+
+# Message types
+TEXT = 1  # UTF-8 text, answered like the unframed protocol
+BINARY = 2  # any bytes, echoed back unchanged
+
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # larger frames are refused
+MAX_BUFFERS_PER_SEND = 512  # sendmsg() accepts at most IOV_MAX (1024 on Linux)
+MIN_RECV_SIZE = 4096  # make at least this much room before each recv_into()
+KEEP_BUFFER_SIZE = 4 * 1024 * 1024  # a receive buffer grown past this is given back once empty
+
+
+class FrameError(Exception):
+    """The peer sent something that is not a valid frame"""
+
+
+def encode_varint(value):
+    """Unsigned LEB128: 7 bits per byte, least significant first"""
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(buffer, pos, end):
+    """
+    Decode a varint from buffer[pos:end].
+
+    Returns (value, position after it), or None if the varint isn't
+    complete yet.
+    """
+    value = shift = 0
+    while pos < end:
+        byte = buffer[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            raise FrameError('Frame header is too long')
+    return None
+
+
+def frame_header(length, msg_type=None):
+    """The bytes that go in front of a payload of `length` bytes"""
+    if msg_type is None:
+        return encode_varint(length << 1)
+    return encode_varint(length << 1 | 1) + bytes((msg_type,))
+
+
+def encode_frame(payload, msg_type=None):
+    """A whole frame as one bytes object (send_frames() avoids this copy)"""
+    return frame_header(len(payload), msg_type) + bytes(payload)
+
+
+class FrameDecoder:
+    """
+    Turns received bytes back into frames.
+
+        decoder = FrameDecoder()
+        while decoder.recv_into(sock):
+            for msg_type, payload in decoder.frames():
+                ...
+
+    Payloads are memoryviews into the decoder's buffer. They stay valid
+    until the next recv_into() or feed(); use bytes(payload) to keep one
+    for longer.
+    """
+
+    def __init__(self, size=64 * 1024, max_frame_size=MAX_FRAME_SIZE):
+        self.initial_size = size
+        self.max_frame_size = max_frame_size
+        self._set_buffer(bytearray(size))
+        self.start = 0  # first byte not yet decoded
+        self.end = 0  # end of the received bytes
+        self.needed = 0  # size of the incomplete frame at start, once known
+
+    def _set_buffer(self, buffer):
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+    def recv_into(self, sock):
+        """Receive straight into the buffer. Returns the byte count (0: closed)."""
+        received = sock.recv_into(self.get_buffer())
+        self.buffer_updated(received)
+        return received
+
+    # The same two steps under asyncio.BufferedProtocol's names, so a
+    # protocol can hand them straight to the event loop
+    def get_buffer(self, sizehint=-1):
+        """The free space at the end of the buffer, to receive into"""
+        self._make_room()
+        return self.view[self.end:]
+
+    def buffer_updated(self, nbytes):
+        """`nbytes` were written into the space get_buffer() returned"""
+        self.end += nbytes
+
+    def feed(self, data):
+        """Add bytes that were received some other way"""
+        data = memoryview(data).cast('B')
+        while data:
+            self._make_room()
+            count = min(len(data), len(self.buffer) - self.end)
+            self.view[self.end:self.end + count] = data[:count]
+            self.end += count
+            data = data[count:]
+
+    def frames(self):
+        """Yield (msg_type, payload) for every complete frame received so far"""
+        while True:
+            header = decode_varint(self.buffer, self.start, self.end)
+            if header is None:
+                return
+            value, pos = header
+            length = value >> 1
+            if length > self.max_frame_size:
+                raise FrameError(f'Frame of {length} bytes is over the limit')
+            msg_type = None
+            if value & 1:
+                if pos == self.end:
+                    return
+                msg_type = self.buffer[pos]
+                pos += 1
+            if self.end - pos < length:
+                self.needed = pos + length - self.start
+                return
+            self.start = pos + length
+            self.needed = 0
+            yield msg_type, self.view[pos:pos + length]
+
+    def _make_room(self):
+        """Make sure there is free space after `end` for the next recv"""
+        pending = self.end - self.start
+        if pending == 0:
+            self.start = self.end = 0  # nothing to keep: start over, no copy
+            if len(self.buffer) > KEEP_BUFFER_SIZE:
+                self._set_buffer(bytearray(self.initial_size))
+            return
+
+        room = max(self.needed - pending, MIN_RECV_SIZE)
+        if len(self.buffer) - self.end >= room:
+            return
+        size = len(self.buffer)
+        while size < pending + room:
+            size *= 2
+        if size > len(self.buffer):
+            # A frame bigger than the buffer: move to a bigger one. The old
+            # buffer lives on as long as someone holds a payload from it.
+            buffer = bytearray(size)
+            buffer[:pending] = self.view[self.start:self.end]
+            self._set_buffer(buffer)
+        else:
+            # Move the start of the incomplete frame to the front (the
+            # only copy the decoder makes, and only of a partial frame)
+            self.view[:pending] = self.view[self.start:self.end]
+        self.start, self.end = 0, pending
+
+
+def send_frames(sock, frames):
+    """
+    Send (msg_type, payload) pairs on a blocking socket and return the
+    number of bytes sent.
+
+    Headers and payloads are handed to sendmsg() as a list of buffers, so
+    a batch of frames is one system call and the payloads are never
+    joined into one big bytes object.
+    """
+    buffers = []
+    for msg_type, payload in frames:
+        payload = memoryview(payload).cast('B')
+        buffers.append(memoryview(frame_header(len(payload), msg_type)))
+        if payload:
+            buffers.append(payload)
+    total = sum(len(buffer) for buffer in buffers)
+
+    if not hasattr(sock, 'sendmsg'):  # Windows
+        sock.sendall(b''.join(buffers))
+        return total
+
+    first = 0
+    while first < len(buffers):
+        sent = sock.sendmsg(buffers[first:first + MAX_BUFFERS_PER_SEND])
+        # sendmsg() may send only part of the batch: skip what went out
+        while sent:
+            size = len(buffers[first])
+            if sent >= size:
+                sent -= size
+                first += 1
+            else:
+                buffers[first] = buffers[first][sent:]
+                sent = 0
+    return total
+
+
+def receive_frame(sock, decoder):
+    """
+    Block until one whole frame has arrived and return (msg_type, payload).
+
+    Returns None if the connection closes first.
+    """
+    while True:
+        for frame in decoder.frames():
+            return frame
+        if not decoder.recv_into(sock):
+            return None
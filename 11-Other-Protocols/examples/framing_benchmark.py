@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Framing Throughput Benchmark
+
+Starts tcp_socket_server.py --framed and streams binary frames through
+its echo over one connection: a sender thread keeps up to a window of
+frames in flight while the main thread decodes the echoes.
+
+Each message size runs twice: sending every frame with its own
+sendmsg() call, and sending batches of frames with one sendmsg() call
+each. Small messages are dominated by per-call overhead, so batching
+matters there; for large ones the time goes into moving the bytes.
+
+Usage:
+    python framing_benchmark.py
+    python framing_benchmark.py --sizes 64,4096,1048576 --duration 5
+    python framing_benchmark.py --mode selector
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from framing import BINARY, FrameDecoder, send_frames
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tcp_socket_server.py')
+
+WINDOW_BYTES = 8 * 1024 * 1024  # payload bytes in flight at most
+MAX_WINDOW = 4096  # frames in flight at most
+
+
+def start_server(mode, port):
+    command = [sys.executable, SERVER_SCRIPT, '--framed', '--quiet', '--mode', mode,
+               '--host', '127.0.0.1', '--port', str(port), '--workers', '1']
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def run(port, size, batch, duration):
+    """Echo `size`-byte frames for `duration` seconds; returns frames per second"""
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    decoder = FrameDecoder()
+
+    # The welcome message
+    while not list(decoder.frames()):
+        decoder.recv_into(sock)
+
+    window = max(batch, min(MAX_WINDOW, WINDOW_BYTES // size))
+    in_flight = threading.Semaphore(window)
+    payload = os.urandom(size)
+    frames = [(BINARY, payload)] * batch  # the same payload object, never copied
+    stop = threading.Event()
+
+    def sender():
+        try:
+            while not stop.is_set():
+                for _ in range(batch):
+                    in_flight.acquire()
+                send_frames(sock, frames)
+        except OSError:
+            pass  # the socket was shut down at the end of the run
+
+    thread = threading.Thread(target=sender, daemon=True)
+    received = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    thread.start()
+    while time.perf_counter() < deadline:
+        decoder.recv_into(sock)
+        for msg_type, echoed in decoder.frames():
+            if len(echoed) != size:
+                raise RuntimeError(f'echo of {len(echoed)} bytes, expected {size}')
+            received += 1
+            in_flight.release()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    sock.shutdown(socket.SHUT_RDWR)  # wakes the sender if it is blocked
+    sock.close()
+    thread.join(1)
+    return received / elapsed
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f'{size // (1024 * 1024)} MiB'
+    if size >= 1024:
+        return f'{size // 1024} KiB'
+    return f'{size} B'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Framed echo throughput benchmark')
+    parser.add_argument('--sizes', default='64,4096,1048576', help='Message sizes in bytes')
+    parser.add_argument('--batch', type=int, default=64, help='Frames per sendmsg() call')
+    parser.add_argument('--duration', type=float, default=3, help='Seconds per run')
+    parser.add_argument('--mode', choices=('threads', 'selector', 'multi'), default='threads',
+                        help='Server mode')
+    parser.add_argument('--port', type=int, default=9200, help='Port for the server')
+    args = parser.parse_args()
+
+    server = start_server(args.mode, args.port)
+    try:
+        print(f"\nEcho through tcp_socket_server.py --framed --mode {args.mode}, "
+              f"{args.duration}s per run\n")
+        print(f"{'size':>8} {'frames/send':>12} {'msg/s':>10} {'MB/s':>8}")
+        for size in [int(size) for size in args.sizes.split(',')]:
+            for batch in sorted({1, args.batch}):
+                rate = run(args.port, size, batch, args.duration)
+                print(f"{format_size(size):>8} {batch:>12} {rate:>10.0f} "
+                      f"{rate * size / 1e6:>8.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("\nMB/s counts each payload once; every byte also travels back.")
+
+
+if __name__ == '__main__':
+    main()
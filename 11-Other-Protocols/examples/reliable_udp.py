@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Reliable Delivery over UDP
+
+UDP hands each datagram to the network and forgets about it. It may be
+lost, arrive twice, or arrive out of order, and nobody finds out. This
+module adds the pieces TCP uses to make delivery reliable, on top of UDP:
+
+- Sequence numbers: every datagram carries its position in the stream,
+  so the receiver can put them back in order and drop duplicates.
+- Selective ACKs: the receiver answers every datagram with the next
+  sequence number it needs (a cumulative ACK), plus up to four ranges it
+  already has beyond that (SACK blocks). The sender resends only what
+  is actually missing.
+- A sliding window: up to `window` datagrams are in flight before the
+  oldest one is acknowledged. Waiting for each ACK allows one datagram
+  per round trip; a window of 64 allows 64.
+- Retransmission: a datagram is resent when one sent after it has been
+  acknowledged and a round trip (plus a margin for reordering) has
+  passed, since it was most likely lost; or else when its retransmission
+  timeout (RTO) runs out. The RTO follows the measured round-trip time
+  (Jacobson/Karels, RFC 6298) and doubles after every timeout. Every
+  datagram carries the time it was sent and every ACK echoes it back,
+  so each ACK is a round-trip sample, resent datagrams included.
+
+The stream goes one way: ReliableSender sends messages, ReliableReceiver
+delivers them in order and sends the ACKs.
+
+    sender = ReliableSender(sock, ('localhost', 9001), window=64)
+    for message in messages:
+        sender.send(message)  # waits while the window is full
+    sender.close()  # waits until everything is acknowledged
+
+    receiver = ReliableReceiver(sock)
+    address, message = receiver.receive()  # None: that sender has finished
+
+The window size is fixed. There is no congestion control (TCP slows
+down when the network is overloaded), so this is for a LAN or a demo,
+not for sharing the Internet.
+
+LossyLink is a UDP relay that loses, delays, reorders and duplicates
+datagrams, to try all of this on one machine.
+
+Used by udp_example.py with --reliable.
+"""
+
+import collections
+import heapq
+import itertools
+import random
+import selectors
+import socket
+import struct
+import threading
+import time
+
+# Datagram types
+DATA = 0
+FIN = 1  # end of the stream (sequenced and acknowledged like data)
+ACK = 2
+
+# DATA / FIN: [type][stream ID][sequence number][timestamp][payload]
+HEADER = struct.Struct('>BIII')
+# ACK: [type][stream ID][next sequence number expected][timestamp of the
+# datagram that triggered it], then up to MAX_SACK_BLOCKS [start][end) ranges
+ACK_HEADER = struct.Struct('>BIII')
+SACK_BLOCK = struct.Struct('>II')
+
+MAX_PAYLOAD = 1200  # keeps datagrams under a typical 1500-byte MTU
+MAX_DATAGRAM = 65535
+MAX_WINDOW = 1024  # receivers buffer at most this many datagrams ahead
+MAX_SACK_BLOCKS = 4
+# Earlier stream IDs remembered per sender address, so that a late
+# datagram from a finished stream can't restart it
+MAX_RETIRED_STREAMS = 64
+# A datagram sent before one that arrived counts as lost after a round
+# trip plus this fraction of one (less could just be reordering)
+REORDER_WINDOW = 0.25
+
+# Retransmission timeout, in seconds (RFC 6298; MIN_RTO as on Linux)
+INITIAL_RTO = 1.0
+MIN_RTO = 0.2
+MAX_RTO = 60.0
+# Give up after this many timeouts in a row without any ACK
+MAX_RETRIES = 5
+
+
+def timestamp():
+    """Microseconds, as 32 bits (they wrap around every 71 minutes)"""
+    return int(time.monotonic() * 1_000_000) & 0xFFFFFFFF
+
+
+class RttEstimator:
+    """Smoothed round-trip time and the timeout derived from it (RFC 6298)"""
+
+    def __init__(self):
+        self.srtt = None  # smoothed round-trip time
+        self.rttvar = None  # how much samples stray from it
+        self.rto = INITIAL_RTO
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        # Wait for the average plus four deviations: a slow answer is
+        # rarely mistaken for a lost one
+        self.rto = min(MAX_RTO, max(MIN_RTO, self.srtt + 4 * self.rttvar))
+
+    def backoff(self):
+        """After a timeout: the network may be congested, wait longer"""
+        self.rto = min(MAX_RTO, self.rto * 2)
+
+
+class _Packet:
+    """A datagram waiting for its ACK"""
+
+    __slots__ = ('seq', 'kind', 'payload', 'sent_at', 'deadline', 'tx')
+
+    def __init__(self, seq, kind, payload):
+        self.seq = seq
+        self.kind = kind
+        self.payload = payload
+        self.sent_at = self.deadline = 0.0
+        self.tx = 0  # when it was last sent, counted in transmissions
+
+
+class ReliableSender:
+    """
+    Sends a stream of messages (up to MAX_PAYLOAD bytes each) to one
+    ReliableReceiver.
+
+    Single-threaded: ACKs are handled and lost datagrams resent inside
+    send() and close().
+    """
+
+    def __init__(self, sock, address, window=64):
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f'window must be between 1 and {MAX_WINDOW}')
+        self.sock = sock
+        self.sock.connect(address)  # from now on only the receiver's ACKs arrive
+        self.peer = address
+        self.window = window
+        self.stream_id = random.getrandbits(32)
+        self.next_seq = 0
+        self.base = 0  # every sequence number below this is acknowledged
+        self.unacked = collections.OrderedDict()  # seq -> _Packet, in the order last sent
+        self.tx = 0  # transmissions so far
+        self.delivered_tx = 0  # the latest transmission known to have arrived
+        self.backoffs = 0  # timeouts since the last ACK
+        self.rtt = RttEstimator()
+        # Statistics
+        self.sent = 0
+        self.fast_retransmits = 0
+        self.timeout_retransmits = 0
+
+    def send(self, payload):
+        """Send one message; waits while the window is full"""
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError(f'Message of {len(payload)} bytes is over {MAX_PAYLOAD}')
+        self._queue(DATA, payload)
+
+    def close(self):
+        """
+        End the stream and wait until the receiver has everything.
+
+        Raises ConnectionError if the receiver stops answering.
+        """
+        self._queue(FIN, b'')
+        while self.unacked:
+            self._pump(wait=True)
+
+    def _queue(self, kind, payload):
+        while self.next_seq - self.base >= self.window:
+            self._pump(wait=True)
+        seq = self.next_seq
+        self.next_seq += 1
+        packet = _Packet(seq, kind, payload)
+        self.unacked[seq] = packet
+        self._transmit(packet)
+        self._pump(wait=False)  # ACKs that arrived meanwhile, expired timers
+
+    def _transmit(self, packet):
+        self.tx += 1
+        packet.tx = self.tx
+        packet.sent_at = time.monotonic()
+        packet.deadline = packet.sent_at + self.rtt.rto
+        self.unacked.move_to_end(packet.seq)
+        self.sent += 1
+        header = HEADER.pack(packet.kind, self.stream_id, packet.seq, timestamp())
+        try:
+            self.sock.send(header + packet.payload)
+        except BlockingIOError:
+            pass  # the send buffer is full: same as a loss
+
+    def _pump(self, wait):
+        """
+        Handle the ACKs that have arrived and resend what was lost. With
+        `wait`, first wait for an ACK or for the next timer to run out.
+        """
+        timeout = 0
+        if wait and self.unacked:
+            first = next(iter(self.unacked.values()))
+            due = first.deadline
+            if first.tx < self.delivered_tx:
+                due = min(due, first.sent_at + self._loss_delay())
+            timeout = max(0, due - time.monotonic())
+        self.sock.settimeout(timeout)
+        while True:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, socket.timeout):
+                break
+            except ConnectionRefusedError:
+                # An ICMP "port unreachable" came back
+                raise ConnectionRefusedError(f'Nobody is listening on {self.peer}') from None
+            self._on_ack(data)
+            self.sock.settimeout(0)  # take the rest without waiting
+        self._check_timers()
+
+    def _on_ack(self, data):
+        if len(data) < ACK_HEADER.size or (len(data) - ACK_HEADER.size) % SACK_BLOCK.size:
+            return
+        kind, stream_id, cumulative, echoed = ACK_HEADER.unpack_from(data)
+        if kind != ACK or stream_id != self.stream_id:
+            return
+
+        # The round trip of the datagram that triggered this ACK. Without
+        # the echoed timestamp, an ACK for a resent datagram couldn't be
+        # used: it might be for the first copy (Karn's algorithm).
+        self.rtt.sample(((timestamp() - echoed) & 0xFFFFFFFF) / 1_000_000)
+
+        acked = []
+        cumulative = min(cumulative, self.next_seq)
+        if cumulative > self.base:
+            acked.append((self.base, cumulative))
+            self.base = cumulative
+        for start, end in SACK_BLOCK.iter_unpack(data[ACK_HEADER.size:]):
+            acked.append((max(start, self.base), min(end, self.next_seq)))
+        for start, end in acked:
+            for seq in range(start, end):
+                packet = self.unacked.pop(seq, None)
+                if packet is not None:
+                    self.backoffs = 0
+                    if packet.tx > self.delivered_tx:
+                        self.delivered_tx = packet.tx
+        if not self.unacked:
+            self.base = self.next_seq
+
+    def _loss_delay(self):
+        """How long after being sent an overtaken datagram counts as lost"""
+        srtt = self.rtt.srtt or INITIAL_RTO
+        return srtt * (1 + REORDER_WINDOW)
+
+    def _check_timers(self):
+        now = time.monotonic()
+
+        # Datagrams sent before one that arrived, and a round trip ago,
+        # were lost: resend them now rather than waiting for their RTO
+        sent_before = now - self._loss_delay()
+        while self.unacked:
+            packet = next(iter(self.unacked.values()))  # oldest first
+            if packet.tx >= self.delivered_tx or packet.sent_at > sent_before:
+                break
+            self.fast_retransmits += 1
+            self._transmit(packet)
+
+        if not self.unacked or next(iter(self.unacked.values())).deadline > now:
+            return
+        # The oldest datagram timed out: as TCP does, take everything not
+        # yet acknowledged as lost, and back off once for all of them
+        self.backoffs += 1
+        if self.backoffs > MAX_RETRIES:
+            raise ConnectionError(f'No answer from {self.peer} after {MAX_RETRIES} retries')
+        self.rtt.backoff()
+        for packet in list(self.unacked.values()):
+            self.timeout_retransmits += 1
+            self._transmit(packet)
+
+
+class _Stream:
+    """What a receiver knows about one sender's stream"""
+
+    __slots__ = ('stream_id', 'expected', 'buffer', 'messages', 'duplicates', 'finished')
+
+    def __init__(self, stream_id):
+        self.stream_id = stream_id
+        self.expected = 0  # next sequence number to deliver
+        self.buffer = {}  # seq -> (type, payload) that arrived early
+        self.messages = 0
+        self.duplicates = 0
+        self.finished = False
+
+
+class ReliableReceiver:
+    """
+    Receives streams from any number of ReliableSenders on one socket,
+    and delivers each stream's messages in order, exactly once.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.streams = {}  # sender address -> _Stream
+        self.retired = {}  # sender address -> IDs of its earlier streams
+        self.ready = collections.deque()  # (address, message) in order, not yet returned
+
+    def receive(self):
+        """
+        Wait for the next message: (address, message).
+
+        message is None when the sender at `address` has closed its stream.
+        """
+        while not self.ready:
+            data, address = self.sock.recvfrom(MAX_DATAGRAM)
+            self._on_datagram(data, address)
+        return self.ready.popleft()
+
+    def _on_datagram(self, data, address):
+        if len(data) < HEADER.size:
+            return
+        kind, stream_id, seq, sent = HEADER.unpack_from(data)
+        if kind not in (DATA, FIN):
+            return
+        stream = self.streams.get(address)
+        if stream is None or stream.stream_id != stream_id:
+            retired = self.retired.setdefault(
+                address, collections.deque(maxlen=MAX_RETIRED_STREAMS))
+            if stream_id in retired:
+                # A late copy from a stream this address has since replaced:
+                # its sender is gone, and delivering it again would break
+                # "exactly once"
+                return
+            # A new sender, or a new stream from the same address
+            if stream is not None:
+                retired.append(stream.stream_id)
+            stream = self.streams[address] = _Stream(stream_id)
+
+        if seq < stream.expected or seq in stream.buffer:
+            # Resent because our ACK was lost or late: acknowledge it again
+            stream.duplicates += 1
+        elif seq < stream.expected + MAX_WINDOW:  # else no room; it will be resent
+            stream.buffer[seq] = (kind, data[HEADER.size:])
+            while stream.expected in stream.buffer:
+                kind, payload = stream.buffer.pop(stream.expected)
+                stream.expected += 1
+                if kind == FIN:
+                    stream.finished = True
+                    self.ready.append((address, None))
+                else:
+                    stream.messages += 1
+                    self.ready.append((address, payload))
+        self.sock.sendto(self._ack(stream, seq, sent), address)
+
+    @staticmethod
+    def _ack(stream, seq, sent):
+        ack = ACK_HEADER.pack(ACK, stream.stream_id, stream.expected, sent)
+        if not stream.buffer:
+            return ack
+
+        # The ranges received beyond the gap
+        blocks = []
+        for each in sorted(stream.buffer):
+            if blocks and blocks[-1][1] == each:
+                blocks[-1][1] = each + 1
+            else:
+                blocks.append([each, each + 1])
+        # The range with the datagram that just arrived goes first, the
+        # others after it, lowest first; the sender learns of the rest from
+        # earlier ACKs
+        blocks.sort(key=lambda block: not block[0] <= seq < block[1])
+        return ack + b''.join(SACK_BLOCK.pack(*block) for block in blocks[:MAX_SACK_BLOCKS])
+
+
+# ============================================================================
+# LOSSY LINK SIMULATOR
+# ============================================================================
+
+class LossyLink:
+    """
+    A UDP relay with a bad network inside, for testing on one machine.
+
+    Clients send to link.address instead of `target`. Each datagram, in
+    either direction, is dropped with probability `loss`, delayed by
+    `delay` seconds plus up to `jitter` more (so some overtake others),
+    and delivered twice with probability `duplicate`.
+
+        link = LossyLink(('localhost', 9001), loss=0.05, delay=0.01).start()
+        sender = ReliableSender(sock, link.address)
+    """
+
+    def __init__(self, target, port=0, loss=0.0, delay=0.0, jitter=0.0, duplicate=0.0,
+                 seed=None):
+        host, target_port = target
+        self.target = (socket.gethostbyname(host), target_port)
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.duplicate = duplicate
+        self.random = random.Random(seed)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        self.upstream = {}  # client address -> this link's socket towards the target
+        self.in_transit = []  # heap of (due, n, socket, datagram, destination)
+        self.order = itertools.count()  # breaks ties in the heap
+        self.stopped = threading.Event()
+        self.thread = None
+        # Statistics
+        self.forwarded = 0
+        self.dropped = 0
+        self.duplicated = 0
+
+    def start(self):
+        """Run the link in a background thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        for sock in [self.sock, *self.upstream.values()]:
+            sock.close()
+        self.selector.close()
+
+    def run(self):
+        while not self.stopped.is_set():
+            timeout = 0.1
+            if self.in_transit:
+                timeout = min(timeout, max(0, self.in_transit[0][0] - time.monotonic()))
+            for key, _ in self.selector.select(timeout):
+                self._receive(key.fileobj, key.data)
+
+            now = time.monotonic()
+            while self.in_transit and self.in_transit[0][0] <= now:
+                _, _, sock, data, destination = heapq.heappop(self.in_transit)
+                try:
+                    sock.sendto(data, destination)
+                    self.forwarded += 1
+                except OSError:
+                    self.dropped += 1  # a full buffer drops datagrams too
+
+    def _receive(self, sock, client):
+        while True:
+            try:
+                data, address = sock.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, ConnectionRefusedError):
+                return
+            if client is None:
+                # From a client: on to the target, from a socket of its own
+                # so the answers can be told apart
+                upstream = self.upstream.get(address)
+                if upstream is None:
+                    upstream = self.upstream[address] = socket.socket(socket.AF_INET,
+                                                                      socket.SOCK_DGRAM)
+                    upstream.setblocking(False)
+                    self.selector.register(upstream, selectors.EVENT_READ, address)
+                self._schedule(upstream, data, self.target)
+            else:
+                # From the target: back to the client
+                self._schedule(self.sock, data, client)
+
+    def _schedule(self, sock, data, destination):
+        if self.random.random() < self.loss:
+            self.dropped += 1
+            return
+        copies = 1
+        if self.random.random() < self.duplicate:
+            copies = 2
+            self.duplicated += 1
+        for _ in range(copies):
+            due = time.monotonic() + self.delay + self.random.uniform(0, self.jitter)
+            heapq.heappush(self.in_transit, (due, next(self.order), sock, data, destination))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Reliable UDP Window Benchmark
+
+Starts udp_example.py --server --reliable, puts a simulated bad network
+in front of it (reliable_udp.LossyLink, in a process of its own), and
+streams messages through it with each window size.
+
+With a window of 1, the sender waits for every ACK, so it manages about
+one message per round trip. A window of N keeps N in flight and should
+get close to N per round trip, until losses stall the window, or
+Python's per-datagram cost becomes the limit.
+
+Usage:
+    python reliable_udp_benchmark.py
+    python reliable_udp_benchmark.py --loss 0.05 --delay 0.025 --windows 1,8,64,512
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from reliable_udp import LossyLink, ReliableSender
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'udp_example.py')
+
+
+def start_server(port):
+    command = [sys.executable, SERVER_SCRIPT, '--server', '--reliable', '--quiet',
+               '--port', str(port)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)  # UDP has no connection to wait for
+    return process
+
+
+def run_link(target, port, loss, delay, jitter):
+    LossyLink(target, port, loss=loss, delay=delay, jitter=jitter).run()
+
+
+def run(address, window, size, duration):
+    """Stream `size`-byte messages for `duration` seconds; returns the sender"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = ReliableSender(sock, address, window)
+    payload = os.urandom(size)
+    messages = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        sender.send(payload)
+        messages += 1
+    sender.close()  # counts: a message isn't delivered until it's acknowledged
+    elapsed = time.perf_counter() - start
+    sock.close()
+    return messages / elapsed, sender
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reliable UDP throughput by window size')
+    parser.add_argument('--windows', default='1,4,16,64,256', help='Window sizes to compare')
+    parser.add_argument('--loss', type=float, default=0.02, help='Loss rate, each way')
+    parser.add_argument('--delay', type=float, default=0.01, help='One-way delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random delay')
+    parser.add_argument('--size', type=int, default=1000, help='Message size in bytes')
+    parser.add_argument('--duration', type=float, default=3, help='Seconds per run')
+    parser.add_argument('--port', type=int, default=9600,
+                        help='Port for the server (the link uses the next one)')
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    link = multiprocessing.Process(
+        target=run_link, daemon=True,
+        args=(('127.0.0.1', args.port), args.port + 1, args.loss, args.delay, args.jitter))
+    link.start()
+    time.sleep(0.2)
+    try:
+        print(f"\n{args.size}-byte messages, {args.loss:.0%} loss each way, "
+              f"{args.delay * 1000:.0f} ms each way, {args.duration}s per run\n")
+        print(f"{'window':>7} {'msg/s':>8} {'window/RTT':>11} {'resent':>7} {'RTT ms':>7}")
+        for window in [int(window) for window in args.windows.split(',')]:
+            rate, sender = run(('127.0.0.1', args.port + 1), window, args.size, args.duration)
+            rtt = sender.rtt.srtt or 0
+            ideal = f"{window / rtt:>11.0f}" if rtt else f"{'-':>11}"
+            resent = (sender.fast_retransmits + sender.timeout_retransmits) / sender.sent
+            print(f"{window:>7} {rate:>8.0f} {ideal} {resent:>7.1%} {rtt * 1000:>7.1f}")
+    finally:
+        link.terminate()
+        server.terminate()
+        server.wait()
+
+    print("\nwindow/RTT is the most a window allows: a full window every round trip.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+TCP Connection Scaling Benchmark
+
+Starts tcp_socket_server.py in each of its modes and measures how it
+copes with many clients at once:
+
+1. Idle clients: opens --idle connections that connect, read the welcome
+   message and then just stay connected, like chat or game clients that
+   are mostly quiet.
+2. Active clients: while those are still connected, --active clients
+   send messages and wait for each echo, as fast as they can, for
+   --duration seconds.
+
+It reports how long it took to connect everyone, echo round trips per
+second and their latency, and how much memory and how many threads the
+server used.
+
+The idle clients are spread over several processes, because each
+process can only have so many sockets open (see `ulimit -n`). The server
+may hit the same limit: a thread-per-connection or single-loop server
+has one process to hold every socket, multi mode has one per worker.
+
+Usage:
+    python tcp_benchmark.py
+    python tcp_benchmark.py --idle 20000 --active 2000
+    python tcp_benchmark.py --modes selector,multi --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tcp_socket_server.py')
+
+# Idle connections per client process (keep well under `ulimit -n`)
+IDLE_PER_PROCESS = 5000
+# Connection attempts in flight at once, so the server's backlog isn't swamped
+CONNECT_CONCURRENCY = 500
+CONNECT_TIMEOUT = 10  # seconds
+MESSAGE = b'ping'
+
+
+def raise_open_file_limit():
+    """Every connection is a file descriptor: allow as many as the OS permits"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass
+
+
+async def connect(host, port, semaphore):
+    """Connect and read the welcome line: (reader, writer), or None on failure"""
+    async with semaphore:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+            await asyncio.wait_for(reader.readline(), CONNECT_TIMEOUT)
+            return reader, writer
+        except (OSError, asyncio.TimeoutError):
+            return None
+
+
+async def hold_idle(host, port, count, pipe):
+    """Open `count` connections, report how many worked, hold them until told to stop"""
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    connections = await asyncio.gather(*(connect(host, port, semaphore) for _ in range(count)))
+    opened = [connection for connection in connections if connection is not None]
+    pipe.send(len(opened))
+
+    # Wait for the "stop" message without blocking the event loop
+    await asyncio.get_running_loop().run_in_executor(None, pipe.recv)
+    for _, writer in opened:
+        writer.close()
+
+
+def idle_process(host, port, count, pipe):
+    raise_open_file_limit()
+    asyncio.run(hold_idle(host, port, count, pipe))
+
+
+async def active_client(host, port, semaphore, deadline, latencies, counts):
+    connection = await connect(host, port, semaphore)
+    if connection is None:
+        counts['failed'] += 1
+        return
+    reader, writer = connection
+    counts['connected'] += 1
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(MESSAGE)
+            await asyncio.wait_for(reader.readline(), CONNECT_TIMEOUT)
+            latencies.append(time.perf_counter() - start)
+    except (OSError, asyncio.TimeoutError):
+        counts['errors'] += 1
+    finally:
+        writer.close()
+
+
+async def run_active(host, port, clients, duration):
+    """Echo round trips from `clients` connections for `duration` seconds"""
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    latencies = []
+    counts = {'connected': 0, 'failed': 0, 'errors': 0}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        active_client(host, port, semaphore, deadline, latencies, counts)
+        for _ in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(fraction):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+
+    return dict(counts,
+                messages=len(latencies),
+                rate=len(latencies) / elapsed,
+                p50=percentile(0.50),
+                p99=percentile(0.99))
+
+
+def server_usage(pid):
+    """(RSS in MB, threads) of a process and its children; Linux only"""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(child) for child in f.read().split()]
+        rss = threads = 0
+        for each in pids:
+            with open(f'/proc/{each}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+    except OSError:
+        return None, None
+    return rss / 1024, threads
+
+
+def start_server(mode, port, workers, threads):
+    # Threads mode gets a worker for every client and no idle timeout, so it
+    # is measured as thread-per-connection
+    command = [sys.executable, SERVER_SCRIPT, '--mode', mode, '--port', str(port),
+               '--host', '127.0.0.1', '--workers', str(workers), '--quiet',
+               '--threads', str(threads), '--idle-timeout', '0']
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    async def wait_ready():
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.05)
+        raise RuntimeError(f'server on port {port} did not start')
+
+    asyncio.run(wait_ready())
+    return process
+
+
+def benchmark(mode, port, idle, active, duration, workers):
+    host = '127.0.0.1'
+    server = start_server(mode, port, workers, idle + active)
+    holders = []
+    try:
+        # 1. Idle clients, IDLE_PER_PROCESS per process
+        start = time.perf_counter()
+        for first in range(0, idle, IDLE_PER_PROCESS):
+            ours, theirs = multiprocessing.Pipe()
+            count = min(IDLE_PER_PROCESS, idle - first)
+            process = multiprocessing.Process(target=idle_process,
+                                              args=(host, port, count, theirs))
+            process.start()
+            holders.append((process, ours))
+        idle_connected = sum(pipe.recv() for _, pipe in holders)
+        connect_time = time.perf_counter() - start
+        rss, threads = server_usage(server.pid)
+
+        # 2. Active clients on top
+        result = asyncio.run(run_active(host, port, active, duration))
+        return dict(result,
+                    idle_connected=idle_connected,
+                    connect_time=connect_time,
+                    rss=rss,
+                    threads=threads)
+    finally:
+        for process, pipe in holders:
+            pipe.send('stop')
+        for process, pipe in holders:
+            process.join()
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TCP connection scaling benchmark')
+    parser.add_argument('--idle', type=int, default=20000, help='Idle connections to hold open')
+    parser.add_argument('--active', type=int, default=2000, help='Clients sending messages')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of active traffic')
+    parser.add_argument('--modes', default='threads,selector,multi',
+                        help='Server modes to compare: threads, selector, multi')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Event loop processes for multi mode')
+    parser.add_argument('--port', type=int, default=9100, help='Port for started servers')
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    print(f"\n{args.idle} idle + {args.active} active clients, {args.duration}s of traffic, "
+          f"{args.workers} worker(s) in multi mode\n")
+    print(f"{'':<10} {'idle ok':>8} {'connect s':>10} {'active ok':>10} {'msg/s':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>7} {'threads':>8}")
+
+    for mode in args.modes.split(','):
+        result = benchmark(mode, args.port, args.idle, args.active, args.duration, args.workers)
+        rss = f"{result['rss']:>7.0f}" if result['rss'] is not None else f"{'-':>7}"
+        threads = f"{result['threads']:>8}" if result['threads'] is not None else f"{'-':>8}"
+        print(f"{mode:<10} {result['idle_connected']:>8} {result['connect_time']:>10.1f} "
+              f"{result['connected']:>10} {result['rate']:>8.0f} {result['p50']:>8.2f} "
+              f"{result['p99']:>8.2f} {rss} {threads}")
+
+    print("\nRSS and threads are the server's, measured with the idle clients connected.")
+    print("'idle ok' / 'active ok' below the number asked for means the server (or")
+    print("this machine) ran out of something: file descriptors, memory, or threads.")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,46 @@ Connects to TCP server and sends/receives messages.
 
 Usage:
     python tcp_socket_client.py
+    python tcp_socket_client.py --framed   # for a server started with --framed
 """
 
+import argparse
 import socket
 
+from framing import TEXT, FrameDecoder, receive_frame, send_frames
+
 def main():
     """Connect to TCP server and communicate."""
     HOST = 'localhost'
     PORT = 9000
     
+    parser = argparse.ArgumentParser(description='TCP echo client')
+    parser.add_argument('--host', default=HOST, help='Server address')
+    parser.add_argument('--port', type=int, default=PORT, help='Server port')
+    parser.add_argument('--framed', action='store_true',
+                        help='Length-prefixed messages (see framing.py)')
+    args = parser.parse_args()
+    
+    if args.framed:
+        # Each message is one frame: it arrives whole, whatever its size
+        decoder = FrameDecoder()
+        
+        def send(message):
+            send_frames(client_socket, [(TEXT, message.encode('utf-8'))])
+        
+        def receive():
+            frame = receive_frame(client_socket, decoder)
+            if frame is None:
+                raise ConnectionError('Server closed the connection')
+            return bytes(frame[1]).decode('utf-8')
+    else:
+        # Each recv() is taken to be one message (fine for short ones)
+        def send(message):
+            client_socket.send(message.encode('utf-8'))
+        
+        def receive():
+            return client_socket.recv(1024).decode('utf-8')
+    
     # Create TCP socket
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     
@@ -22,11 +53,11 @@ def main():
     
     try:
         # Connect to server
-        client_socket.connect((HOST, PORT))
-        print(f"✅ Connected to {HOST}:{PORT}")
+        client_socket.connect((args.host, args.port))
+        print(f"✅ Connected to {args.host}:{args.port}")
         
         # Receive welcome message
-        welcome = client_socket.recv(1024).decode('utf-8')
+        welcome = receive()
         print(f"📨 Server: {welcome}")
         
         # Interactive loop
@@ -39,7 +70,7 @@ def main():
                 continue
             
             # Send message to server
-            client_socket.send(message.encode('utf-8'))
+            send(message)
             
             # Check if quitting
             if message.lower() == 'quit':
@@ -47,7 +78,7 @@ def main():
                 break
             
             # Receive response
-            response = client_socket.recv(1024).decode('utf-8')
+            response = receive()
             print(f"📨 {response}", end='')
     
     except ConnectionRefusedError:
@@ -4,22 +4,140 @@ Simple TCP Socket Server
 
 Demonstrates TCP connection, reliable delivery, and bidirectional communication.
 
+The server can run in three modes, all with the same echo behaviour:
+- threads (default): a fixed pool of worker threads, each serving one
+  connection at a time. Simple, but every thread costs memory and the
+  OS has to switch between them, so the pool has a size limit (see
+  "Limits" below).
+- selector: one thread serves every connection. The selectors module
+  (epoll on Linux, kqueue on macOS) says which sockets are ready, and
+  the server never blocks on any single one of them.
+- multi: one selector loop per CPU core, each in its own process. With
+  SO_REUSEPORT every process listens on the same port and the kernel
+  spreads new connections across them.
+
+With --framed, messages are length-prefixed frames (see framing.py)
+instead of "whatever one recv() returned", so they can be any size and
+survive being split up or merged on the way. Use the client with
+--framed too.
+
+Limits (threads mode):
+- At most --threads connections are served at once. Accepted
+  connections wait for a free worker in a queue of --queue-size.
+- When that queue is full, --overflow delay (default) stops accepting,
+  so new clients wait in the OS backlog; --overflow refuse answers them
+  "Server busy" and closes the connection right away.
+- A client that sends nothing for --idle-timeout seconds is dropped, so
+  idle clients can't hold on to every worker.
+- SIGTERM (or Ctrl+C) stops accepting, turns away queued connections,
+  and gives open ones up to DRAIN_TIMEOUT seconds to finish.
+- Counters (active connections, queue depth, bytes in/out) are printed
+  every --stats-interval seconds, on SIGUSR1, and at shutdown.
+
 Usage:
     python tcp_socket_server.py
-    
+    python tcp_socket_server.py --mode selector --quiet
+    python tcp_socket_server.py --mode multi --workers 4
+    python tcp_socket_server.py --framed
+    python tcp_socket_server.py --threads 16 --overflow refuse --stats-interval 5
+
 Then run tcp_socket_client.py in another terminal.
 """
 
+import argparse
+import multiprocessing
+import os
+import queue
+import selectors
+import signal
 import socket
+import sys
 import threading
+import time
+
+from framing import (
+    BINARY, TEXT, FrameDecoder, FrameError, encode_frame, frame_header, send_frames
+)
+
+HOST = 'localhost'
+PORT = 9000
+
+# Connections the OS queues until accept() (the most it allows)
+BACKLOG = socket.SOMAXCONN
+
+WELCOME = b"Welcome to TCP Server!\n"
+
+# Selector modes: stop reading from a client that has this much output
+# waiting (it isn't reading its echoes), until it catches up
+MAX_PENDING_OUTPUT = 64 * 1024
+# After running out of file descriptors, wait this long before accepting again
+ACCEPT_RETRY_DELAY = 0.1
+
+# Threads mode: worker threads, and accepted connections that may wait
+# for one of them
+WORKER_THREADS = 128
+ACCEPT_QUEUE_SIZE = 256
+# Seconds a client may stay silent before it is disconnected (0: forever)
+IDLE_TIMEOUT = 60
+# Seconds open connections get to finish after SIGTERM
+DRAIN_TIMEOUT = 10
+BUSY_MESSAGE = b"Server busy, try again later\n"
+SHUTDOWN_MESSAGE = b"Server shutting down\n"
+
+# Print every connection and message (turned off by --quiet)
+VERBOSE = True
+
+
+def log(message):
+    if VERBOSE:
+        print(message)
 
-def handle_client(client_socket, address):
+
+def echo(data):
+    """
+    The server's answer to one recv(): (message, response bytes).
+    
+    Every mode uses this, so they all behave the same.
+    """
+    message = data.decode('utf-8').strip()
+    response = f"Server echo: {message}\n"
+    return message, response.encode('utf-8')
+
+
+class ServerStats:
+    """Counters shared by the threads of the threads mode"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0  # connections being served
+        self.accepted = 0
+        self.refused = 0  # turned away: queue full or shutting down
+        self.timed_out = 0  # dropped after --idle-timeout
+        self.bytes_in = 0
+        self.bytes_out = 0
+    
+    def add(self, **counts):
+        """stats.add(bytes_in=100, ...): add to the named counters"""
+        with self.lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+    
+    def report(self, queued):
+        return (f"📊 {self.active} active, {queued} queued, {self.accepted} accepted, "
+                f"{self.refused} refused, {self.timed_out} timed out, "
+                f"{self.bytes_in:,} bytes in, {self.bytes_out:,} bytes out")
+
+
+def handle_client(client_socket, address, stats=None):
     """Handle individual client connection."""
-    print(f"✅ New connection from {address}")
+    log(f"✅ New connection from {address}")
+    if stats is None:
+        stats = ServerStats()
     
     try:
         # Send welcome message
-        client_socket.send(b"Welcome to TCP Server!\n")
+        client_socket.sendall(WELCOME)
+        stats.add(bytes_out=len(WELCOME))
         
         while True:
             # Receive data (up to 1024 bytes)
@@ -28,72 +146,557 @@ def handle_client(client_socket, address):
             if not data:
                 # Client closed connection
                 break
+            stats.add(bytes_in=len(data))
             
-            message = data.decode('utf-8').strip()
-            print(f"📨 Received from {address}: {message}")
+            message, response = echo(data)
+            log(f"📨 Received from {address}: {message}")
             
             # Echo message back to client
-            response = f"Server echo: {message}\n"
-            client_socket.send(response.encode('utf-8'))
+            client_socket.sendall(response)
+            stats.add(bytes_out=len(response))
             
             # Special command to close
             if message.lower() == 'quit':
-                print(f"Client {address} requested disconnect")
+                log(f"Client {address} requested disconnect")
                 break
     
+    except socket.timeout:
+        # Silent for too long (or not reading its echoes)
+        log(f"⏱️ Idle timeout: {address}")
+        stats.add(timed_out=1)
+    
     except Exception as e:
         print(f"❌ Error handling client {address}: {e}")
     
     finally:
-        print(f"👋 Connection closed: {address}")
+        log(f"👋 Connection closed: {address}")
         client_socket.close()
 
 
-def main():
-    """Start the TCP server."""
-    HOST = 'localhost'
-    PORT = 9000
+def framed_echo(msg_type, payload):
+    """
+    The answer to one frame: ((msg_type, payload), quit?).
+    
+    Binary frames come back unchanged (the same memoryview, no copy);
+    anything else is answered like an unframed message.
+    """
+    if msg_type == BINARY:
+        return (BINARY, payload), False
+    message, response = echo(bytes(payload))
+    return (TEXT, response), message.lower() == 'quit'
+
+
+def handle_framed_client(client_socket, address, stats=None):
+    """handle_client() for --framed: one frame per message"""
+    log(f"✅ New connection from {address}")
+    if stats is None:
+        stats = ServerStats()
+    decoder = FrameDecoder()
+    
+    try:
+        stats.add(bytes_out=send_frames(client_socket, [(TEXT, WELCOME)]))
+        
+        quit = False
+        while not quit:
+            received = decoder.recv_into(client_socket)
+            if not received:
+                break
+            stats.add(bytes_in=received)
+            # Everything that arrived in this recv is answered with one
+            # sendmsg() call, and the payloads are echoed straight from
+            # the receive buffer
+            replies = []
+            for msg_type, payload in decoder.frames():
+                reply, quit = framed_echo(msg_type, payload)
+                replies.append(reply)
+                if msg_type != BINARY:
+                    log(f"📨 Received from {address}: {bytes(payload).decode('utf-8').strip()}")
+                if quit:
+                    log(f"Client {address} requested disconnect")
+                    break
+            stats.add(bytes_out=send_frames(client_socket, replies))
+    
+    except socket.timeout:
+        log(f"⏱️ Idle timeout: {address}")
+        stats.add(timed_out=1)
     
+    except Exception as e:
+        print(f"❌ Error handling client {address}: {e}")
+    
+    finally:
+        log(f"👋 Connection closed: {address}")
+        client_socket.close()
+
+
+def create_server_socket(host, port, reuse_port=False):
+    """A listening TCP socket"""
     # Create TCP socket
     # AF_INET = IPv4, SOCK_STREAM = TCP
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     
     # Allow reusing the address (useful for development)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # Several sockets (one per process) may listen on this port; the
+        # kernel hands each new connection to one of them
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     
     # Bind to address and port
-    server_socket.bind((HOST, PORT))
+    server_socket.bind((host, port))
+    
+    # Listen for connections. With a short queue, a burst of clients
+    # connecting at once gets refused or has to retry.
+    server_socket.listen(BACKLOG)
+    return server_socket
+
+
+class WorkerPoolServer:
+    """
+    Threads mode: a fixed number of worker threads and a bounded queue.
+    
+    The main thread accepts connections and puts them in the queue; each
+    worker takes one, serves it until it closes, then takes the next.
+    Starting a thread per connection instead lets a burst of clients
+    create thousands of threads, until the machine runs out of memory.
+    Here, the number of threads and waiting connections is fixed, and
+    the rest are delayed (left in the OS backlog) or refused.
+    """
+    
+    def __init__(self, server_socket, framed=False, threads=WORKER_THREADS,
+                 queue_size=ACCEPT_QUEUE_SIZE, overflow='delay', idle_timeout=IDLE_TIMEOUT):
+        self.server_socket = server_socket
+        self.framed = framed
+        self.handler = handle_framed_client if framed else handle_client
+        self.queue = queue.Queue(queue_size)
+        self.overflow = overflow
+        self.idle_timeout = idle_timeout or None  # 0: no timeout
+        self.stats = ServerStats()
+        self.stopping = threading.Event()
+        self.report_requested = threading.Event()
+        # Sockets being served, to cut off whatever is left after draining
+        self.active_sockets = set()
+        self.active_lock = threading.Lock()
+        self.workers = [threading.Thread(target=self.work, daemon=True)
+                        for _ in range(threads)]
+    
+    def serve_forever(self, stats_interval=None):
+        """Accept until interrupted (Ctrl+C or SIGTERM), then drain"""
+        for worker in self.workers:
+            worker.start()
+        threading.Thread(target=self.report_stats, args=(stats_interval,), daemon=True).start()
+        
+        try:
+            while True:
+                # Accept incoming connection
+                try:
+                    client_socket, address = self.server_socket.accept()
+                except OSError as e:
+                    # Usually out of file descriptors; clients wait in the backlog
+                    print(f"❌ accept() failed: {e}")
+                    time.sleep(ACCEPT_RETRY_DELAY)
+                    continue
+                try:
+                    self.stats.add(accepted=1)
+                    self.enqueue(client_socket, address)
+                except KeyboardInterrupt:
+                    # Interrupted before the connection reached the queue
+                    # (e.g. blocked in put()), so drain() won't see it
+                    self.refuse(client_socket, address, SHUTDOWN_MESSAGE)
+                    raise
+        finally:
+            self.drain()
+    
+    def enqueue(self, client_socket, address):
+        """Hand a new connection to the workers, or apply backpressure"""
+        if self.overflow == 'refuse':
+            try:
+                self.queue.put_nowait((client_socket, address))
+            except queue.Full:
+                self.refuse(client_socket, address, BUSY_MESSAGE)
+            return
+        
+        # Delay: wait for room before accepting anyone else. Meanwhile new
+        # clients queue up in the OS backlog, and once that is full their
+        # connection attempts go unanswered and are retried.
+        self.queue.put((client_socket, address))
+    
+    def refuse(self, client_socket, address, message):
+        log(f"🚫 Refused {address}: {message.decode('utf-8').strip()}")
+        self.stats.add(refused=1)
+        try:
+            # Never block the accepting thread on a client
+            client_socket.setblocking(False)
+            client_socket.send(encode_frame(message, TEXT) if self.framed else message)
+        except OSError:
+            pass
+        client_socket.close()
+    
+    def work(self):
+        """A worker thread: serve queued connections one at a time"""
+        while not self.stopping.is_set():
+            try:
+                client_socket, address = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            # recv() and sendall() give up after idle_timeout seconds
+            client_socket.settimeout(self.idle_timeout)
+            with self.active_lock:
+                self.active_sockets.add(client_socket)
+            self.stats.add(active=1)
+            try:
+                self.handler(client_socket, address, self.stats)
+            finally:
+                with self.active_lock:
+                    self.active_sockets.discard(client_socket)
+                self.stats.add(active=-1)
     
-    # Listen for connections (max 5 queued connections)
-    server_socket.listen(5)
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Stop accepting, turn away queued clients, let open connections finish"""
+        self.stopping.set()
+        self.server_socket.close()
+        while True:
+            try:
+                client_socket, address = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.refuse(client_socket, address, SHUTDOWN_MESSAGE)
+        
+        if self.stats.active:
+            print(f"⏳ Waiting up to {timeout}s for {self.stats.active} connection(s) to finish")
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.join(max(0, deadline - time.monotonic()))
+        
+        # Out of time: disconnect the rest (their recv() returns at once)
+        with self.active_lock:
+            remaining = list(self.active_sockets)
+        for client_socket in remaining:
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # closed in the meantime
+        for worker in self.workers:
+            worker.join(1)
+        
+        self.report_requested.set()  # stops the stats thread
+        print(self.report())
+    
+    def report(self):
+        return self.stats.report(self.queue.qsize())
+    
+    def report_stats(self, interval):
+        """Print the counters every `interval` seconds and whenever asked (SIGUSR1)"""
+        while not self.stopping.is_set():
+            self.report_requested.wait(interval)
+            self.report_requested.clear()
+            if not self.stopping.is_set():
+                print(self.report())
+
+
+# ============================================================================
+# SELECTOR (EVENT LOOP) MODE
+# ============================================================================
+
+class Connection:
+    """What the event loop knows about one client"""
+    
+    __slots__ = ('sock', 'address', 'decoder', 'output', 'events', 'quitting', 'closed')
+    
+    def __init__(self, sock, address, framed=False):
+        self.sock = sock
+        self.address = address
+        self.decoder = FrameDecoder() if framed else None
+        # Output not yet sent
+        self.output = bytearray(encode_frame(WELCOME, TEXT) if framed else WELCOME)
+        self.events = 0  # what the selector is watching for
+        self.quitting = False  # close once the output is sent
+        self.closed = False
+
+
+class EventLoopServer:
+    """
+    Serves every connection from one thread.
+    
+    Nothing here blocks: sockets are non-blocking, and the selector says
+    which ones can be read from (a message arrived) or written to (there
+    is room in the send buffer again). Each connection is a Connection
+    object instead of a thread, so 20,000 idle clients cost 20,000 small
+    objects and sockets, not 20,000 thread stacks.
+    """
+    
+    def __init__(self, server_socket, framed=False):
+        self.server_socket = server_socket
+        self.framed = framed
+        server_socket.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(server_socket, selectors.EVENT_READ)
+        self.accept_paused_until = None
+        self.connections = 0
+    
+    def serve_forever(self):
+        while True:
+            timeout = None
+            if self.accept_paused_until is not None:
+                timeout = max(0, self.accept_paused_until - time.monotonic())
+            for key, events in self.selector.select(timeout):
+                if key.data is None:
+                    self.accept()
+                    continue
+                connection = key.data
+                if events & selectors.EVENT_READ:
+                    self.read(connection)
+                if events & selectors.EVENT_WRITE and not connection.closed:
+                    self.flush(connection)
+            if (self.accept_paused_until is not None
+                    and time.monotonic() >= self.accept_paused_until):
+                self.accept_paused_until = None
+                self.selector.register(self.server_socket, selectors.EVENT_READ)
+    
+    def accept(self):
+        # Take everything waiting in the backlog, not just one
+        while True:
+            try:
+                client_socket, address = self.server_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # Out of file descriptors: the listening socket stays
+                # readable, so stop watching it for a moment instead of
+                # spinning
+                print(f"❌ accept() failed: {e}")
+                self.selector.unregister(self.server_socket)
+                self.accept_paused_until = time.monotonic() + ACCEPT_RETRY_DELAY
+                return
+            
+            log(f"✅ New connection from {address}")
+            client_socket.setblocking(False)
+            connection = Connection(client_socket, address, self.framed)
+            self.connections += 1
+            connection.events = selectors.EVENT_READ
+            self.selector.register(client_socket, connection.events, connection)
+            self.flush(connection)  # the welcome message
+    
+    def read(self, connection):
+        if connection.decoder is not None:
+            self.read_frames(connection)
+            return
+        try:
+            data = connection.sock.recv(1024)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"❌ Error handling client {connection.address}: {e}")
+            self.close(connection)
+            return
+        if not data:
+            # Client closed connection
+            self.close(connection)
+            return
+        
+        try:
+            message, response = echo(data)
+        except UnicodeDecodeError as e:
+            print(f"❌ Error handling client {connection.address}: {e}")
+            self.close(connection)
+            return
+        log(f"📨 Received from {connection.address}: {message}")
+        connection.output += response
+        if message.lower() == 'quit':
+            log(f"Client {connection.address} requested disconnect")
+            connection.quitting = True
+        self.flush(connection)
+    
+    def read_frames(self, connection):
+        """read() for --framed: answer every complete frame received"""
+        try:
+            received = connection.decoder.recv_into(connection.sock)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"❌ Error handling client {connection.address}: {e}")
+            self.close(connection)
+            return
+        if not received:
+            # Client closed connection
+            self.close(connection)
+            return
+        
+        try:
+            for msg_type, payload in connection.decoder.frames():
+                (reply_type, reply), quit = framed_echo(msg_type, payload)
+                if msg_type != BINARY:
+                    log(f"📨 Received from {connection.address}: "
+                        f"{bytes(payload).decode('utf-8').strip()}")
+                connection.output += frame_header(len(reply), reply_type)
+                connection.output += reply
+                if quit:
+                    log(f"Client {connection.address} requested disconnect")
+                    connection.quitting = True
+                    break
+        except (FrameError, UnicodeDecodeError) as e:
+            print(f"❌ Error handling client {connection.address}: {e}")
+            self.close(connection)
+            return
+        self.flush(connection)
+    
+    def flush(self, connection):
+        """Send as much pending output as the socket takes right now"""
+        if connection.output:
+            try:
+                sent = connection.sock.send(connection.output)
+            except BlockingIOError:
+                sent = 0
+            except OSError as e:
+                print(f"❌ Error handling client {connection.address}: {e}")
+                self.close(connection)
+                return
+            del connection.output[:sent]
+        
+        if connection.quitting and not connection.output:
+            self.close(connection)
+            return
+        
+        # Watch for room to write only while there is output left, and
+        # stop reading from a client that isn't reading its echoes
+        events = 0
+        if not connection.quitting and len(connection.output) < MAX_PENDING_OUTPUT:
+            events |= selectors.EVENT_READ
+        if connection.output:
+            events |= selectors.EVENT_WRITE
+        if events != connection.events:
+            connection.events = events
+            self.selector.modify(connection.sock, events, connection)
+    
+    def close(self, connection):
+        log(f"👋 Connection closed: {connection.address}")
+        connection.closed = True
+        self.connections -= 1
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+
+
+def run_selector_worker(host, port, quiet, framed):
+    """One process of multi mode: its own socket on the shared port, its own loop"""
+    global VERBOSE
+    VERBOSE = not quiet
+    server_socket = create_server_socket(host, port, reuse_port=True)
+    try:
+        EventLoopServer(server_socket, framed).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server_socket.close()
+
+
+def run_multi(host, port, workers, framed=False):
+    """Start `workers` selector loops sharing the port and wait for them"""
+    processes = [
+        multiprocessing.Process(target=run_selector_worker,
+                                args=(host, port, not VERBOSE, framed), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
     
-    print("""
+    # Stopping this process (Ctrl+C or SIGTERM) stops the workers too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+def raise_open_file_limit():
+    """Every connection is a file descriptor: allow as many as the OS permits"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass  # keep the current limit
+
+
+def main():
+    """Start the TCP server."""
+    global VERBOSE
+    
+    parser = argparse.ArgumentParser(description='TCP echo server')
+    parser.add_argument('--host', default=HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=PORT, help='Port to listen on')
+    parser.add_argument('--mode', choices=('threads', 'selector', 'multi'), default='threads',
+                        help='A pool of threads, one event loop, or one loop per core')
+    parser.add_argument('--threads', type=int, default=WORKER_THREADS,
+                        help='Worker threads in threads mode (connections served at once)')
+    parser.add_argument('--queue-size', type=int, default=ACCEPT_QUEUE_SIZE,
+                        help='Accepted connections that may wait for a worker')
+    parser.add_argument('--overflow', choices=('delay', 'refuse'), default='delay',
+                        help='When the queue is full: stop accepting, or answer "busy"')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help='Seconds before a silent client is dropped (0: never)')
+    parser.add_argument('--stats-interval', type=float, default=None,
+                        help='Print the counters every N seconds (also on SIGUSR1)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Event loop processes in multi mode (default: one per core)')
+    parser.add_argument('--framed', action='store_true',
+                        help='Length-prefixed messages (see framing.py)')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Do not print every connection and message')
+    args = parser.parse_args()
+    
+    if args.mode == 'multi' and not hasattr(socket, 'SO_REUSEPORT'):
+        parser.error('multi mode needs SO_REUSEPORT, which this OS does not have')
+    if args.threads < 1 or args.queue_size < 1:
+        parser.error('--threads and --queue-size must be at least 1')
+    VERBOSE = not args.quiet
+    raise_open_file_limit()
+    
+    server_socket = None
+    if args.mode != 'multi':
+        server_socket = create_server_socket(args.host, args.port)
+    
+    address = f"{args.host}:{args.port}"
+    mode = {'threads': f'{args.threads} worker threads',
+            'selector': 'one event loop',
+            'multi': f'{args.workers} event loops'}[args.mode]
+    if args.framed:
+        mode += ', framed'
+    print(f"""
     ╔════════════════════════════════════════════╗
     ║   🔌 TCP Server Started!                  ║
     ╠════════════════════════════════════════════╣
-    ║   Listening on: localhost:9000            ║
+    ║   Listening on: {address:<27}║
+    ║   Mode: {mode:<35}║
     ║   Press Ctrl+C to stop                     ║
     ╚════════════════════════════════════════════╝
     """)
     
     try:
-        while True:
-            # Accept incoming connection
-            client_socket, address = server_socket.accept()
-            
-            # Handle client in a new thread (allows multiple clients)
-            client_thread = threading.Thread(
-                target=handle_client,
-                args=(client_socket, address)
-            )
-            client_thread.daemon = True
-            client_thread.start()
+        if args.mode == 'threads':
+            server = WorkerPoolServer(server_socket, args.framed, args.threads,
+                                      args.queue_size, args.overflow, args.idle_timeout)
+            # SIGTERM drains like Ctrl+C; SIGUSR1 prints the counters
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+            if hasattr(signal, 'SIGUSR1'):  # not on Windows
+                signal.signal(signal.SIGUSR1,
+                              lambda signum, frame: server.report_requested.set())
+            server.serve_forever(args.stats_interval)
+        elif args.mode == 'selector':
+            EventLoopServer(server_socket, args.framed).serve_forever()
+        else:
+            run_multi(args.host, args.port, args.workers, args.framed)
     
     except KeyboardInterrupt:
         print("\n\n✅ Server stopped. Goodbye!")
     
     finally:
-        server_socket.close()
+        if server_socket is not None:
+            server_socket.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+ASYNC TCP CLIENT TESTS
+======================
+
+Runs async_tcp_client.py's PipelinedClient against small framed servers
+that answer out of order, never answer, or hang up, and checks that
+answers reach the right requests, timeouts fire, and dropped
+connections come back.
+
+Usage:
+    pytest test_async_tcp_client.py
+"""
+
+import asyncio
+import socket
+
+import pytest
+
+from async_tcp_client import REQUEST_ID, PipelinedClient
+from framing import BINARY, TEXT, FrameDecoder, encode_frame
+from tcp_socket_server import WELCOME
+
+
+class FramedServer:
+    """
+    A framed server on a free port. Each batch of request frames that
+    arrives goes to `answer(server, payloads, writer)`; the default
+    echoes them, like tcp_socket_server.py --framed.
+    """
+
+    def __init__(self, answer=None):
+        self.answer = answer or FramedServer.echo
+        self.connections = 0
+        self.writers = []
+        self.requests = []  # payloads received so far, in order
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        writer.write(encode_frame(WELCOME, TEXT))
+        decoder = FrameDecoder()
+        while data := await reader.read(65536):
+            decoder.feed(data)
+            payloads = [bytes(payload) for _, payload in decoder.frames()]
+            self.requests += payloads
+            await self.answer(self, payloads, writer)
+        writer.close()
+
+    @staticmethod
+    async def echo(server, payloads, writer):
+        for payload in payloads:
+            writer.write(encode_frame(payload, BINARY))
+
+
+def client_for(server, **options):
+    options.setdefault('reconnect_delay', 0.01)
+    return PipelinedClient('127.0.0.1', server.port, **options)
+
+
+def test_answers_out_of_order():
+    """Answers are matched to requests by correlation ID, not by order"""
+    async def reversed_echo(server, payloads, writer):
+        if len(server.requests) == 20:
+            for payload in reversed(server.requests):
+                writer.write(encode_frame(payload, BINARY))
+
+    async def run():
+        async with FramedServer(reversed_echo) as server:
+            async with client_for(server, connections=1) as client:
+                messages = [f'request {i}'.encode() for i in range(20)]
+                replies = await asyncio.gather(*(client.request(m) for m in messages))
+                assert replies == messages
+                ids = [REQUEST_ID.unpack_from(request)[0] for request in server.requests]
+                assert len(set(ids)) == 20
+
+    asyncio.run(run())
+
+
+def test_requests_spread_over_pool():
+    """Concurrent requests use every connection of the pool"""
+    async def run():
+        async with FramedServer() as server:
+            async with client_for(server, connections=4) as client:
+                await asyncio.sleep(0.1)  # let every connection come up
+                messages = [b'%d' % i for i in range(400)]
+                assert await asyncio.gather(*(client.request(m) for m in messages)) == messages
+                assert server.connections == 4
+                assert all(not connection.pending for connection in client.pool)
+
+    asyncio.run(run())
+
+
+def test_timeout():
+    """An unanswered request times out and gives its slot back"""
+    async def silent(server, payloads, writer):
+        pass
+
+    async def run():
+        async with FramedServer(silent) as server:
+            async with client_for(server, connections=1, max_in_flight=1) as client:
+                for _ in range(3):  # would wait forever if the slot were leaked
+                    with pytest.raises(asyncio.TimeoutError):
+                        await client.request(b'hello', timeout=0.05)
+                assert not client.pool[0].pending
+                assert len(server.requests) == 3
+
+    asyncio.run(run())
+
+
+def test_late_answer_is_ignored():
+    """An answer arriving after its request timed out doesn't go to another one"""
+    async def slow_first(server, payloads, writer):
+        if len(server.requests) == 1:
+            await asyncio.sleep(0.2)
+        for payload in payloads:
+            writer.write(encode_frame(payload, BINARY))
+
+    async def run():
+        async with FramedServer(slow_first) as server:
+            async with client_for(server, connections=1) as client:
+                with pytest.raises(asyncio.TimeoutError):
+                    await client.request(b'first', timeout=0.05)
+                assert await client.request(b'second') == b'second'
+
+    asyncio.run(run())
+
+
+def test_reconnect_after_drop():
+    """Requests on a dropped connection fail; the pool reconnects by itself"""
+    async def hang_up_once(server, payloads, writer):
+        if server.connections == 1:
+            writer.transport.abort()
+        else:
+            await FramedServer.echo(server, payloads, writer)
+
+    async def run():
+        async with FramedServer(hang_up_once) as server:
+            async with client_for(server, connections=1) as client:
+                with pytest.raises(ConnectionError):
+                    await client.request(b'lost')
+                assert await client.request(b'after', timeout=2) == b'after'
+                assert client.reconnects == 1
+                assert server.connections == 2
+
+    asyncio.run(run())
+
+
+def test_close_fails_requests_in_flight():
+    """Closing the client ends the requests still waiting for an answer"""
+    async def silent(server, payloads, writer):
+        pass
+
+    async def run():
+        async with FramedServer(silent) as server:
+            client = client_for(server, connections=1)
+            await client.start()
+            request = asyncio.create_task(client.request(b'hello'))
+            await asyncio.sleep(0.05)
+            await client.close()
+            with pytest.raises(ConnectionError):
+                await request
+
+    asyncio.run(run())
+
+
+def test_start_timeout_stops_reconnecting():
+    """If no connection comes up in time, start() raises and leaves no tasks behind"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]  # nothing listens here
+
+    async def run():
+        client = PipelinedClient('127.0.0.1', port, connections=3,
+                                 connect_timeout=0.2, reconnect_delay=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.start()
+        assert client.pool == []
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+FRAMING TESTS
+=============
+
+Checks framing.py: frames split across receives or run together in one,
+frames over the size limit, and sendmsg() calls that send only part of
+a batch.
+
+Usage:
+    pytest test_framing.py
+"""
+
+import os
+import random
+import socket
+import threading
+
+import pytest
+
+import framing
+from framing import (BINARY, TEXT, FrameDecoder, FrameError, decode_varint, encode_frame,
+                     encode_varint, frame_header, receive_frame, send_frames)
+
+FRAMES = [(TEXT, b'hello'), (BINARY, b''), (None, b'no type'), (BINARY, bytes(range(256)) * 40),
+          (TEXT, 'café'.encode()), (BINARY, os.urandom(70000))]
+STREAM = b''.join(encode_frame(payload, msg_type) for msg_type, payload in FRAMES)
+
+
+def decode(chunks, **kwargs):
+    """Feed `chunks` one at a time; returns every frame, copied"""
+    decoder = FrameDecoder(**kwargs)
+    frames = []
+    for chunk in chunks:
+        decoder.feed(chunk)
+        frames.extend((msg_type, bytes(payload)) for msg_type, payload in decoder.frames())
+    return frames
+
+
+class TrickleSocket:
+    """Sends at most `limit` bytes per sendmsg() call, like a full send buffer"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.sent = bytearray()
+        self.calls = 0
+
+    def sendmsg(self, buffers):
+        self.calls += 1
+        assert len(buffers) <= framing.MAX_BUFFERS_PER_SEND
+        data = b''.join(buffers)[:self.limit]
+        self.sent += data
+        return len(data)
+
+
+@pytest.mark.parametrize('value', [0, 1, 63, 64, 127, 128, 8191, 8192, 2 ** 32, 2 ** 63 - 1])
+def test_varint_round_trip(value):
+    """Varints decode to what was encoded, and not before their last byte"""
+    encoded = encode_varint(value)
+    assert decode_varint(encoded, 0, len(encoded)) == (value, len(encoded))
+    assert decode_varint(encoded, 0, len(encoded) - 1) is None
+
+
+def test_header_sizes():
+    """Under 64 bytes: one header byte; under 8 KiB: two; the type adds one"""
+    assert len(frame_header(63)) == 1
+    assert len(frame_header(64)) == len(frame_header(8191)) == 2
+    assert len(frame_header(63, BINARY)) == 2
+
+
+def test_coalesced():
+    """All frames in one receive come out separately"""
+    assert decode([STREAM]) == FRAMES
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 1000, 4096, 65536])
+def test_fragmented(size):
+    """Frames split into receives of any size come out whole"""
+    chunks = [STREAM[i:i + size] for i in range(0, len(STREAM), size)]
+    assert decode(chunks, size=16) == FRAMES
+
+
+def test_random_splits():
+    """Ten random cut points at a time, twenty times"""
+    rng = random.Random(7)
+    for _ in range(20):
+        cuts = sorted(rng.sample(range(1, len(STREAM)), 10))
+        chunks = [STREAM[i:j] for i, j in zip([0] + cuts, cuts + [len(STREAM)])]
+        assert decode(chunks) == FRAMES
+
+
+def test_payloads_are_views():
+    """Payloads point into the decoder's buffer instead of being copied"""
+    decoder = FrameDecoder()
+    decoder.feed(STREAM)
+    _, payload = next(decoder.frames())
+    assert isinstance(payload, memoryview) and payload.obj is decoder.buffer
+
+
+def test_large_frame_buffer_given_back():
+    """A buffer grown for a big frame is replaced once it is empty again"""
+    decoder = FrameDecoder(size=1024)
+    decoder.feed(encode_frame(bytes(framing.KEEP_BUFFER_SIZE + 1), BINARY))
+    assert len(list(decoder.frames())) == 1
+    assert len(decoder.buffer) > framing.KEEP_BUFFER_SIZE
+    decoder.feed(encode_frame(b'small', BINARY))
+    assert len(decoder.buffer) == 1024
+    assert [bytes(payload) for _, payload in decoder.frames()] == [b'small']
+
+
+def test_oversized_frame():
+    """A header announcing more than max_frame_size is refused before any payload"""
+    decoder = FrameDecoder(max_frame_size=100)
+    decoder.feed(encode_frame(bytes(100), BINARY) + frame_header(101, BINARY))
+    frames = decoder.frames()
+    assert len(next(frames)[1]) == 100
+    with pytest.raises(FrameError):
+        next(frames)
+
+
+def test_overlong_header():
+    """A varint that never ends is refused rather than read forever"""
+    decoder = FrameDecoder()
+    decoder.feed(b'\xff' * 10)
+    with pytest.raises(FrameError):
+        list(decoder.frames())
+
+
+@pytest.mark.parametrize('limit', [1, 5, 1000, 10 ** 9])
+def test_partial_sendmsg(limit):
+    """send_frames() resumes where a short sendmsg() stopped"""
+    sock = TrickleSocket(limit)
+    assert send_frames(sock, FRAMES) == len(STREAM)
+    assert bytes(sock.sent) == STREAM
+    if limit == 1:
+        assert sock.calls == len(STREAM)
+
+
+def test_batches_over_iov_max():
+    """More buffers than sendmsg() accepts go out in several calls"""
+    frames = [(BINARY, b'x')] * (framing.MAX_BUFFERS_PER_SEND * 2)
+    sock = TrickleSocket(10 ** 9)
+    send_frames(sock, frames)
+    assert sock.calls == 4  # a header and a payload buffer per frame
+    assert decode([sock.sent]) == [(BINARY, b'x')] * len(frames)
+
+
+def test_over_a_socket():
+    """send_frames() and receive_frame() on a real connection"""
+    a, b = socket.socketpair()
+    with a, b:
+        sender = threading.Thread(target=send_frames, args=(a, FRAMES * 3))
+        sender.start()
+        decoder = FrameDecoder(size=1024)
+        received = []
+        for _ in range(len(FRAMES) * 3):
+            msg_type, payload = receive_frame(b, decoder)
+            received.append((msg_type, bytes(payload)))  # valid until the next receive
+        sender.join()
+        assert received == FRAMES * 3
+        a.shutdown(socket.SHUT_WR)
+        assert receive_frame(b, decoder) is None
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+RELIABLE UDP TESTS
+==================
+
+Streams messages with reliable_udp.py's ReliableSender to a
+ReliableReceiver, directly and through a LossyLink that drops, delays,
+reorders and duplicates datagrams (seeded, so runs see much the same
+network), and checks they arrive exactly once and in order.
+
+Usage:
+    pytest test_reliable_udp.py
+"""
+
+import socket
+import threading
+
+import pytest
+
+import reliable_udp
+from reliable_udp import (ACK, ACK_HEADER, DATA, FIN, HEADER, MAX_PAYLOAD, LossyLink,
+                          ReliableReceiver, ReliableSender)
+
+
+@pytest.fixture
+def receiver():
+    """A ReliableReceiver on a free port; receive() gives up after 5 seconds"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(5)
+    yield ReliableReceiver(sock)
+    sock.close()
+
+
+def address_of(receiver):
+    return receiver.sock.getsockname()
+
+
+def stream(receiver, messages, via=None, window=64):
+    """Send `messages` in one stream, to `via` if given; returns what arrived"""
+    results = []
+    done = threading.Event()
+
+    def receive():
+        # Keep answering after the FIN arrives: its ACK may be lost, and
+        # the sender resends it until one gets through
+        receiver.sock.settimeout(0.05)
+        while not done.is_set():
+            try:
+                results.append(receiver.receive()[1])
+            except socket.timeout:
+                pass
+
+    thread = threading.Thread(target=receive, daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sender = ReliableSender(sock, via or address_of(receiver), window=window)
+            for message in messages:
+                sender.send(message)
+            sender.close()
+    finally:
+        done.set()
+        thread.join()
+    assert results[-1] is None  # the end of the stream, once
+    return results[:-1], sender
+
+
+def test_stream_in_order(receiver):
+    """Without loss every message arrives once, in order, with nothing resent"""
+    messages = [f'message {i}'.encode() for i in range(200)]
+    results, sender = stream(receiver, messages, window=16)
+    assert results == messages
+    assert sender.fast_retransmits == sender.timeout_retransmits == 0
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_stream_over_lossy_link(receiver, seed):
+    """Loss, jitter and duplicates in both directions: still exactly once, in order"""
+    messages = [f'message {i}'.encode() for i in range(300)]
+    link = LossyLink(address_of(receiver), loss=0.1, delay=0.002, jitter=0.01,
+                     duplicate=0.1, seed=seed).start()
+    try:
+        results, sender = stream(receiver, messages, via=link.address)
+    finally:
+        link.close()
+    assert results == messages
+    assert link.dropped and link.duplicated and sender.fast_retransmits
+
+
+def test_two_senders_one_receiver(receiver):
+    """Interleaved streams from different addresses are reassembled separately"""
+    results = {}
+
+    def receive_both():
+        finished = 0
+        while finished < 2:
+            address, message = receiver.receive()
+            if message is None:
+                finished += 1
+            else:
+                results.setdefault(address, []).append(message)
+
+    thread = threading.Thread(target=receive_both, daemon=True)
+    thread.start()
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as a, \
+            socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as b:
+        senders = {a: ReliableSender(a, address_of(receiver), window=4),
+                   b: ReliableSender(b, address_of(receiver), window=4)}
+        for i in range(20):
+            for sock, sender in senders.items():
+                sender.send(b'%d:%d' % (sock.fileno(), i))
+        for sender in senders.values():
+            sender.close()
+        thread.join(5)
+        for sock in senders:
+            assert results[sock.getsockname()] == [b'%d:%d' % (sock.fileno(), i)
+                                                   for i in range(20)]
+
+
+def test_late_datagram_from_earlier_stream(receiver):
+    """A late copy from a finished stream neither restarts it nor resets the next one"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(5)
+
+        def send(kind, stream_id, seq, payload=b''):
+            sock.sendto(HEADER.pack(kind, stream_id, seq, 0) + payload, address_of(receiver))
+
+        send(DATA, 1, 0, b'first')
+        send(FIN, 1, 1)
+        assert [receiver.receive()[1] for _ in range(2)] == [b'first', None]
+        send(DATA, 2, 0, b'second')
+        send(DATA, 2, 1, b'third')
+        assert [receiver.receive()[1] for _ in range(2)] == [b'second', b'third']
+
+        send(DATA, 1, 0, b'first')  # the network delivers an old duplicate
+        send(DATA, 2, 2, b'fourth')
+        send(FIN, 2, 3)
+        assert [receiver.receive()[1] for _ in range(2)] == [b'fourth', None]
+
+        # Stream 2 was acknowledged all along; stream 1's copy got no answer
+        acks = []
+        while True:
+            try:
+                acks.append(ACK_HEADER.unpack_from(sock.recv(100)))
+            except socket.timeout:
+                break
+            sock.settimeout(0.2)
+        assert [(kind, stream_id) for kind, stream_id, _, _ in acks] == \
+            [(ACK, 1)] * 2 + [(ACK, 2)] * 4
+        assert acks[-1][2] == 4
+
+
+def test_sender_gives_up(receiver, monkeypatch):
+    """With nobody answering, close() raises ConnectionError after MAX_RETRIES"""
+    monkeypatch.setattr(reliable_udp, 'INITIAL_RTO', 0.02)
+    monkeypatch.setattr(reliable_udp, 'MAX_RETRIES', 2)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sender = ReliableSender(sock, address_of(receiver))  # the receiver never reads
+        sender.send(b'hello')
+        with pytest.raises(ConnectionError):
+            sender.close()
+
+
+def test_limits(receiver):
+    """Bad windows and oversized messages are refused up front"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        with pytest.raises(ValueError):
+            ReliableSender(sock, address_of(receiver), window=0)
+        sender = ReliableSender(sock, address_of(receiver))
+        with pytest.raises(ValueError):
+            sender.send(b'x' * (MAX_PAYLOAD + 1))
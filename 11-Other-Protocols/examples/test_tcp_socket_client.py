@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+TCP CLIENT TESTS
+================
+
+Runs tcp_socket_client.py against the echo server's connection handlers,
+served from a thread on a free port.
+
+Usage:
+    pytest test_tcp_socket_client.py
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import tcp_socket_server
+from tcp_socket_server import create_server_socket, handle_client, handle_framed_client
+
+CLIENT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tcp_socket_client.py')
+
+
+def serve_one(handler):
+    """Serve a single connection with `handler` in a thread; returns the port"""
+    server_socket = create_server_socket('127.0.0.1', 0)
+    port = server_socket.getsockname()[1]
+
+    def accept_one():
+        client_socket, address = server_socket.accept()
+        server_socket.close()
+        handler(client_socket, address)
+
+    threading.Thread(target=accept_one, daemon=True).start()
+    return port
+
+
+def run_client(port, *args, messages):
+    result = subprocess.run(
+        [sys.executable, CLIENT_SCRIPT, '--host', '127.0.0.1', '--port', str(port), *args],
+        input=''.join(f'{message}\n' for message in messages),
+        capture_output=True, text=True, encoding='utf-8', timeout=10)
+    return result.stdout
+
+
+@pytest.mark.parametrize('handler, args', [
+    (handle_client, ()),
+    (handle_framed_client, ('--framed',)),
+])
+def test_client_sends_a_message(monkeypatch, handler, args):
+    """One message goes out and the echo comes back, framed or not"""
+    monkeypatch.setattr(tcp_socket_server, 'VERBOSE', False)
+    port = serve_one(handler)
+
+    output = run_client(port, *args, messages=['hello', 'quit'])
+
+    assert 'Welcome to TCP Server!' in output
+    assert 'Server echo: hello' in output
+    assert '❌' not in output
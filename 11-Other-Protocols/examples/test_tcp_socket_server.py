@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+TCP SERVER TESTS
+================
+
+Talks to tcp_socket_server.py's modes over real connections: the
+selector loop served from a thread, multi mode as a subprocess, and the
+threads mode's worker pool (overflow, idle timeout and draining).
+
+Usage:
+    pytest test_tcp_socket_server.py
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import tcp_socket_server
+from framing import BINARY, TEXT, FrameDecoder, encode_frame, receive_frame, send_frames
+from tcp_socket_server import (BUSY_MESSAGE, SHUTDOWN_MESSAGE, WELCOME, EventLoopServer,
+                               WorkerPoolServer, create_server_socket)
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tcp_socket_server.py')
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(tcp_socket_server, 'VERBOSE', False)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def connect(port, framed=False):
+    """A client that has read the welcome message"""
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    if framed:
+        decoder = FrameDecoder()
+        assert receive_frame(sock, decoder) == (TEXT, WELCOME)
+        return sock, decoder
+    assert receive_exactly(sock, len(WELCOME)) == WELCOME
+    return sock
+
+
+def receive_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def echo_of(message):
+    return f'Server echo: {message}\n'.encode()
+
+
+@pytest.fixture
+def selector_server():
+    """start(framed) runs an EventLoopServer in a thread and returns (server, port)"""
+    sockets = []
+
+    def start(framed=False):
+        server_socket = create_server_socket('127.0.0.1', 0)
+        sockets.append(server_socket)
+        server = EventLoopServer(server_socket, framed)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, server_socket.getsockname()[1]
+
+    yield start
+    for server_socket in sockets:
+        server_socket.close()
+
+
+def test_selector_echo_and_quit(selector_server):
+    """Messages are echoed, 'quit' is answered and then the connection closes"""
+    server, port = selector_server()
+    with connect(port) as sock:
+        for message in ['hello', 'café']:
+            sock.sendall(message.encode())
+            assert receive_exactly(sock, len(echo_of(message))) == echo_of(message)
+        sock.sendall(b'quit')
+        assert receive_exactly(sock, 100) == echo_of('quit')
+    deadline = time.monotonic() + 5
+    while server.connections and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.connections == 0
+
+
+def test_selector_serves_clients_at_once(selector_server):
+    """Many open connections from one thread, answered in any order"""
+    _, port = selector_server()
+    clients = [connect(port) for _ in range(50)]
+    try:
+        for i, sock in reversed(list(enumerate(clients))):
+            sock.sendall(f'client {i}'.encode())
+        for i, sock in enumerate(clients):
+            assert receive_exactly(sock, len(echo_of(f'client {i}'))) == echo_of(f'client {i}')
+    finally:
+        for sock in clients:
+            sock.close()
+
+
+def test_selector_bad_utf8_closes_only_that_client(selector_server):
+    """Undecodable input drops that connection; the loop goes on serving the rest"""
+    _, port = selector_server()
+    with connect(port) as good, connect(port) as bad:
+        bad.sendall(b'\xff\xfe')
+        assert bad.recv(100) == b''
+        good.sendall(b'still here')
+        assert receive_exactly(good, len(echo_of('still here'))) == echo_of('still here')
+
+
+def test_selector_framed(selector_server):
+    """Frames run together or split up come back whole, binary ones unchanged"""
+    _, port = selector_server(framed=True)
+    sock, decoder = connect(port, framed=True)
+    with sock:
+        payload = os.urandom(200_000)
+        frames = encode_frame(b'hi', TEXT) + encode_frame(payload, BINARY)
+        for i in range(0, len(frames), 997):
+            sock.sendall(frames[i:i + 997])
+        assert receive_frame(sock, decoder) == (TEXT, echo_of('hi'))
+        msg_type, echoed = receive_frame(sock, decoder)
+        assert (msg_type, bytes(echoed)) == (BINARY, payload)
+
+        send_frames(sock, [(TEXT, b'quit')])
+        assert receive_frame(sock, decoder) == (TEXT, echo_of('quit'))
+        assert receive_frame(sock, decoder) is None
+
+
+def test_selector_client_not_reading(selector_server):
+    """A client that sends a lot before reading still gets every echo"""
+    _, port = selector_server(framed=True)
+    sock, decoder = connect(port, framed=True)
+    with sock:
+        payload = os.urandom(64 * 1024)
+        count = 64  # 4 MiB: more than the socket buffers hold, both ways
+        sender = threading.Thread(target=send_frames, args=(sock, [(BINARY, payload)] * count))
+        sender.start()
+        for _ in range(count):
+            msg_type, echoed = receive_frame(sock, decoder)
+            assert (msg_type, echoed) == (BINARY, payload)
+        sender.join()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'SO_REUSEPORT'), reason='needs SO_REUSEPORT')
+def test_multi_mode():
+    """Two event loop processes share one port; SIGTERM stops them all"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT, '--mode', 'multi', '--workers', '2', '--quiet',
+         '--host', '127.0.0.1', '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port)).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        clients = [connect(port) for _ in range(20)]
+        for i, sock in enumerate(clients):
+            sock.sendall(f'client {i}'.encode())
+        for i, sock in enumerate(clients):
+            assert receive_exactly(sock, len(echo_of(f'client {i}'))) == echo_of(f'client {i}')
+            sock.close()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        _, errors = server.communicate(timeout=10)
+    assert server.returncode == 0, errors
+    with pytest.raises(OSError):
+        socket.create_connection(('127.0.0.1', port), timeout=1)
+
+
+# ============================================================================
+# THREADS MODE: WORKER POOL
+# ============================================================================
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def worker_pool():
+    """
+    start(**options) makes a WorkerPoolServer with running workers and
+    returns (server, admit). The test accepts connections itself:
+    admit() connects a client and returns (client socket, the server's
+    socket for it, address), ready for server.enqueue().
+    """
+    servers = []
+
+    def start(**options):
+        server_socket = create_server_socket('127.0.0.1', 0)
+        server = WorkerPoolServer(server_socket, **options)
+        for worker in server.workers:
+            worker.start()
+        servers.append(server)
+
+        def admit():
+            client = socket.create_connection(server_socket.getsockname(), timeout=5)
+            return (client, *server_socket.accept())
+
+        return server, admit
+
+    yield start
+    for server in servers:
+        if not server.stopping.is_set():
+            server.drain(timeout=0)
+
+
+def serve(server, admit):
+    """Admit a client and wait until a worker has sent it the welcome"""
+    client, connection, address = admit()
+    server.enqueue(connection, address)
+    welcome = encode_frame(WELCOME, TEXT) if server.framed else WELCOME
+    assert receive_exactly(client, len(welcome)) == welcome
+    return client
+
+
+@pytest.mark.parametrize('framed', [False, True])
+def test_pool_refuses_when_queue_full(worker_pool, framed):
+    """With --overflow refuse, a client past the queue is told "busy" and closed"""
+    server, admit = worker_pool(framed=framed, threads=1, queue_size=1, overflow='refuse')
+    client = serve(server, admit)
+    queued, connection, address = admit()
+    server.enqueue(connection, address)
+    refused, connection, address = admit()
+    server.enqueue(connection, address)
+
+    expected = encode_frame(BUSY_MESSAGE, TEXT) if framed else BUSY_MESSAGE
+    assert receive_exactly(refused, 100) == expected
+    assert (server.stats.refused, server.queue.qsize()) == (1, 1)
+    for sock in (client, queued, refused):
+        sock.close()
+
+
+def test_pool_delays_when_queue_full(worker_pool):
+    """With --overflow delay, accepting waits until a worker is free"""
+    server, admit = worker_pool(threads=1, queue_size=1, overflow='delay')
+    first = serve(server, admit)
+    second, connection, address = admit()
+    server.enqueue(connection, address)
+    third, connection, address = admit()
+    accepting = threading.Thread(target=server.enqueue, args=(connection, address))
+    accepting.start()
+    accepting.join(0.2)
+    assert accepting.is_alive()  # blocked: the queue is full
+
+    first.sendall(b'quit')
+    assert receive_exactly(first, 100) == echo_of('quit')
+    accepting.join(5)
+    assert not accepting.is_alive()
+    assert receive_exactly(second, len(WELCOME)) == WELCOME
+    second.sendall(b'quit')
+    assert receive_exactly(second, 100) == echo_of('quit')
+    assert receive_exactly(third, len(WELCOME)) == WELCOME
+    assert server.stats.refused == 0
+    for sock in (first, second, third):
+        sock.close()
+
+
+def test_pool_idle_timeout(worker_pool):
+    """A silent client is dropped after idle_timeout, freeing its worker"""
+    server, admit = worker_pool(threads=1, idle_timeout=0.2)
+    client = serve(server, admit)
+    client.sendall(b'hello')
+    assert receive_exactly(client, len(echo_of('hello'))) == echo_of('hello')
+    started = time.monotonic()
+    assert client.recv(100) == b''
+    assert time.monotonic() - started >= 0.15
+    wait_until(lambda: server.stats.active == 0)
+    assert server.stats.timed_out == 1
+    client.close()
+
+    next_client = serve(server, admit)  # the worker is free again
+    next_client.close()
+
+
+def test_pool_drain_lets_open_connections_finish(worker_pool):
+    """On shutdown queued clients are turned away; open ones may finish"""
+    server, admit = worker_pool(threads=1, queue_size=4)
+    active = serve(server, admit)
+    queued, connection, address = admit()
+    server.enqueue(connection, address)
+
+    draining = threading.Thread(target=server.drain, args=(5,))
+    draining.start()
+    assert receive_exactly(queued, 100) == SHUTDOWN_MESSAGE
+    active.sendall(b'last words')
+    assert receive_exactly(active, len(echo_of('last words'))) == echo_of('last words')
+    active.sendall(b'quit')
+    assert receive_exactly(active, 100) == echo_of('quit')
+    draining.join(2)
+    assert not draining.is_alive()
+    assert (server.stats.refused, server.stats.active) == (1, 0)
+    for sock in (active, queued):
+        sock.close()
+
+
+def test_pool_drain_cuts_off_after_timeout(worker_pool):
+    """Connections still open when the drain timeout runs out are disconnected"""
+    server, admit = worker_pool(threads=2)
+    clients = [serve(server, admit) for _ in range(2)]
+    started = time.monotonic()
+    server.drain(timeout=0.3)
+    assert 0.25 <= time.monotonic() - started < 2
+    for client in clients:
+        assert client.recv(100) == b''
+        client.close()
+    assert server.stats.active == 0
+    assert not any(worker.is_alive() for worker in server.workers)
@@ -5,15 +5,26 @@ UDP Socket Example (Server and Client)
 Demonstrates UDP: connectionless, fast, unreliable delivery.
 Run with --server or --client flag.
 
+With --reliable, the client streams messages to the server through the
+reliability layer in reliable_udp.py (sequence numbers, selective ACKs,
+a sliding window and retransmission), and every message arrives exactly
+once and in order. --loss and --delay put a simulated bad network
+between the two.
+
 Usage:
     python udp_example.py --server    # Start server
     python udp_example.py --client    # Start client
+    
+    python udp_example.py --server --reliable
+    python udp_example.py --client --reliable --count 1000 --loss 0.1 --delay 0.02
 """
 
+import argparse
 import socket
-import sys
 import time
 
+from reliable_udp import MAX_PAYLOAD, MAX_WINDOW, LossyLink, ReliableReceiver, ReliableSender
+
 def run_server():
     """UDP Server - Listen for datagrams."""
     HOST = 'localhost'
@@ -105,24 +116,140 @@ def run_client():
         client_socket.close()
 
 
+def run_reliable_server(port=9001, quiet=False):
+    """Reliable UDP Server - Print each client's messages, in order."""
+    HOST = 'localhost'
+    
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server_socket.bind((HOST, port))
+    receiver = ReliableReceiver(server_socket)
+    
+    address = f"{HOST}:{port}"
+    print(f"""
+    ╔════════════════════════════════════════════╗
+    ║   📨 Reliable UDP Server Started!         ║
+    ╠════════════════════════════════════════════╣
+    ║   Listening on: {address:<27}║
+    ║   Press Ctrl+C to stop                     ║
+    ╚════════════════════════════════════════════╝
+    """)
+    
+    started = {}  # client address -> time of its first message
+    try:
+        while True:
+            address, data = receiver.receive()
+            started.setdefault(address, time.perf_counter())
+            
+            if data is not None:
+                if not quiet:
+                    print(f"📨 Received from {address}: {data.decode('utf-8').strip()}")
+                continue
+            
+            # The client closed its stream: everything it sent has arrived
+            stream = receiver.streams[address]
+            elapsed = time.perf_counter() - started.pop(address)
+            print(f"✅ {address}: {stream.messages} messages in order in {elapsed:.2f}s, "
+                  f"{stream.duplicates} duplicates dropped")
+    
+    except KeyboardInterrupt:
+        print("\n\n✅ Server stopped. Goodbye!")
+    finally:
+        server_socket.close()
+
+
+def run_reliable_client(port=9001, count=10, window=64, size=0,
+                        loss=0.0, delay=0.0, jitter=0.0):
+    """Reliable UDP Client - Stream messages that are resent until acknowledged."""
+    HOST = 'localhost'
+    
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    
+    # Optionally send through a simulated bad network
+    link = None
+    target = (HOST, port)
+    route = f"{HOST}:{port}"
+    if loss or delay or jitter:
+        link = LossyLink(target, loss=loss, delay=delay, jitter=jitter).start()
+        target = link.address
+        route = f"{loss:.0%} loss, {delay * 1000:.0f} ms delay"
+    
+    print(f"""
+    ╔════════════════════════════════════════════╗
+    ║   📤 Reliable UDP Client Started!         ║
+    ╠════════════════════════════════════════════╣
+    ║   Sending to: {route:<29}║
+    ║   Window: {window:<33}║
+    ╚════════════════════════════════════════════╝
+    """)
+    
+    sender = ReliableSender(client_socket, target, window)
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            message = f"Hello from UDP client! (Message #{i+1})".ljust(size)
+            sender.send(message.encode('utf-8'))
+            if count <= 20:
+                print(f"📤 Sent: {message.strip()}")
+        
+        # Returns once the server has acknowledged everything
+        sender.close()
+        elapsed = time.perf_counter() - start
+        
+        resent = sender.fast_retransmits + sender.timeout_retransmits
+        print(f"\n✅ {count} messages delivered in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
+        print(f"   {sender.sent} datagrams sent, {resent} of them resent "
+              f"({sender.fast_retransmits} after later ones arrived, "
+              f"{sender.timeout_retransmits} after a timeout)")
+        if sender.rtt.srtt is not None:
+            print(f"   Round trip {sender.rtt.srtt * 1000:.1f} ms, "
+                  f"retransmission timeout {sender.rtt.rto * 1000:.0f} ms")
+    
+    except ConnectionError as e:
+        print(f"❌ {e} (is the server running with --reliable?)")
+    
+    finally:
+        client_socket.close()
+        if link is not None:
+            link.close()
+
+
 def main():
     """Main entry point."""
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python udp_example.py --server")
-        print("  python udp_example.py --client")
-        sys.exit(1)
-    
-    mode = sys.argv[1]
+    parser = argparse.ArgumentParser(description='UDP client/server example')
+    role = parser.add_mutually_exclusive_group(required=True)
+    role.add_argument('--server', action='store_true', help='Start server')
+    role.add_argument('--client', action='store_true', help='Start client')
+    parser.add_argument('--reliable', action='store_true',
+                        help='Sequence numbers, ACKs and retransmission (see reliable_udp.py)')
+    parser.add_argument('--port', type=int, default=9001, help='Server port (--reliable)')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Server: do not print every message (--reliable)')
+    parser.add_argument('--count', type=int, default=10, help='Messages to send (--reliable)')
+    parser.add_argument('--size', type=int, default=0,
+                        help='Pad messages to this many bytes (--reliable)')
+    parser.add_argument('--window', type=int, default=64,
+                        help='Messages in flight at once (--reliable)')
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help='Simulated loss rate, 0 to 1, each way (--reliable)')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='Simulated one-way delay in seconds (--reliable)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Up to this many extra seconds of delay, reorders (--reliable)')
+    args = parser.parse_args()
+    if not 0 <= args.size <= MAX_PAYLOAD:
+        parser.error(f'--size must be between 0 and {MAX_PAYLOAD} bytes')
+    if not 1 <= args.window <= MAX_WINDOW:
+        parser.error(f'--window must be between 1 and {MAX_WINDOW}')
     
-    if mode == '--server':
+    if args.server and args.reliable:
+        run_reliable_server(args.port, args.quiet)
+    elif args.server:
         run_server()
-    elif mode == '--client':
-        run_client()
+    elif args.reliable:
+        run_reliable_client(args.port, args.count, args.window, args.size,
+                            args.loss, args.delay, args.jitter)
     else:
-        print(f"Unknown mode: {mode}")
-        print("Use --server or --client")
-        sys.exit(1)
+        run_client()
 
 
 if __name__ == '__main__':
@@ -10,16 +10,29 @@ Features:
 - Input Validation
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 from functools import wraps
 import sqlite3
 import jwt
 import datetime
 import hashlib
-import os
+import json
+import base64
+from urllib.parse import urlencode
 from collections import defaultdict
 import time
+import math
+
+from db_pool import ConnectionPool
+from rate_limiter import SlidingWindowRateLimiter
+from token_cache import TokenCache
+from response_cache import ResponseCache, make_backend
+from export_stream import ExportEncoder, FORMATS as EXPORT_FORMATS
+import kdf_pool as kdf
+from kdf_pool import KDFPool, KDFPoolBusy
+from metrics import (Counter, Gauge, Histogram, Summary, TimedConnection,
+                     query_timer, registry as metrics_registry)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -30,22 +43,102 @@ CORS(app)  # Enable CORS for all routes
 SECRET_KEY = 'your-secret-key-change-in-production'
 DATABASE = 'practice_api.db'
 TOKEN_EXPIRY = 24  # hours
+KDF_ITERATIONS = 600_000  # PBKDF2-SHA256 rounds for new password hashes
+KDF_POOL_ENABLED = True  # Hash passwords in worker processes
+KDF_WORKERS = 2  # Worker processes for password hashing
+KDF_MAX_PENDING = 16  # Hashing jobs queued or running before 503s
+TOKEN_CACHE_ENABLED = True  # Skip re-verifying tokens seen recently
+TOKEN_CACHE_SIZE = 1024  # Verified tokens remembered
 RATE_LIMIT = 100  # requests per minute per IP
+RATE_LIMIT_ENABLED = True  # Enforce RATE_LIMIT on every request
+DB_POOL_ENABLED = True  # Reuse connections across requests
+DB_POOL_SIZE = 8  # Idle connections kept open
+EMBED_OPTIONS = {'comments', 'comment_count'}  # Allowed ?embed= values
+MAX_EMBEDDED_COMMENTS = 20  # Upper bound for ?comments_limit=
+MAX_BULK_ITEMS = 500  # Items accepted by one bulk create request
+SEARCH_TYPES = {'posts', 'comments'}  # Allowed ?type= values for /api/search
+MAX_SEARCH_LENGTH = 200  # Longest accepted ?q= for /api/search
+EXPORT_BATCH_SIZE = 500  # Rows read and sent at a time by /api/posts/export
+RESPONSE_CACHE_ENABLED = True  # Cache public GET responses
+RESPONSE_CACHE_TTL = 30  # seconds
+RESPONSE_CACHE_SIZE = 1024  # Entries kept by the in-process cache
+# Set to e.g. 'redis://localhost:6379/0' so several worker processes share
+# one cache (needs `pip install redis` and a Redis-compatible server)
+RESPONSE_CACHE_URL = None
+METRICS_ENABLED = True  # Record request metrics and serve them at /metrics
+
+# Rate limiting state: a few counters per client IP, see rate_limiter.py
+rate_limiter = SlidingWindowRateLimiter(RATE_LIMIT, window=60)
+
+# Worker processes that run password hashing, see kdf_pool.py
+kdf_pool = KDFPool(workers=KDF_WORKERS, max_pending=KDF_MAX_PENDING)
+
+# Decoded payloads of recently verified JWTs, see token_cache.py
+token_cache = TokenCache(max_size=TOKEN_CACHE_SIZE)
+
+# Cached responses of the public read endpoints, see response_cache.py
+response_cache = ResponseCache(
+    make_backend(RESPONSE_CACHE_URL, max_entries=RESPONSE_CACHE_SIZE),
+    ttl=RESPONSE_CACHE_TTL,
+    enabled=RESPONSE_CACHE_ENABLED
+)
+
+
+# Database connection pool (created lazily, see get_pool)
+db_pool = None
 
-# Rate limiting storage
-rate_limit_storage = defaultdict(list)
+
+def get_pool():
+    """Get the connection pool for the configured database"""
+    global db_pool
+    # Timed connections report their query time to the request metrics
+    factory = TimedConnection if METRICS_ENABLED else sqlite3.Connection
+    if (db_pool is None or db_pool.database != DATABASE
+            or db_pool.size != DB_POOL_SIZE or db_pool.factory is not factory):
+        if db_pool is not None:
+            db_pool.close()
+        db_pool = ConnectionPool(DATABASE, size=DB_POOL_SIZE, factory=factory)
+    return db_pool
 
 
 def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-    return conn
+    """
+    Get the database connection for the current request.
+
+    The connection is stored on Flask's `g`, so every call during one
+    request returns the same connection. It is handed back to the pool
+    (or closed, when pooling is disabled) by close_db() on teardown.
+    """
+    if 'db' not in g:
+        g.db = acquire_db()
+    return g.db
+
+
+def acquire_db():
+    """Borrow a connection from the pool (or open one if pooling is off)"""
+    pool = get_pool()
+    return pool.acquire() if DB_POOL_ENABLED else pool.connect()
+
+
+def release_db(conn):
+    """Give back a connection from acquire_db()"""
+    if DB_POOL_ENABLED:
+        get_pool().release(conn)
+    else:
+        conn.close()
+
+
+@app.teardown_appcontext
+def close_db(exception):
+    """Release the request's database connection"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        release_db(conn)
 
 
 def init_db():
     """Initialize database with schema"""
-    conn = get_db()
+    conn = get_pool().connect()
     cursor = conn.cursor()
     
     # Users table
@@ -86,23 +179,210 @@ def init_db():
     ''')
     
     conn.commit()
+    
+    migrate_db(conn)
     conn.close()
 
 
+def bump_version_sql(key_sql):
+    """SQL that increments a resource_versions counter (used in triggers)"""
+    return f'''
+        INSERT INTO resource_versions (key, version) VALUES ({key_sql}, 1)
+        ON CONFLICT (key) DO UPDATE SET version = version + 1;
+    '''
+
+
+# Schema migrations, applied in order by migrate_db(). Each entry is a list
+# of SQL statements. The database remembers how many have been applied in
+# PRAGMA user_version, so every migration runs exactly once per database.
+# Never edit a migration that has shipped - append a new one instead.
+MIGRATIONS = [
+    # 1: Indexes for the hot queries
+    [
+        # Listing posts: ORDER BY created_at, id and keyset pagination
+        '''CREATE INDEX IF NOT EXISTS idx_posts_created_at_id
+           ON posts (created_at, id)''',
+        # Filtering posts by author, already in created_at order
+        '''CREATE INDEX IF NOT EXISTS idx_posts_author_created
+           ON posts (author_id, created_at, id)''',
+        # Comments for a post in created_at order
+        '''CREATE INDEX IF NOT EXISTS idx_comments_post_created
+           ON comments (post_id, created_at, id, author_id)''',
+    ],
+    # 2: Version counters for cheap ETags. Triggers bump a counter whenever
+    # the data behind a read endpoint changes:
+    #   'posts'             any post (the listing)
+    #   'post:<id>'         one post
+    #   'comments'          any comment (listings that embed comments)
+    #   'comments:<id>'     the comments of one post
+    [
+        '''CREATE TABLE IF NOT EXISTS resource_versions (
+               key TEXT PRIMARY KEY,
+               version INTEGER NOT NULL
+           ) WITHOUT ROWID''',
+        '''INSERT OR IGNORE INTO resource_versions (key, version)
+           VALUES ('posts', 1), ('comments', 1)''',
+        '''INSERT OR IGNORE INTO resource_versions (key, version)
+           SELECT 'post:' || id, 1 FROM posts''',
+        '''INSERT OR IGNORE INTO resource_versions (key, version)
+           SELECT DISTINCT 'comments:' || post_id, 1 FROM comments''',
+        f'''CREATE TRIGGER IF NOT EXISTS posts_version_insert
+            AFTER INSERT ON posts BEGIN
+                {bump_version_sql("'posts'")}
+                {bump_version_sql("'post:' || NEW.id")}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS posts_version_update
+            AFTER UPDATE ON posts BEGIN
+                {bump_version_sql("'posts'")}
+                {bump_version_sql("'post:' || NEW.id")}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS posts_version_delete
+            AFTER DELETE ON posts BEGIN
+                {bump_version_sql("'posts'")}
+                DELETE FROM resource_versions
+                WHERE key IN ('post:' || OLD.id, 'comments:' || OLD.id);
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS comments_version_insert
+            AFTER INSERT ON comments BEGIN
+                {bump_version_sql("'comments'")}
+                {bump_version_sql("'comments:' || NEW.post_id")}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS comments_version_update
+            AFTER UPDATE ON comments BEGIN
+                {bump_version_sql("'comments'")}
+                {bump_version_sql("'comments:' || NEW.post_id")}
+            END''',
+        f'''CREATE TRIGGER IF NOT EXISTS comments_version_delete
+            AFTER DELETE ON comments BEGIN
+                {bump_version_sql("'comments'")}
+                {bump_version_sql("'comments:' || OLD.post_id")}
+            END''',
+    ],
+    # 3: Full-text search. External-content FTS5 tables index the text of
+    # posts and comments without storing a second copy of it; triggers
+    # keep the index in step with every write, and 'rebuild' indexes the
+    # rows that already exist.
+    [
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+               title, content,
+               content='posts', content_rowid='id',
+               tokenize='porter unicode61'
+           )''',
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+               content,
+               content='comments', content_rowid='id',
+               tokenize='porter unicode61'
+           )''',
+        '''CREATE TRIGGER IF NOT EXISTS posts_fts_insert
+           AFTER INSERT ON posts BEGIN
+               INSERT INTO posts_fts (rowid, title, content)
+               VALUES (NEW.id, NEW.title, NEW.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS posts_fts_update
+           AFTER UPDATE OF title, content ON posts BEGIN
+               INSERT INTO posts_fts (posts_fts, rowid, title, content)
+               VALUES ('delete', OLD.id, OLD.title, OLD.content);
+               INSERT INTO posts_fts (rowid, title, content)
+               VALUES (NEW.id, NEW.title, NEW.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS posts_fts_delete
+           AFTER DELETE ON posts BEGIN
+               INSERT INTO posts_fts (posts_fts, rowid, title, content)
+               VALUES ('delete', OLD.id, OLD.title, OLD.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS comments_fts_insert
+           AFTER INSERT ON comments BEGIN
+               INSERT INTO comments_fts (rowid, content)
+               VALUES (NEW.id, NEW.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS comments_fts_update
+           AFTER UPDATE OF content ON comments BEGIN
+               INSERT INTO comments_fts (comments_fts, rowid, content)
+               VALUES ('delete', OLD.id, OLD.content);
+               INSERT INTO comments_fts (rowid, content)
+               VALUES (NEW.id, NEW.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS comments_fts_delete
+           AFTER DELETE ON comments BEGIN
+               INSERT INTO comments_fts (comments_fts, rowid, content)
+               VALUES ('delete', OLD.id, OLD.content);
+           END''',
+        "INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')",
+        "INSERT INTO comments_fts (comments_fts) VALUES ('rebuild')",
+    ],
+]
+
+
+def migrate_db(conn):
+    """
+    Apply any migrations this database hasn't seen yet.
+    
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed migration leaves the schema untouched.
+    Returns the number of migrations applied.
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    pending = MIGRATIONS[version:]
+    
+    for number, statements in enumerate(pending, start=version + 1):
+        try:
+            conn.execute('BEGIN')
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    
+    if pending:
+        # Refresh the query planner's statistics for the new indexes. FTS5
+        # tables and their shadow tables (named <table>_data, <table>_idx,
+        # ...) are skipped: statistics taken while they are nearly empty
+        # make FTS5's own queries slower as they grow. sqlite_master rather
+        # than PRAGMA table_list, which needs SQLite 3.37+.
+        tables = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table'"
+        ).fetchall()
+        virtual = [row[0] for row in tables if row[1].upper().startswith('CREATE VIRTUAL')]
+        for row in tables:
+            name = row[0]
+            if name.startswith('sqlite_') or any(
+                    name == table or name.startswith(table + '_') for table in virtual):
+                continue
+            conn.execute(f'ANALYZE "{name}"')
+        conn.commit()
+    
+    return len(pending)
+
+
+def run_kdf(fn, *args):
+    """
+    Run a password hashing function in the KDF worker pool
+    
+    Raises KDFPoolBusy (a 503 response, see server_busy()) when
+    KDF_MAX_PENDING jobs are already queued or running.
+    """
+    if not KDF_POOL_ENABLED:
+        return fn(*args)
+    return kdf_pool.run(fn, *args)
+
+
 def hash_password(password):
     """
-    Hash a password using SHA-256
+    Hash a password with salted PBKDF2-SHA256
     
     NOTE: For educational purposes only!
-    In production, use bcrypt, scrypt, or Argon2 with proper salting.
-    SHA-256 alone is vulnerable to rainbow table attacks.
+    In production, prefer a memory-hard KDF such as scrypt or Argon2.
+    Older accounts may still have plain SHA-256 hashes; they are
+    upgraded on their next login.
     """
-    return hashlib.sha256(password.encode()).hexdigest()
+    return run_kdf(kdf.hash_password, password, KDF_ITERATIONS)
 
 
 def verify_password(password, password_hash):
     """Verify a password against its hash"""
-    return hash_password(password) == password_hash
+    return run_kdf(kdf.verify_password, password, password_hash)
 
 
 def generate_token(user_id, username):
@@ -116,39 +396,721 @@ def generate_token(user_id, username):
 
 
 def decode_token(token):
-    """Decode and verify JWT token"""
+    """
+    Decode and verify JWT token
+    
+    Verified payloads are cached until the token expires, so a client
+    sending the same token on every request only pays for verification once.
+    """
+    if TOKEN_CACHE_ENABLED:
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    if TOKEN_CACHE_ENABLED:
+        token_cache.put(token, payload)
+    return payload
+
+
+def encode_cursor(*position):
+    """Encode a position such as (created_at, id) as an opaque pagination cursor"""
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types=(str, int)):
+    """
+    Decode a cursor made by encode_cursor(), returns None if it is invalid
+    
+    types lists the expected type of each value in the position.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        return None
+    
+    if not isinstance(position, list) or len(position) != len(types):
+        return None
+    if not all(type(value) is expected for value, expected in zip(position, types)):
+        return None
+    return tuple(position)
+
+
+def validate_post_data(data):
+    """Check a post payload, returns an error dict or None"""
+    if not isinstance(data, dict) or not all(k in data for k in ['title', 'content']):
+        return {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Title and content are required'
+        }
+    
+    if not isinstance(data['title'], str) or not isinstance(data['content'], str):
+        return {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Title and content must be strings'
+        }
+    
+    if len(data['title']) < 3:
+        return {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Title must be at least 3 characters'
+        }
+    
+    return None
+
+
+def validate_comment_data(data):
+    """Check a comment payload, returns an error dict or None"""
+    if not isinstance(data, dict) or 'content' not in data:
+        return {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Content is required'
+        }
+    
+    if not isinstance(data['content'], str):
+        return {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Content must be a string'
+        }
+    
+    return None
+
+
+def parse_bulk_items(data):
+    """
+    Check the body of a bulk create request
+    
+    Returns (items, error) where error is an error dict or None.
+    """
+    if not isinstance(data, list) or not data:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Request body must be a non-empty JSON array'
+        }
+    
+    if len(data) > MAX_BULK_ITEMS:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': f'At most {MAX_BULK_ITEMS} items can be created at once'
+        }
+    
+    return data, None
+
+
+def insert_many(cursor, sql, rows):
+    """
+    Insert rows with a single executemany() and return their new ids
+    
+    AUTOINCREMENT hands out ids one after another, and the open write
+    transaction stops other connections inserting in between, so the batch
+    gets a contiguous id range ending at last_insert_rowid().
+    """
+    cursor.executemany(sql, rows)
+    last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+def bulk_result(results):
+    """
+    Build the body and status code for a bulk create request
+    
+    201 if every item was created, 400 if none were, 207 (Multi-Status)
+    for a mix. Each result carries its own status code.
+    """
+    created = sum(1 for result in results if result['status'] == 201)
+    failed = len(results) - created
+    
+    if failed == 0:
+        status = 201
+    elif created == 0:
+        status = 400
+    else:
+        status = 207
+    
+    return {
+        'results': results,
+        'meta': {
+            'created': created,
+            'failed': failed
+        }
+    }, status
+
+
+def check_etag(cursor, keys):
+    """
+    Build a weak ETag from resource_versions and check If-None-Match
+    
+    This only reads a few version counters, so a client that already has
+    the current data gets its 304 without the real query ever running.
+    The ETag also covers the query string, since e.g. ?page=2 is
+    different data under the same version.
+    
+    keys[0] is the resource itself. If it has no counter (it doesn't
+    exist) returns (None, None) and the handler carries on to its 404.
+    Otherwise returns (etag, response), where response is a ready-made
+    304 if the client's copy is current, or None.
+    """
+    placeholders = ','.join('?' * len(keys))
+    cursor.execute(
+        f'SELECT key, version FROM resource_versions WHERE key IN ({placeholders})',
+        keys
+    )
+    versions = {row['key']: row['version'] for row in cursor.fetchall()}
+    if keys[0] not in versions:
+        return None, None
+    
+    args = urlencode(sorted(request.args.items(multi=True)))
+    args_digest = hashlib.blake2b(args.encode(), digest_size=6).hexdigest()
+    etag = '-'.join(str(versions.get(key, 0)) for key in keys) + '-' + args_digest
+    
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+        return etag, response
+    
+    return etag, None
+
+
+def with_etag(response, etag):
+    """Attach a weak ETag (if there is one) to a response"""
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def parse_embed_args(args):
+    """
+    Parse the ?embed= and ?comments_limit= query parameters
+    
+    Returns (embed, comments_limit, error). embed is a set of the related
+    data to include; error is an error dict or None. comments_limit is
+    only checked (and only set) when comments are embedded.
+    """
+    embed = {value.strip() for value in args.get('embed', '').split(',')
+             if value.strip()}
+    unknown = embed - EMBED_OPTIONS
+    if unknown:
+        return None, None, {
+            'code': 'VALIDATION_ERROR',
+            'message': f"Unknown embed option: {', '.join(sorted(unknown))}",
+            'details': f"Allowed: {', '.join(sorted(EMBED_OPTIONS))}"
+        }
+    
+    if 'comments' not in embed:
+        return embed, None, None
+    
+    try:
+        comments_limit = int(args.get('comments_limit', 3))
+    except ValueError:
+        comments_limit = 0
+    if comments_limit < 1 or comments_limit > MAX_EMBEDDED_COMMENTS:
+        return None, None, {
+            'code': 'VALIDATION_ERROR',
+            'message': f'comments_limit must be between 1 and {MAX_EMBEDDED_COMMENTS}'
+        }
+    
+    return embed, comments_limit, None
+
+
+def embed_queries(post_ids, embed, comments_limit):
+    """
+    The queries that load embedded data for a page of posts
+    
+    One query per kind of embedded data for the whole page, instead of one
+    query per post. Returns a list of (kind, sql, params); feed each kind's
+    rows to apply_embed().
+    """
+    if not post_ids or not embed:
+        return []
+    
+    placeholders = ','.join('?' * len(post_ids))
+    queries = []
+    
+    if 'comment_count' in embed:
+        queries.append(('comment_count', f'''
+            SELECT post_id, COUNT(*) as count
+            FROM comments
+            WHERE post_id IN ({placeholders})
+            GROUP BY post_id
+        ''', list(post_ids)))
+    
+    if 'comments' in embed:
+        # ROW_NUMBER() numbers each post's comments separately, so one
+        # query can return "the first N comments" for every post
+        queries.append(('comments', f'''
+            SELECT id, post_id, author, content, created_at FROM (
+                SELECT c.id, c.post_id, u.username as author, c.content, c.created_at,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY c.post_id ORDER BY c.created_at, c.id
+                       ) as position
+                FROM comments c
+                JOIN users u ON c.author_id = u.id
+                WHERE c.post_id IN ({placeholders})
+            )
+            WHERE position <= ?
+            ORDER BY post_id, position
+        ''', list(post_ids) + [comments_limit]))
+    
+    return queries
+
+
+def apply_embed(posts, kind, rows):
+    """Group the rows of an embed query by post_id onto the post dicts"""
+    if kind == 'comment_count':
+        counts = {row['post_id']: row['count'] for row in rows}
+        for post in posts:
+            post['comment_count'] = counts.get(post['id'], 0)
+    elif kind == 'comments':
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row['post_id']].append(dict(row))
+        for post in posts:
+            post['comments'] = grouped.get(post['id'], [])
+
+
+def embed_related(cursor, posts, embed, comments_limit):
+    """Add comment counts and/or the first comments to each post dict"""
+    post_ids = [post['id'] for post in posts]
+    for kind, sql, params in embed_queries(post_ids, embed, comments_limit):
+        cursor.execute(sql, params)
+        apply_embed(posts, kind, cursor.fetchall())
+
+
+def parse_posts_args(args):
+    """
+    Validate the query parameters of GET /api/posts
+    
+    args is any mapping with .get() (Flask's request.args, or another
+    framework's query parameters). Returns (options, error) where options
+    is a dict and error is an error dict or None.
+    """
+    try:
+        page = int(args.get('page', 1))
+        limit = int(args.get('limit', 10))
+    except (ValueError, TypeError):
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Page and limit must be valid integers'
+        }
+    
+    # Validate ranges
+    if page < 1:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Page must be greater than 0'
+        }
+    
+    if limit < 1 or limit > 100:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Limit must be between 1 and 100'
+        }
+    
+    embed, comments_limit, error = parse_embed_args(args)
+    if error:
+        return None, error
+    
+    include_total = args.get('include_total', 'true').lower()
+    if include_total not in ('true', 'false'):
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'include_total must be true or false'
+        }
+    
+    # Keyset pagination is opt-in: an empty cursor means "first page"
+    keyset = args.get('cursor') is not None
+    position = None
+    if keyset and args.get('cursor'):
+        position = decode_cursor(args.get('cursor'))
+        if position is None:
+            return None, {
+                'code': 'VALIDATION_ERROR',
+                'message': 'Invalid cursor'
+            }
+    
+    return {
+        'page': page,
+        'limit': limit,
+        'author': args.get('author'),
+        'include_total': include_total == 'true',
+        'keyset': keyset,
+        'position': position,
+        'embed': embed,
+        'comments_limit': comments_limit
+    }, None
+
+
+def posts_count_query(options):
+    """The COUNT(*) query for GET /api/posts, as (sql, params)"""
+    if options['author']:
+        return '''
+            SELECT COUNT(*) as count FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE u.username = ?
+        ''', (options['author'],)
+    return 'SELECT COUNT(*) as count FROM posts', ()
+
+
+def posts_page_query(options):
+    """The query for one page of GET /api/posts, as (sql, params)"""
+    conditions = []
+    params = []
+    if options['author']:
+        conditions.append('u.username = ?')
+        params.append(options['author'])
+    if options['position']:
+        # Row-value comparison lets SQLite seek the (created_at, id) index
+        conditions.append('(p.created_at, p.id) < (?, ?)')
+        params.extend(options['position'])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    if options['keyset']:
+        # Fetch one extra row to find out whether there is a next page
+        params.extend([options['limit'] + 1, 0])
+    else:
+        params.extend([options['limit'], (options['page'] - 1) * options['limit']])
+    
+    return f'''
+        SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        {where}
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT ? OFFSET ?
+    ''', params
+
+
+def posts_page_result(posts, total, options):
+    """Build the GET /api/posts body from the rows of posts_page_query()"""
+    limit = options['limit']
+    meta = {'limit': limit}
+    if options['include_total']:
+        meta['total'] = total
+    
+    if options['keyset']:
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            last = posts[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+        meta['next_cursor'] = next_cursor
+    else:
+        meta['page'] = options['page']
+    
+    return {
+        'data': posts,
+        'meta': meta
+    }
+
+
+def export_query(author=None):
+    """The query behind GET /api/posts/export, as (sql, params)"""
+    # (created_at, id) order comes straight from an index, so SQLite
+    # streams rows without sorting the whole table first
+    if author:
+        return '''
+            SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE u.username = ?
+            ORDER BY p.created_at, p.id
+        ''', (author,)
+    return '''
+        SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        ORDER BY p.created_at, p.id
+    ''', ()
+
+
+def fts_query(text):
+    """
+    Turn user input into an FTS5 query that matches all of its words
+    
+    Every word is quoted, so FTS5 operators and punctuation in the input
+    are searched for as text instead of being parsed as query syntax (and
+    can't cause a syntax error). A trailing * is kept as a prefix search.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*') and len(word) > 1
+        word = word.rstrip('*') if prefix else word
+        terms.append('"' + word.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def parse_search_args(args):
+    """
+    Validate the query parameters of GET /api/search
+    
+    Returns (options, error) like parse_posts_args().
+    """
+    text = args.get('q', '').strip()
+    if not text:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'q is required'
+        }
+    
+    if len(text) > MAX_SEARCH_LENGTH:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': f'q must be at most {MAX_SEARCH_LENGTH} characters'
+        }
+    
+    try:
+        limit = int(args.get('limit', 10))
+    except (ValueError, TypeError):
+        limit = 0
+    if limit < 1 or limit > 100:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'Limit must be between 1 and 100'
+        }
+    
+    types = {value.strip() for value in args.get('type', 'posts,comments').split(',')
+             if value.strip()}
+    if not types or types - SEARCH_TYPES:
+        return None, {
+            'code': 'VALIDATION_ERROR',
+            'message': 'type must be posts, comments or both',
+            'details': f"Allowed: {', '.join(sorted(SEARCH_TYPES))}"
+        }
+    
+    position = None
+    if args.get('cursor'):
+        position = decode_cursor(args.get('cursor'), types=(float, str, int))
+        if position is None:
+            return None, {
+                'code': 'VALIDATION_ERROR',
+                'message': 'Invalid cursor'
+            }
+    
+    return {
+        'q': text,
+        'match': fts_query(text),
+        'limit': limit,
+        'types': types,
+        'position': position
+    }, None
+
 
+def search_query(options):
+    """
+    The query for one page of GET /api/search, as (sql, params)
+    
+    Each FTS5 table returns its matches with a bm25() score (lower is a
+    better match; post titles weigh twice as much as content) and a
+    snippet with the matching words in <mark>. The two result sets are
+    merged by score, and (score, type, id) is the keyset for pagination.
+    Scores from different tables are only roughly comparable, since bm25
+    weighs words by how rare they are in their own table.
+    """
+    selects = []
+    params = []
+    if 'posts' in options['types']:
+        selects.append('''
+            SELECT 'post' AS type, p.id, p.id AS post_id, p.title,
+                   snippet(posts_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+                   u.username AS author, p.created_at,
+                   bm25(posts_fts, 2.0, 1.0) AS score
+            FROM posts_fts
+            JOIN posts p ON p.id = posts_fts.rowid
+            JOIN users u ON p.author_id = u.id
+            WHERE posts_fts MATCH ?
+        ''')
+        params.append(options['match'])
+    if 'comments' in options['types']:
+        selects.append('''
+            SELECT 'comment' AS type, c.id, c.post_id, p.title,
+                   snippet(comments_fts, 0, '<mark>', '</mark>', '…', 12) AS snippet,
+                   u.username AS author, c.created_at,
+                   bm25(comments_fts) AS score
+            FROM comments_fts
+            JOIN comments c ON c.id = comments_fts.rowid
+            JOIN posts p ON c.post_id = p.id
+            JOIN users u ON c.author_id = u.id
+            WHERE comments_fts MATCH ?
+        ''')
+        params.append(options['match'])
+    
+    where = ''
+    if options['position']:
+        where = 'WHERE (score, type, id) > (?, ?, ?)'
+        params.extend(options['position'])
+    
+    # Fetch one extra row to find out whether there is a next page
+    params.append(options['limit'] + 1)
+    
+    return f'''
+        SELECT type, id, post_id, title, snippet, author, created_at, score
+        FROM ({' UNION ALL '.join(selects)})
+        {where}
+        ORDER BY score, type, id
+        LIMIT ?
+    ''', params
+
+
+def search_result(results, options):
+    """Build the GET /api/search body from the rows of search_query()"""
+    limit = options['limit']
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        next_cursor = encode_cursor(last['score'], last['type'], last['id'])
+    
+    return {
+        'data': results,
+        'meta': {
+            'q': options['q'],
+            'limit': limit,
+            'next_cursor': next_cursor
+        }
+    }
+
+
+# Request metrics, rendered by /metrics (see metrics.py)
+REQUESTS = Counter(
+    'practice_api_requests_total', 'HTTP requests handled',
+    ['method', 'endpoint', 'status']
+)
+REQUEST_DURATION = Histogram(
+    'practice_api_request_duration_seconds', 'Time spent handling a request',
+    ['method', 'endpoint']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'practice_api_requests_in_flight', 'Requests currently being handled'
+)
+DB_DURATION = Histogram(
+    'practice_api_db_duration_seconds', 'Time spent in SQLite per request',
+    ['method', 'endpoint'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+)
+DB_QUERIES = Counter(
+    'practice_api_db_queries_total', 'SQL statements executed',
+    ['method', 'endpoint']
+)
+# These read the counters the caches and the KDF pool already keep
+Counter(
+    'practice_api_token_cache_total', 'Token cache lookups', ['result'],
+    function=lambda: {
+        ('hit',): token_cache.hits, ('miss',): token_cache.misses
+    }
+)
+Counter(
+    'practice_api_response_cache_total', 'Response cache lookups', ['result'],
+    function=lambda: {
+        ('hit',): response_cache.hits, ('miss',): response_cache.misses
+    }
+)
+Counter(
+    'practice_api_kdf_jobs_total', 'Password hashing jobs', ['outcome'],
+    function=lambda: {
+        ('completed',): kdf_pool.completed,
+        ('failed',): kdf_pool.failed,
+        ('rejected',): kdf_pool.rejected
+    }
+)
+Gauge(
+    'practice_api_kdf_jobs_pending', 'Password hashing jobs queued or running',
+    function=lambda: kdf_pool.pending
+)
+Summary(
+    'practice_api_kdf_queue_wait_seconds', 'Time hashing jobs waited for a worker',
+    function=lambda: (kdf_pool.completed, kdf_pool.wait_total)
+)
 
-def rate_limit_check(ip_address):
+
+@app.before_request
+def start_request_metrics():
+    """Start timing the request (registered first so 429s are timed too)"""
+    if not METRICS_ENABLED:
+        return
+    g.metrics_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+    query_timer.start()
+
+
+@app.after_request
+def record_request_metrics(response):
     """
-    Check if IP has exceeded rate limit
+    Record the request's latency, status and database time
+
+    Runs last of the after_request hooks. A streamed response is timed
+    until its first byte is ready, not until it has been sent.
+    """
+    start = g.get('metrics_start')
+    if start is None:
+        return response
+    duration = time.perf_counter() - start
+    db_time, queries = query_timer.stop()
+    # Label by route pattern (/api/posts/<int:post_id>), never by the raw
+    # path, so the number of series stays bounded
+    endpoint = request.url_rule.rule if request.url_rule else '<unmatched>'
+    method = request.method
+    REQUESTS.inc(method=method, endpoint=endpoint, status=response.status_code)
+    REQUEST_DURATION.observe(duration, method=method, endpoint=endpoint)
+    DB_DURATION.observe(db_time, method=method, endpoint=endpoint)
+    if queries:
+        DB_QUERIES.inc(queries, method=method, endpoint=endpoint)
+    return response
+
+
+@app.teardown_request
+def end_request_metrics(exception):
+    """Count the request as finished, even if it raised"""
+    if g.pop('metrics_start', None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
+
+
+@app.before_request
+def enforce_rate_limit():
+    """
+    Reject requests from clients that are over RATE_LIMIT
+    
+    Each request counts once against the client IP's sliding-window
+    counter, so memory per IP is constant.
     
     NOTE: This is a basic implementation for educational purposes.
     In production, use Flask-Limiter or similar libraries.
-    This function is currently not enforced - you can add it as an exercise!
     """
-    now = time.time()
-    minute_ago = now - 60
+    if not RATE_LIMIT_ENABLED:
+        return None
     
-    # Clean old entries
-    rate_limit_storage[ip_address] = [
-        t for t in rate_limit_storage[ip_address] if t > minute_ago
-    ]
+    allowed, remaining, retry_after = rate_limiter.hit(request.remote_addr)
+    g.rate_limit_remaining = remaining
     
-    # Check limit
-    if len(rate_limit_storage[ip_address]) >= RATE_LIMIT:
-        return False
+    if not allowed:
+        response = jsonify({
+            'error': {
+                'code': 'RATE_LIMITED',
+                'message': 'Too many requests',
+                'details': f'Limit is {RATE_LIMIT} requests per minute'
+            }
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
     
-    # Add current request
-    rate_limit_storage[ip_address].append(now)
-    return True
+    return None
+
+
+@app.after_request
+def add_rate_limit_headers(response):
+    """Tell clients how much of their rate limit is left"""
+    if 'rate_limit_remaining' in g:
+        response.headers['X-RateLimit-Limit'] = str(RATE_LIMIT)
+        response.headers['X-RateLimit-Remaining'] = str(g.rate_limit_remaining)
+    return response
 
 
 def require_auth(f):
@@ -202,10 +1164,22 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.datetime.utcnow().isoformat()
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'token_cache': token_cache.stats(),
+        'response_cache': response_cache.stats(),
+        'kdf_pool': kdf_pool.stats()
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, database, cache and KDF metrics for Prometheus"""
+    return Response(
+        metrics_registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @app.route('/api/test/echo', methods=['POST'])
 def echo():
     """Echo back the request data"""
@@ -288,7 +1262,6 @@ def register():
         )
         conn.commit()
         user_id = cursor.lastrowid
-        conn.close()
         
         return jsonify({
             'message': 'User created successfully',
@@ -336,7 +1309,6 @@ def login():
         (username,)
     )
     user = cursor.fetchone()
-    conn.close()
     
     if not user or not verify_password(password, user['password_hash']):
         return jsonify({
@@ -346,6 +1318,16 @@ def login():
             }
         }), 401
     
+    # Upgrade legacy SHA-256 (or weaker PBKDF2) hashes now that we know
+    # the password. If the pool is busy, it can wait for the next login.
+    if kdf.needs_rehash(user['password_hash'], KDF_ITERATIONS):
+        try:
+            cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                           (hash_password(password), user['id']))
+            conn.commit()
+        except KDFPoolBusy:
+            pass
+    
     # Generate token
     token = generate_token(user['id'], user['username'])
     
@@ -374,7 +1356,6 @@ def get_current_user():
         (request.user_id,)
     )
     user = cursor.fetchone()
-    conn.close()
     
     if not user:
         return jsonify({
@@ -435,7 +1416,6 @@ def update_current_user():
             (request.user_id,)
         )
         user = cursor.fetchone()
-        conn.close()
         
         return jsonify(dict(user))
         
@@ -453,96 +1433,127 @@ def update_current_user():
 # ============================================================================
 
 @app.route('/api/posts', methods=['GET'])
+@response_cache.cached
 def get_posts():
-    """Get all posts with optional filtering and pagination"""
-    # Query parameters with validation
-    try:
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 10))
-    except (ValueError, TypeError):
-        return jsonify({
-            'error': {
-                'code': 'VALIDATION_ERROR',
-                'message': 'Page and limit must be valid integers'
-            }
-        }), 400
+    """
+    Get all posts with optional filtering and pagination
+
+    Two pagination modes are supported:
+    - Offset (default): ?page=2&limit=10
+    - Keyset: ?cursor=&limit=10, then pass meta.next_cursor as ?cursor=...
+      Keyset pages stay fast no matter how deep you go, because the
+      database seeks straight to the cursor position instead of skipping
+      OFFSET rows.
+
+    Pass include_total=false to skip the COUNT(*) query.
     
-    # Validate ranges
-    if page < 1:
-        return jsonify({
-            'error': {
-                'code': 'VALIDATION_ERROR',
-                'message': 'Page must be greater than 0'
-            }
-        }), 400
+    Pass embed=comment_count and/or embed=comments (first comments_limit
+    comments, default 3) to include comments without extra requests.
+    """
+    options, error = parse_posts_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
     
-    if limit < 1 or limit > 100:
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    # Answer conditional requests from the version counters alone. They
+    # are read before the data, so a concurrent write can only make the
+    # ETag older than the body (costing one extra re-fetch), never newer.
+    embed = options['embed']
+    etag_keys = ['posts', 'comments'] if embed else ['posts']
+    etag, not_modified = check_etag(cursor, etag_keys)
+    if not_modified:
+        return not_modified
+    
+    total = None
+    if options['include_total']:
+        cursor.execute(*posts_count_query(options))
+        total = cursor.fetchone()['count']
+    
+    cursor.execute(*posts_page_query(options))
+    result = posts_page_result([dict(row) for row in cursor.fetchall()], total, options)
+    posts = result['data']
+    
+    embed_related(cursor, posts, embed, options['comments_limit'])
+    
+    response_cache.tag('posts')
+    if embed:
+        response_cache.tag(*(f"comments:{post['id']}" for post in posts))
+    
+    return with_etag(jsonify(result), etag)
+
+
+@app.route('/api/posts/export', methods=['GET'])
+def export_posts():
+    """
+    Stream every post (optionally ?author=alice), oldest first
+    
+    ?format=ndjson (default) sends one JSON object per line, ?format=json
+    one JSON array. The body is gzip-compressed if the client accepts it.
+    
+    Rows are read and sent EXPORT_BATCH_SIZE at a time, so memory stays
+    the same whatever the size of the table. The stream reads from one
+    snapshot of the database: writes made while it runs aren't included.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
         return jsonify({
             'error': {
                 'code': 'VALIDATION_ERROR',
-                'message': 'Limit must be between 1 and 100'
+                'message': 'format must be ndjson or json'
             }
         }), 400
     
-    author = request.args.get('author')
+    encoder = ExportEncoder(fmt, gzip=request.accept_encodings.quality('gzip') > 0)
+    sql, params = export_query(request.args.get('author'))
     
-    offset = (page - 1) * limit
-    
-    # Build query
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    if author:
-        # Get total count first
-        cursor.execute('''
-            SELECT COUNT(*) as count FROM posts p
-            JOIN users u ON p.author_id = u.id
-            WHERE u.username = ?
-        ''', (author,))
-        total = cursor.fetchone()['count']
-        
-        # Get posts
-        cursor.execute('''
-            SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
-            FROM posts p
-            JOIN users u ON p.author_id = u.id
-            WHERE u.username = ?
-            ORDER BY p.created_at DESC
-            LIMIT ? OFFSET ?
-        ''', (author, limit, offset))
-        posts = [dict(row) for row in cursor.fetchall()]
-    else:
-        # Get total count first
-        cursor.execute('SELECT COUNT(*) as count FROM posts')
-        total = cursor.fetchone()['count']
-        
-        # Get posts
-        cursor.execute('''
-            SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
-            FROM posts p
-            JOIN users u ON p.author_id = u.id
-            ORDER BY p.created_at DESC
-            LIMIT ? OFFSET ?
-        ''', (limit, offset))
-        posts = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    return jsonify({
-        'data': posts,
-        'meta': {
-            'total': total,
-            'page': page,
-            'limit': limit
-        }
-    })
+    def generate():
+        # The request's own connection goes back to the pool before the
+        # body is sent, so the stream borrows one of its own
+        conn = acquire_db()
+        cursor = None
+        try:
+            yield encoder.start()
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                chunk = encoder.encode(rows)
+                if chunk:
+                    yield chunk
+            yield encoder.finish()
+        finally:
+            # A client that disconnects mid-stream leaves the statement
+            # half-read; finish it before the next request gets conn
+            if cursor is not None:
+                cursor.close()
+            release_db(conn)
+    
+    response = Response(generate(), content_type=encoder.content_type)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoder.gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 
 @app.route('/api/posts/<int:post_id>', methods=['GET'])
+@response_cache.cached
 def get_post(post_id):
-    """Get a specific post"""
+    """Get a specific post (supports the same embed= options as the listing)"""
+    embed, comments_limit, error = parse_embed_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
     conn = get_db()
     cursor = conn.cursor()
+    
+    etag_keys = [f'post:{post_id}', f'comments:{post_id}'] if embed else [f'post:{post_id}']
+    etag, not_modified = check_etag(cursor, etag_keys)
+    if not_modified:
+        return not_modified
+    
     cursor.execute('''
         SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
         FROM posts p
@@ -550,7 +1561,6 @@ def get_post(post_id):
         WHERE p.id = ?
     ''', (post_id,))
     post = cursor.fetchone()
-    conn.close()
     
     if not post:
         return jsonify({
@@ -560,7 +1570,14 @@ def get_post(post_id):
             }
         }), 404
     
-    return jsonify(dict(post))
+    post = dict(post)
+    embed_related(cursor, [post], embed, comments_limit)
+    
+    response_cache.tag(f'post:{post_id}')
+    if embed:
+        response_cache.tag(f'comments:{post_id}')
+    
+    return with_etag(jsonify(post), etag)
 
 
 @app.route('/api/posts', methods=['POST'])
@@ -569,25 +1586,13 @@ def create_post():
     """Create a new post"""
     data = request.get_json()
     
-    if not data or not all(k in data for k in ['title', 'content']):
-        return jsonify({
-            'error': {
-                'code': 'VALIDATION_ERROR',
-                'message': 'Title and content are required'
-            }
-        }), 400
+    error = validate_post_data(data)
+    if error:
+        return jsonify({'error': error}), 400
     
     title = data['title']
     content = data['content']
     
-    if len(title) < 3:
-        return jsonify({
-            'error': {
-                'code': 'VALIDATION_ERROR',
-                'message': 'Title must be at least 3 characters'
-            }
-        }), 400
-    
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
@@ -595,6 +1600,7 @@ def create_post():
         (title, content, request.user_id)
     )
     conn.commit()
+    response_cache.invalidate('posts')
     post_id = cursor.lastrowid
     
     # Get created post
@@ -605,11 +1611,63 @@ def create_post():
         WHERE p.id = ?
     ''', (post_id,))
     post = cursor.fetchone()
-    conn.close()
     
     return jsonify(dict(post)), 201
 
 
+@app.route('/api/posts/bulk', methods=['POST'])
+@require_auth
+def create_posts_bulk():
+    """
+    Create many posts in one request
+    
+    Accepts a JSON array of {"title", "content"} objects. Valid items are
+    inserted with one executemany() in a single transaction (one commit
+    instead of one per post); invalid items are skipped and reported in
+    the per-item results.
+    """
+    items, error = parse_bulk_items(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+    
+    results = [None] * len(items)
+    rows = []
+    row_indexes = []
+    for index, item in enumerate(items):
+        error = validate_post_data(item)
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+        else:
+            rows.append((item['title'], item['content'], request.user_id))
+            row_indexes.append(index)
+    
+    if rows:
+        conn = get_db()
+        cursor = conn.cursor()
+        post_ids = insert_many(
+            cursor,
+            'INSERT INTO posts (title, content, author_id) VALUES (?, ?, ?)',
+            rows
+        )
+        conn.commit()
+        response_cache.invalidate('posts')
+        
+        # Get all created posts with one query
+        cursor.execute('''
+            SELECT p.id, p.title, p.content, u.username as author, p.created_at
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE p.id BETWEEN ? AND ?
+        ''', (post_ids[0], post_ids[-1]))
+        posts = {row['id']: dict(row) for row in cursor.fetchall()}
+        
+        for index, post_id in zip(row_indexes, post_ids):
+            results[index] = {'index': index, 'status': 201, 'data': posts[post_id]}
+    
+    body, status = bulk_result(results)
+    return jsonify(body), status
+
+
 @app.route('/api/posts/<int:post_id>', methods=['PUT'])
 @require_auth
 def update_post(post_id):
@@ -631,7 +1689,6 @@ def update_post(post_id):
     post = cursor.fetchone()
     
     if not post:
-        conn.close()
         return jsonify({
             'error': {
                 'code': 'NOT_FOUND',
@@ -640,7 +1697,6 @@ def update_post(post_id):
         }), 404
     
     if post['author_id'] != request.user_id:
-        conn.close()
         return jsonify({
             'error': {
                 'code': 'FORBIDDEN',
@@ -654,6 +1710,7 @@ def update_post(post_id):
         (data['title'], data['content'], post_id)
     )
     conn.commit()
+    response_cache.invalidate('posts', f'post:{post_id}')
     
     # Get updated post
     cursor.execute('''
@@ -663,7 +1720,6 @@ def update_post(post_id):
         WHERE p.id = ?
     ''', (post_id,))
     updated_post = cursor.fetchone()
-    conn.close()
     
     return jsonify(dict(updated_post))
 
@@ -678,7 +1734,6 @@ def delete_post(post_id):
     post = cursor.fetchone()
     
     if not post:
-        conn.close()
         return jsonify({
             'error': {
                 'code': 'NOT_FOUND',
@@ -687,7 +1742,6 @@ def delete_post(post_id):
         }), 404
     
     if post['author_id'] != request.user_id:
-        conn.close()
         return jsonify({
             'error': {
                 'code': 'FORBIDDEN',
@@ -699,7 +1753,7 @@ def delete_post(post_id):
     cursor.execute('DELETE FROM comments WHERE post_id = ?', (post_id,))
     cursor.execute('DELETE FROM posts WHERE id = ?', (post_id,))
     conn.commit()
-    conn.close()
+    response_cache.invalidate('posts', f'post:{post_id}', f'comments:{post_id}')
     
     return '', 204
 
@@ -709,15 +1763,19 @@ def delete_post(post_id):
 # ============================================================================
 
 @app.route('/api/posts/<int:post_id>/comments', methods=['GET'])
+@response_cache.cached
 def get_comments(post_id):
     """Get all comments for a post"""
     conn = get_db()
     cursor = conn.cursor()
     
+    etag, not_modified = check_etag(cursor, [f'post:{post_id}', f'comments:{post_id}'])
+    if not_modified:
+        return not_modified
+    
     # Check if post exists
     cursor.execute('SELECT id FROM posts WHERE id = ?', (post_id,))
     if not cursor.fetchone():
-        conn.close()
         return jsonify({
             'error': {
                 'code': 'NOT_FOUND',
@@ -733,9 +1791,9 @@ def get_comments(post_id):
         ORDER BY c.created_at ASC
     ''', (post_id,))
     comments = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     
-    return jsonify(comments)
+    response_cache.tag(f'comments:{post_id}')
+    return with_etag(jsonify(comments), etag)
 
 
 @app.route('/api/posts/<int:post_id>/comments', methods=['POST'])
@@ -744,13 +1802,9 @@ def create_comment(post_id):
     """Add a comment to a post"""
     data = request.get_json()
     
-    if not data or 'content' not in data:
-        return jsonify({
-            'error': {
-                'code': 'VALIDATION_ERROR',
-                'message': 'Content is required'
-            }
-        }), 400
+    error = validate_comment_data(data)
+    if error:
+        return jsonify({'error': error}), 400
     
     content = data['content']
     
@@ -760,7 +1814,6 @@ def create_comment(post_id):
     # Check if post exists
     cursor.execute('SELECT id FROM posts WHERE id = ?', (post_id,))
     if not cursor.fetchone():
-        conn.close()
         return jsonify({
             'error': {
                 'code': 'NOT_FOUND',
@@ -774,6 +1827,7 @@ def create_comment(post_id):
         (post_id, request.user_id, content)
     )
     conn.commit()
+    response_cache.invalidate(f'comments:{post_id}')
     comment_id = cursor.lastrowid
     
     # Get created comment
@@ -784,11 +1838,102 @@ def create_comment(post_id):
         WHERE c.id = ?
     ''', (comment_id,))
     comment = cursor.fetchone()
-    conn.close()
     
     return jsonify(dict(comment)), 201
 
 
+@app.route('/api/posts/<int:post_id>/comments/bulk', methods=['POST'])
+@require_auth
+def create_comments_bulk(post_id):
+    """
+    Add many comments to a post in one request
+    
+    Accepts a JSON array of {"content"} objects, see create_posts_bulk().
+    """
+    items, error = parse_bulk_items(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    # Check if post exists
+    cursor.execute('SELECT id FROM posts WHERE id = ?', (post_id,))
+    if not cursor.fetchone():
+        return jsonify({
+            'error': {
+                'code': 'NOT_FOUND',
+                'message': 'Post not found'
+            }
+        }), 404
+    
+    results = [None] * len(items)
+    rows = []
+    row_indexes = []
+    for index, item in enumerate(items):
+        error = validate_comment_data(item)
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+        else:
+            rows.append((post_id, request.user_id, item['content']))
+            row_indexes.append(index)
+    
+    if rows:
+        comment_ids = insert_many(
+            cursor,
+            'INSERT INTO comments (post_id, author_id, content) VALUES (?, ?, ?)',
+            rows
+        )
+        conn.commit()
+        response_cache.invalidate(f'comments:{post_id}')
+        
+        # Get all created comments with one query
+        cursor.execute('''
+            SELECT c.id, c.post_id, u.username as author, c.content, c.created_at
+            FROM comments c
+            JOIN users u ON c.author_id = u.id
+            WHERE c.id BETWEEN ? AND ?
+        ''', (comment_ids[0], comment_ids[-1]))
+        comments = {row['id']: dict(row) for row in cursor.fetchall()}
+        
+        for index, comment_id in zip(row_indexes, comment_ids):
+            results[index] = {'index': index, 'status': 201, 'data': comments[comment_id]}
+    
+    body, status = bulk_result(results)
+    return jsonify(body), status
+
+
+# ============================================================================
+# SEARCH ENDPOINTS
+# ============================================================================
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """
+    Full-text search over posts and comments
+    
+    ?q= is required; every word must match (end a word with * to match it
+    as a prefix). ?type=posts or ?type=comments narrows the search.
+    Results are best match first, and paginate like keyset listings:
+    pass meta.next_cursor back as ?cursor=...
+    """
+    options, error = parse_search_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    etag, not_modified = check_etag(cursor, ['posts', 'comments'])
+    if not_modified:
+        return not_modified
+    
+    cursor.execute(*search_query(options))
+    result = search_result([dict(row) for row in cursor.fetchall()], options)
+    
+    return with_etag(jsonify(result), etag)
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -813,16 +1958,28 @@ def internal_error(error):
     }), 500
 
 
+@app.errorhandler(KDFPoolBusy)
+def server_busy(error):
+    response = jsonify({
+        'error': {
+            'code': 'SERVICE_UNAVAILABLE',
+            'message': 'Too many logins in progress, try again shortly'
+        }
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
 if __name__ == '__main__':
-    # Initialize database on first run
-    if not os.path.exists(DATABASE):
-        print('Initializing database...')
-        init_db()
-        print('Database initialized!')
+    # Initialize database on first run, and migrate older ones
+    print('Initializing database...')
+    init_db()
+    print('Database initialized!')
     
     print('=' * 60)
     print('🚀 Practice API Server Starting...')
@@ -0,0 +1,769 @@
+"""
+Practice API - ASGI Version
+
+The same endpoints, schema and JSON responses as app.py, served by an
+asyncio web framework (Starlette) instead of Flask.
+
+app.py gives every request its own thread, and that thread sits idle
+while SQLite works. Here every request is a coroutine on one event loop:
+database calls are awaited through aiosqlite (see async_db_pool.py), so
+while one request waits on the database the loop serves others. A
+thousand open connections cost a thousand small coroutines, not a
+thousand threads.
+
+Everything that isn't I/O - validation, JWT handling, query building,
+cursors, migrations, rate limiting - is imported from app.py, so the two
+versions can't drift apart. Their settings (DATABASE, RATE_LIMIT, ...)
+are read from app.py too.
+
+Differences from app.py:
+- No ETags or response cache (those are built on Flask's request/response)
+- Malformed JSON bodies are treated like missing ones (400, not Flask's 415)
+
+Run it with:
+    uvicorn asgi_app:app --port 8000
+"""
+
+import datetime
+import json
+import math
+import sqlite3
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as practice_api
+from app import (
+    bulk_result, decode_token, embed_queries, apply_embed, export_query, generate_token,
+    parse_bulk_items, parse_embed_args, parse_posts_args,
+    parse_search_args, posts_count_query, posts_page_query, posts_page_result,
+    search_query, search_result,
+    validate_comment_data, validate_post_data
+)
+import kdf_pool as kdf
+from kdf_pool import KDFPoolBusy
+from async_db_pool import AsyncConnectionPool
+from export_stream import ExportEncoder, FORMATS as EXPORT_FORMATS
+
+
+class SortedJSONResponse(JSONResponse):
+    """Serialize like Flask's jsonify (sorted keys), so bodies match app.py"""
+
+    def render(self, content):
+        return json.dumps(content, sort_keys=True, separators=(',', ':')).encode()
+
+
+def error_response(code, message, status, details=None):
+    """The {"error": {...}} body used by every endpoint"""
+    error = {'code': code, 'message': message}
+    if details:
+        error['details'] = details
+    return SortedJSONResponse({'error': error}, status_code=status)
+
+
+async def get_json(request):
+    """The parsed JSON body, or None if there isn't a valid one"""
+    try:
+        return await request.json()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+# Created on startup, see lifespan()
+db_pool = None
+
+
+async def fetchone(conn, sql, params=()):
+    async with conn.execute(sql, params) as cursor:
+        return await cursor.fetchone()
+
+
+async def fetchall(conn, sql, params=()):
+    async with conn.execute(sql, params) as cursor:
+        return await cursor.fetchall()
+
+
+async def insert_many(conn, sql, rows):
+    """Async version of app.insert_many(), see there"""
+    await conn.executemany(sql, rows)
+    last_id = (await fetchone(conn, 'SELECT last_insert_rowid()'))[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+async def embed_related(conn, posts, embed, comments_limit):
+    """Async version of app.embed_related(), see there"""
+    post_ids = [post['id'] for post in posts]
+    for kind, sql, params in embed_queries(post_ids, embed, comments_limit):
+        apply_embed(posts, kind, await fetchall(conn, sql, params))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global db_pool
+    # Schema setup is synchronous and runs once, before serving
+    practice_api.init_db()
+    db_pool = AsyncConnectionPool(practice_api.DATABASE, size=practice_api.DB_POOL_SIZE)
+    await db_pool.open()
+    yield
+    await db_pool.close()
+    practice_api.kdf_pool.shutdown()
+
+
+# ============================================================================
+# AUTHENTICATION
+# ============================================================================
+
+async def run_kdf(fn, *args):
+    """Async version of app.run_kdf(): awaits the worker pool"""
+    if not practice_api.KDF_POOL_ENABLED:
+        return fn(*args)
+    return await practice_api.kdf_pool.run_async(fn, *args)
+
+
+async def hash_password(password):
+    return await run_kdf(kdf.hash_password, password, practice_api.KDF_ITERATIONS)
+
+
+async def verify_password(password, password_hash):
+    return await run_kdf(kdf.verify_password, password, password_hash)
+
+
+class AuthError(Exception):
+    """Raised by current_user(), turned into a 401 response"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+async def current_user(request):
+    """
+    Authentication dependency: the verified JWT payload for the request
+
+    Await it at the top of a protected endpoint. Raises AuthError (a JSON
+    401) if the Authorization header is missing or the token is invalid.
+    """
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        raise AuthError('UNAUTHORIZED', 'Authorization header missing')
+
+    try:
+        token = auth_header.split(' ')[1]  # Bearer <token>
+    except IndexError:
+        raise AuthError('INVALID_TOKEN', 'Invalid authorization header format')
+
+    payload = decode_token(token)
+    if not payload:
+        raise AuthError('INVALID_TOKEN', 'Token is invalid or expired')
+    return payload
+
+
+class RateLimitMiddleware:
+    """
+    Reject clients that are over RATE_LIMIT, like app.enforce_rate_limit()
+
+    A plain ASGI middleware: it only wraps `send` to add the
+    X-RateLimit-* headers, so it adds almost nothing per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not practice_api.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get('client')
+        allowed, remaining, retry_after = practice_api.rate_limiter.hit(
+            client[0] if client else None
+        )
+        headers = [
+            (b'x-ratelimit-limit', str(practice_api.RATE_LIMIT).encode()),
+            (b'x-ratelimit-remaining', str(remaining).encode())
+        ]
+
+        if not allowed:
+            response = error_response(
+                'RATE_LIMITED', 'Too many requests', 429,
+                f'Limit is {practice_api.RATE_LIMIT} requests per minute'
+            )
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            response.raw_headers.extend(headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# ============================================================================
+# HEALTH & TESTING ENDPOINTS
+# ============================================================================
+
+async def health_check(request):
+    """Health check endpoint"""
+    return SortedJSONResponse({
+        'status': 'healthy',
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'token_cache': practice_api.token_cache.stats(),
+        'kdf_pool': practice_api.kdf_pool.stats()
+    })
+
+
+async def echo(request):
+    """Echo back the request data"""
+    return SortedJSONResponse({
+        'echo': await get_json(request),
+        'received_at': datetime.datetime.utcnow().isoformat()
+    })
+
+
+async def test_error(request):
+    """Generate specific error codes for testing"""
+    code = request.path_params['code']
+    error_messages = {
+        400: 'Bad Request - Invalid input',
+        401: 'Unauthorized - Authentication required',
+        403: 'Forbidden - Access denied',
+        404: 'Not Found - Resource does not exist',
+        500: 'Internal Server Error - Something went wrong'
+    }
+    return error_response(f'TEST_ERROR_{code}', error_messages.get(code, 'Unknown error'), code)
+
+
+# ============================================================================
+# AUTHENTICATION ENDPOINTS
+# ============================================================================
+
+async def register(request):
+    """Register a new user"""
+    data = await get_json(request)
+
+    if not data or not all(k in data for k in ['username', 'email', 'password']):
+        return error_response('VALIDATION_ERROR', 'Missing required fields', 400,
+                              'username, email, and password are required')
+
+    username = data['username']
+    email = data['email']
+    password = data['password']
+
+    if len(password) < 6:
+        return error_response('VALIDATION_ERROR', 'Password must be at least 6 characters', 400)
+
+    if '@' not in email:
+        return error_response('VALIDATION_ERROR', 'Invalid email address', 400)
+
+    password_hash = await hash_password(password)
+
+    async with db_pool.connection() as conn:
+        try:
+            cursor = await conn.execute(
+                'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                (username, email, password_hash)
+            )
+            await conn.commit()
+        except sqlite3.IntegrityError as e:
+            if 'username' in str(e):
+                return error_response('CONFLICT', 'Username already exists', 409)
+            return error_response('CONFLICT', 'Email already exists', 409)
+
+    return SortedJSONResponse({
+        'message': 'User created successfully',
+        'user_id': cursor.lastrowid
+    }, status_code=201)
+
+
+async def login(request):
+    """Login and get JWT token"""
+    data = await get_json(request)
+
+    if not data or not all(k in data for k in ['username', 'password']):
+        return error_response('VALIDATION_ERROR', 'Username and password are required', 400)
+
+    async with db_pool.connection() as conn:
+        user = await fetchone(
+            conn,
+            'SELECT id, username, email, password_hash FROM users WHERE username = ?',
+            (data['username'],)
+        )
+
+    if not user or not await verify_password(data['password'], user['password_hash']):
+        return error_response('INVALID_CREDENTIALS', 'Invalid username or password', 401)
+
+    # Upgrade legacy hashes, see app.login()
+    if kdf.needs_rehash(user['password_hash'], practice_api.KDF_ITERATIONS):
+        try:
+            password_hash = await hash_password(data['password'])
+        except KDFPoolBusy:
+            password_hash = None
+        if password_hash:
+            async with db_pool.connection() as conn:
+                await conn.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                                   (password_hash, user['id']))
+                await conn.commit()
+
+    return SortedJSONResponse({
+        'token': generate_token(user['id'], user['username']),
+        'user': {
+            'id': user['id'],
+            'username': user['username'],
+            'email': user['email']
+        }
+    })
+
+
+# ============================================================================
+# USER ENDPOINTS
+# ============================================================================
+
+async def get_current_user(request):
+    """Get current user profile"""
+    user = await current_user(request)
+
+    async with db_pool.connection() as conn:
+        row = await fetchone(
+            conn,
+            'SELECT id, username, email, created_at FROM users WHERE id = ?',
+            (user['user_id'],)
+        )
+
+    if not row:
+        return error_response('NOT_FOUND', 'User not found', 404)
+    return SortedJSONResponse(dict(row))
+
+
+async def update_current_user(request):
+    """Update current user profile"""
+    user = await current_user(request)
+    data = await get_json(request)
+
+    if not data:
+        return error_response('VALIDATION_ERROR', 'No data provided', 400)
+
+    # Only allow updating email
+    if 'email' not in data:
+        return error_response('VALIDATION_ERROR', 'Only email can be updated', 400)
+
+    email = data['email']
+    if '@' not in email:
+        return error_response('VALIDATION_ERROR', 'Invalid email address', 400)
+
+    async with db_pool.connection() as conn:
+        try:
+            await conn.execute('UPDATE users SET email = ? WHERE id = ?',
+                               (email, user['user_id']))
+            await conn.commit()
+        except sqlite3.IntegrityError:
+            return error_response('CONFLICT', 'Email already exists', 409)
+
+        row = await fetchone(conn, 'SELECT id, username, email FROM users WHERE id = ?',
+                             (user['user_id'],))
+
+    return SortedJSONResponse(dict(row))
+
+
+# ============================================================================
+# POSTS ENDPOINTS
+# ============================================================================
+
+async def get_posts(request):
+    """Get all posts, see app.get_posts() for the query parameters"""
+    options, error = parse_posts_args(request.query_params)
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    async with db_pool.connection() as conn:
+        total = None
+        if options['include_total']:
+            total = (await fetchone(conn, *posts_count_query(options)))['count']
+
+        rows = await fetchall(conn, *posts_page_query(options))
+        result = posts_page_result([dict(row) for row in rows], total, options)
+        await embed_related(conn, result['data'], options['embed'], options['comments_limit'])
+
+    return SortedJSONResponse(result)
+
+
+async def export_posts(request):
+    """Stream every post as NDJSON or a JSON array, see app.export_posts()"""
+    fmt = request.query_params.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return error_response('VALIDATION_ERROR', 'format must be ndjson or json', 400)
+
+    accepted = {part.split(';')[0].strip()
+                for part in request.headers.get('Accept-Encoding', '').split(',')}
+    encoder = ExportEncoder(fmt, gzip='gzip' in accepted)
+    sql, params = export_query(request.query_params.get('author'))
+
+    async def generate():
+        async with db_pool.connection() as conn:
+            yield encoder.start()
+            async with conn.execute(sql, params) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(practice_api.EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    chunk = encoder.encode(rows)
+                    if chunk:
+                        yield chunk
+            yield encoder.finish()
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoder.gzip:
+        headers['Content-Encoding'] = 'gzip'
+    return StreamingResponse(generate(), media_type=encoder.content_type, headers=headers)
+
+
+async def get_post(request):
+    """Get a specific post (supports the same embed= options as the listing)"""
+    post_id = request.path_params['post_id']
+    embed, comments_limit, error = parse_embed_args(request.query_params)
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    async with db_pool.connection() as conn:
+        post = await fetchone(conn, '''
+            SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE p.id = ?
+        ''', (post_id,))
+
+        if not post:
+            return error_response('NOT_FOUND', 'Post not found', 404)
+
+        post = dict(post)
+        await embed_related(conn, [post], embed, comments_limit)
+
+    return SortedJSONResponse(post)
+
+
+async def create_post(request):
+    """Create a new post"""
+    user = await current_user(request)
+    data = await get_json(request)
+
+    error = validate_post_data(data)
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    async with db_pool.connection() as conn:
+        cursor = await conn.execute(
+            'INSERT INTO posts (title, content, author_id) VALUES (?, ?, ?)',
+            (data['title'], data['content'], user['user_id'])
+        )
+        await conn.commit()
+
+        post = await fetchone(conn, '''
+            SELECT p.id, p.title, p.content, u.username as author, p.created_at
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE p.id = ?
+        ''', (cursor.lastrowid,))
+
+    return SortedJSONResponse(dict(post), status_code=201)
+
+
+async def create_posts_bulk(request):
+    """Create many posts in one request, see app.create_posts_bulk()"""
+    user = await current_user(request)
+    items, error = parse_bulk_items(await get_json(request))
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    results = [None] * len(items)
+    rows = []
+    row_indexes = []
+    for index, item in enumerate(items):
+        error = validate_post_data(item)
+        if error:
+            results[index] = {'index': index, 'status': 400, 'error': error}
+        else:
+            rows.append((item['title'], item['content'], user['user_id']))
+            row_indexes.append(index)
+
+    if rows:
+        async with db_pool.connection() as conn:
+            post_ids = await insert_many(
+                conn,
+                'INSERT INTO posts (title, content, author_id) VALUES (?, ?, ?)',
+                rows
+            )
+            await conn.commit()
+
+            posts = {row['id']: dict(row) for row in await fetchall(conn, '''
+                SELECT p.id, p.title, p.content, u.username as author, p.created_at
+                FROM posts p
+                JOIN users u ON p.author_id = u.id
+                WHERE p.id BETWEEN ? AND ?
+            ''', (post_ids[0], post_ids[-1]))}
+
+        for index, post_id in zip(row_indexes, post_ids):
+            results[index] = {'index': index, 'status': 201, 'data': posts[post_id]}
+
+    body, status = bulk_result(results)
+    return SortedJSONResponse(body, status_code=status)
+
+
+async def update_post(request):
+    """Update a post"""
+    user = await current_user(request)
+    post_id = request.path_params['post_id']
+    data = await get_json(request)
+
+    if not data or not all(k in data for k in ['title', 'content']):
+        return error_response('VALIDATION_ERROR', 'Title and content are required', 400)
+
+    async with db_pool.connection() as conn:
+        post = await fetchone(conn, 'SELECT author_id FROM posts WHERE id = ?', (post_id,))
+
+        if not post:
+            return error_response('NOT_FOUND', 'Post not found', 404)
+
+        if post['author_id'] != user['user_id']:
+            return error_response('FORBIDDEN', 'You can only update your own posts', 403)
+
+        await conn.execute(
+            'UPDATE posts SET title = ?, content = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (data['title'], data['content'], post_id)
+        )
+        await conn.commit()
+
+        updated_post = await fetchone(conn, '''
+            SELECT p.id, p.title, p.content, u.username as author, p.created_at, p.updated_at
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE p.id = ?
+        ''', (post_id,))
+
+    return SortedJSONResponse(dict(updated_post))
+
+
+async def delete_post(request):
+    """Delete a post"""
+    user = await current_user(request)
+    post_id = request.path_params['post_id']
+
+    async with db_pool.connection() as conn:
+        post = await fetchone(conn, 'SELECT author_id FROM posts WHERE id = ?', (post_id,))
+
+        if not post:
+            return error_response('NOT_FOUND', 'Post not found', 404)
+
+        if post['author_id'] != user['user_id']:
+            return error_response('FORBIDDEN', 'You can only delete your own posts', 403)
+
+        # Delete comments first (foreign key constraint)
+        await conn.execute('DELETE FROM comments WHERE post_id = ?', (post_id,))
+        await conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+        await conn.commit()
+
+    return Response(status_code=204)
+
+
+# ============================================================================
+# COMMENTS ENDPOINTS
+# ============================================================================
+
+async def get_comments(request):
+    """Get all comments for a post"""
+    post_id = request.path_params['post_id']
+
+    async with db_pool.connection() as conn:
+        if not await fetchone(conn, 'SELECT id FROM posts WHERE id = ?', (post_id,)):
+            return error_response('NOT_FOUND', 'Post not found', 404)
+
+        rows = await fetchall(conn, '''
+            SELECT c.id, c.post_id, u.username as author, c.content, c.created_at
+            FROM comments c
+            JOIN users u ON c.author_id = u.id
+            WHERE c.post_id = ?
+            ORDER BY c.created_at ASC
+        ''', (post_id,))
+
+    return SortedJSONResponse([dict(row) for row in rows])
+
+
+async def create_comment(request):
+    """Add a comment to a post"""
+    user = await current_user(request)
+    post_id = request.path_params['post_id']
+    data = await get_json(request)
+
+    error = validate_comment_data(data)
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    async with db_pool.connection() as conn:
+        if not await fetchone(conn, 'SELECT id FROM posts WHERE id = ?', (post_id,)):
+            return error_response('NOT_FOUND', 'Post not found', 404)
+
+        cursor = await conn.execute(
+            'INSERT INTO comments (post_id, author_id, content) VALUES (?, ?, ?)',
+            (post_id, user['user_id'], data['content'])
+        )
+        await conn.commit()
+
+        comment = await fetchone(conn, '''
+            SELECT c.id, c.post_id, u.username as author, c.content, c.created_at
+            FROM comments c
+            JOIN users u ON c.author_id = u.id
+            WHERE c.id = ?
+        ''', (cursor.lastrowid,))
+
+    return SortedJSONResponse(dict(comment), status_code=201)
+
+
+async def create_comments_bulk(request):
+    """Add many comments to a post in one request, see app.create_comments_bulk()"""
+    user = await current_user(request)
+    post_id = request.path_params['post_id']
+    items, error = parse_bulk_items(await get_json(request))
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    async with db_pool.connection() as conn:
+        if not await fetchone(conn, 'SELECT id FROM posts WHERE id = ?', (post_id,)):
+            return error_response('NOT_FOUND', 'Post not found', 404)
+
+        results = [None] * len(items)
+        rows = []
+        row_indexes = []
+        for index, item in enumerate(items):
+            error = validate_comment_data(item)
+            if error:
+                results[index] = {'index': index, 'status': 400, 'error': error}
+            else:
+                rows.append((post_id, user['user_id'], item['content']))
+                row_indexes.append(index)
+
+        if rows:
+            comment_ids = await insert_many(
+                conn,
+                'INSERT INTO comments (post_id, author_id, content) VALUES (?, ?, ?)',
+                rows
+            )
+            await conn.commit()
+
+            comments = {row['id']: dict(row) for row in await fetchall(conn, '''
+                SELECT c.id, c.post_id, u.username as author, c.content, c.created_at
+                FROM comments c
+                JOIN users u ON c.author_id = u.id
+                WHERE c.id BETWEEN ? AND ?
+            ''', (comment_ids[0], comment_ids[-1]))}
+
+            for index, comment_id in zip(row_indexes, comment_ids):
+                results[index] = {'index': index, 'status': 201, 'data': comments[comment_id]}
+
+    body, status = bulk_result(results)
+    return SortedJSONResponse(body, status_code=status)
+
+
+# ============================================================================
+# SEARCH ENDPOINTS
+# ============================================================================
+
+async def search(request):
+    """Full-text search over posts and comments, see app.search()"""
+    options, error = parse_search_args(request.query_params)
+    if error:
+        return SortedJSONResponse({'error': error}, status_code=400)
+
+    async with db_pool.connection() as conn:
+        rows = await fetchall(conn, *search_query(options))
+
+    return SortedJSONResponse(search_result([dict(row) for row in rows], options))
+
+
+# ============================================================================
+# ERROR HANDLERS
+# ============================================================================
+
+async def auth_error(request, exc):
+    return error_response(exc.code, exc.message, 401)
+
+
+async def http_error(request, exc):
+    if exc.status_code == 404:
+        return error_response('NOT_FOUND', 'Endpoint not found', 404)
+    return error_response('HTTP_ERROR', exc.detail, exc.status_code)
+
+
+async def internal_error(request, exc):
+    return error_response('INTERNAL_ERROR', 'Internal server error', 500)
+
+
+async def server_busy(request, exc):
+    response = error_response('SERVICE_UNAVAILABLE',
+                              'Too many logins in progress, try again shortly', 503)
+    response.headers['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+# ============================================================================
+# APPLICATION
+# ============================================================================
+
+routes = [
+    Route('/api/health', health_check, methods=['GET']),
+    Route('/api/test/echo', echo, methods=['POST']),
+    Route('/api/test/error/{code:int}', test_error, methods=['GET']),
+    Route('/api/auth/register', register, methods=['POST']),
+    Route('/api/auth/login', login, methods=['POST']),
+    Route('/api/users/me', get_current_user, methods=['GET']),
+    Route('/api/users/me', update_current_user, methods=['PATCH']),
+    Route('/api/posts', get_posts, methods=['GET']),
+    Route('/api/posts', create_post, methods=['POST']),
+    Route('/api/posts/bulk', create_posts_bulk, methods=['POST']),
+    Route('/api/posts/export', export_posts, methods=['GET']),
+    Route('/api/posts/{post_id:int}', get_post, methods=['GET']),
+    Route('/api/posts/{post_id:int}', update_post, methods=['PUT']),
+    Route('/api/posts/{post_id:int}', delete_post, methods=['DELETE']),
+    Route('/api/posts/{post_id:int}/comments', get_comments, methods=['GET']),
+    Route('/api/posts/{post_id:int}/comments', create_comment, methods=['POST']),
+    Route('/api/posts/{post_id:int}/comments/bulk', create_comments_bulk, methods=['POST']),
+    Route('/api/search', search, methods=['GET']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'],
+                   allow_headers=['*']),
+        Middleware(RateLimitMiddleware)
+    ],
+    exception_handlers={
+        AuthError: auth_error,
+        KDFPoolBusy: server_busy,
+        HTTPException: http_error,
+        500: internal_error
+    },
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print('=' * 60)
+    print('🚀 Practice API (ASGI) Starting...')
+    print('=' * 60)
+    print(f'📍 Server: http://localhost:8000')
+    print(f'📖 Health: http://localhost:8000/api/health')
+    print('=' * 60)
+    uvicorn.run(app, host='127.0.0.1', port=8000)
@@ -0,0 +1,106 @@
+"""
+Async SQLite Connection Pool for the ASGI Practice API
+
+The asyncio counterpart of db_pool.py, built on aiosqlite. An aiosqlite
+connection runs its queries on a dedicated background thread, so awaiting
+a query frees the event loop to serve other requests in the meantime.
+
+Unlike the threaded pool, this one has a fixed size: all connections are
+opened by open(), and a request that finds none idle waits for one to be
+released instead of opening another. That bounds the number of SQLite
+threads no matter how many requests are in flight.
+"""
+
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+
+class AsyncConnectionPool:
+    """A fixed-size pool of aiosqlite connections for one event loop"""
+
+    def __init__(self, database, size=8, timeout=5.0, wal=True):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.wal = wal
+        self._idle = asyncio.LifoQueue(maxsize=size)  # LIFO keeps hot connections hot
+        self._opened = 0
+        self._closed = False
+
+    async def open(self):
+        """Open every connection up front"""
+        while self._opened < self.size:
+            self._idle.put_nowait(await self.connect())
+            self._opened += 1
+
+    async def connect(self):
+        """Open a new, fully configured connection (bypassing the pool)"""
+        conn = await aiosqlite.connect(self.database, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        if self.wal:
+            # Same settings as db_pool.ConnectionPool.connect()
+            await conn.execute('PRAGMA journal_mode=WAL')
+            await conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    async def acquire(self):
+        """Borrow a connection, waiting if all of them are in use"""
+        conn = await self._idle.get()
+        if not await self._is_healthy(conn):
+            await self._discard(conn)
+            conn = await self.connect()
+        return conn
+
+    async def release(self, conn):
+        """Return a connection to the pool"""
+        try:
+            # Never hand an open transaction to the next request
+            if conn.in_transaction:
+                await conn.rollback()
+        except sqlite3.Error:
+            await self._discard(conn)
+            conn = await self.connect()
+
+        if self._closed:
+            await self._discard(conn)
+            return
+        self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        """`async with pool.connection() as conn:` borrows and releases"""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        """Close every idle connection and stop pooling new ones"""
+        self._closed = True
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+
+    def idle_count(self):
+        """Number of connections currently waiting in the pool"""
+        return self._idle.qsize()
+
+    @staticmethod
+    async def _is_healthy(conn):
+        try:
+            async with conn.execute('SELECT 1') as cursor:
+                await cursor.fetchone()
+            return True
+        except (sqlite3.Error, ValueError):
+            # aiosqlite raises ValueError once the connection is closed
+            return False
+
+    @staticmethod
+    async def _discard(conn):
+        try:
+            await conn.close()
+        except sqlite3.Error:
+            pass
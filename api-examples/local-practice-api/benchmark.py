@@ -0,0 +1,722 @@
+#!/usr/bin/env python3
+"""
+Practice API Benchmarks
+
+Runs the API in-process through Flask's test client against a throwaway
+SQLite database, so no server needs to be running. Each benchmark
+compares two configurations of the same endpoint.
+
+Usage:
+    python benchmark.py pool [--requests 2000] [--threads 8]
+    python benchmark.py pagination [--posts 200000] [--repeat 20]
+    python benchmark.py bulk [--items 2000] [--batch 100]
+    python benchmark.py ratelimit [--clients 100000]
+    python benchmark.py jwt [--requests 5000] [--threads 4]
+    python benchmark.py cache [--requests 5000] [--threads 4]
+    python benchmark.py metrics [--repeat 500]
+    python benchmark.py servers [--connections 1000] [--duration 10]
+    python benchmark.py search [--rows 1000000] [--repeat 5]
+    python benchmark.py export [--posts 200000]
+    python benchmark.py kdf [--logins 200] [--threads 32]
+
+NOTE: Numbers are only meaningful relative to each other on the same
+machine. The test client skips the network, so this measures the
+per-request work done inside the app. The exception is `servers`, which
+starts real Flask and ASGI servers and loads them over HTTP (it needs
+aiohttp, uvicorn, starlette and aiosqlite installed).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import app as practice_api
+from rate_limiter import SlidingWindowRateLimiter
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def setup_database(num_users=10, num_posts=100):
+    """Create a fresh database in a temp dir and seed it with test data"""
+    # Benchmarks send far more than RATE_LIMIT requests from one "client",
+    # and would only measure the response cache if it were on
+    practice_api.RATE_LIMIT_ENABLED = False
+    practice_api.response_cache.enabled = False
+    practice_api.response_cache.clear()
+
+    tmp_dir = tempfile.mkdtemp(prefix='practice_api_bench_')
+    practice_api.DATABASE = os.path.join(tmp_dir, 'bench.db')
+    practice_api.init_db()
+
+    conn = sqlite3.connect(practice_api.DATABASE)
+    password_hash = practice_api.hash_password('password')  # Slow on purpose, so only once
+    conn.executemany(
+        'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+        [(f'user{i}', f'user{i}@example.com', password_hash) for i in range(num_users)]
+    )
+    # One post per second, so created_at values are realistic and distinct
+    conn.executemany(
+        '''
+        INSERT INTO posts (title, content, author_id, created_at)
+        VALUES (?, ?, ?, datetime(1700000000 + ?, 'unixepoch'))
+        ''',
+        ((f'Post {i}', f'Content for post {i}', i % num_users + 1, i)
+         for i in range(num_posts))
+    )
+    conn.commit()
+    conn.close()
+    return practice_api.DATABASE
+
+
+def login_headers(client, username='bench'):
+    """Register a user and return an Authorization header for them"""
+    client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'password123'
+    })
+    response = client.post('/api/auth/login', json={
+        'username': username,
+        'password': 'password123'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def run_requests(client, path, num_requests, threads, headers=None):
+    """Fire num_requests GETs at path from a thread pool, return requests/sec"""
+    def worker(count):
+        for _ in range(count):
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, response.status_code
+
+    per_thread = [num_requests // threads] * threads
+    per_thread[0] += num_requests % threads
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, per_thread))
+    elapsed = time.perf_counter() - start
+    return num_requests / elapsed
+
+
+def time_request(client, path, repeat):
+    """Average latency of a GET in milliseconds"""
+    client.get(path)  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def percentile(sorted_values, fraction):
+    """The value below which `fraction` of sorted_values fall"""
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def print_header(title):
+    print('=' * 60)
+    print(title)
+    print('=' * 60)
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def bench_pool(args):
+    """Requests/sec on GET /api/posts with connection pooling on and off"""
+    setup_database()
+    client = practice_api.app.test_client()
+
+    print_header(f'GET /api/posts - {args.requests} requests, {args.threads} threads')
+    results = {}
+    for enabled in (False, True):
+        practice_api.DB_POOL_ENABLED = enabled
+        run_requests(client, '/api/posts', 100, args.threads)  # Warm up
+        results[enabled] = run_requests(client, '/api/posts', args.requests, args.threads)
+        label = 'pooled' if enabled else 'unpooled'
+        print(f'{label:>10}: {results[enabled]:10.1f} req/s')
+
+    print(f'{"speedup":>10}: {results[True] / results[False]:10.2f}x')
+
+
+def bench_pagination(args):
+    """Latency of deep pages: LIMIT/OFFSET + COUNT(*) vs keyset cursors"""
+    print(f'Seeding {args.posts} posts...')
+    database = setup_database(num_posts=args.posts)
+    client = practice_api.app.test_client()
+    limit = 20
+
+    conn = sqlite3.connect(database)
+    print_header(f'GET /api/posts?limit={limit} - average of {args.repeat} requests')
+    print(f'{"depth":>10} {"offset (ms)":>14} {"cursor (ms)":>14}')
+    for fraction in (0, 0.1, 0.5, 0.9, 0.99):
+        depth = int(args.posts * fraction)
+        page = depth // limit + 1
+
+        # Build the cursor a client would hold after paging down to this depth
+        cursor = ''
+        if depth:
+            created_at, post_id = conn.execute('''
+                SELECT created_at, id FROM posts
+                ORDER BY created_at DESC, id DESC
+                LIMIT 1 OFFSET ?
+            ''', ((page - 1) * limit - 1,)).fetchone()
+            cursor = practice_api.encode_cursor(created_at, post_id)
+
+        offset_ms = time_request(client, f'/api/posts?limit={limit}&page={page}', args.repeat)
+        cursor_ms = time_request(
+            client, f'/api/posts?limit={limit}&include_total=false&cursor={cursor}', args.repeat
+        )
+        print(f'{depth:>10} {offset_ms:>14.2f} {cursor_ms:>14.2f}')
+    conn.close()
+
+
+def bench_bulk(args):
+    """Items/sec created one per request vs with the bulk endpoints"""
+    setup_database(num_posts=1)
+    client = practice_api.app.test_client()
+    headers = login_headers(client)
+    batches = [range(start, min(start + args.batch, args.items))
+               for start in range(0, args.items, args.batch)]
+
+    def single_posts():
+        for i in range(args.items):
+            client.post('/api/posts', headers=headers,
+                        json={'title': f'Post {i}', 'content': 'Content'})
+
+    def bulk_posts():
+        for batch in batches:
+            client.post('/api/posts/bulk', headers=headers,
+                        json=[{'title': f'Post {i}', 'content': 'Content'} for i in batch])
+
+    def single_comments():
+        for i in range(args.items):
+            client.post('/api/posts/1/comments', headers=headers,
+                        json={'content': f'Comment {i}'})
+
+    def bulk_comments():
+        for batch in batches:
+            client.post('/api/posts/1/comments/bulk', headers=headers,
+                        json=[{'content': f'Comment {i}'} for i in batch])
+
+    print_header(f'{args.items} items, bulk batches of {args.batch}')
+    print(f'{"endpoint":>10} {"single (items/s)":>18} {"bulk (items/s)":>18} {"speedup":>9}')
+    for name, single, bulk in (('posts', single_posts, bulk_posts),
+                               ('comments', single_comments, bulk_comments)):
+        rates = []
+        for fn in (single, bulk):
+            start = time.perf_counter()
+            fn()
+            rates.append(args.items / (time.perf_counter() - start))
+        print(f'{name:>10} {rates[0]:>18.1f} {rates[1]:>18.1f} {rates[1] / rates[0]:>8.1f}x')
+
+
+class TimestampListRateLimiter:
+    """The old rate_limit_check(): a list of request timestamps per IP"""
+
+    def __init__(self, limit, window=60.0):
+        self.limit = limit
+        self.window = window
+        self.storage = defaultdict(list)
+
+    def hit(self, key):
+        now = time.monotonic()
+        self.storage[key] = [t for t in self.storage[key] if t > now - self.window]
+        if len(self.storage[key]) >= self.limit:
+            return False
+        self.storage[key].append(now)
+        return True
+
+
+def bench_ratelimit(args):
+    """Time and memory of the rate limiter with many distinct client IPs"""
+    ips = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(args.clients)]
+    limiters = {
+        'timestamp list': lambda: TimestampListRateLimiter(practice_api.RATE_LIMIT),
+        'sliding window': lambda: SlidingWindowRateLimiter(practice_api.RATE_LIMIT,
+                                                           max_keys=args.clients),
+    }
+
+    def hit_all(limiter):
+        for _ in range(args.hits):
+            for ip in ips:
+                limiter.hit(ip)
+
+    total = args.clients * args.hits
+    print_header(f'{args.clients} distinct IPs x {args.hits} requests each')
+    print(f'{"limiter":>16} {"hits/s":>12} {"memory":>10}')
+    for name, make_limiter in limiters.items():
+        limiter = make_limiter()
+        start = time.perf_counter()
+        hit_all(limiter)
+        rate = total / (time.perf_counter() - start)
+
+        # Measure memory in a separate run, tracemalloc slows everything down
+        tracemalloc.start()
+        limiter = make_limiter()
+        hit_all(limiter)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print(f'{name:>16} {rate:>12.0f} {memory / 1024 / 1024:>8.1f}MB')
+
+    # Idle clients are forgotten once two windows have passed
+    now = [0.0]
+    limiter = SlidingWindowRateLimiter(practice_api.RATE_LIMIT, clock=lambda: now[0],
+                                       max_keys=args.clients)
+    for ip in ips:
+        limiter.hit(ip)
+    now[0] += 2 * limiter.window
+    limiter.hit('192.168.0.1')
+    print(f'\nTracked keys after {args.clients} IPs go idle for two windows: {len(limiter)}')
+
+
+def bench_jwt(args):
+    """Requests/sec on GET /api/users/me with the verified-token cache on and off"""
+    setup_database(num_posts=1)
+    client = practice_api.app.test_client()
+    headers = login_headers(client)
+
+    print_header(f'GET /api/users/me - {args.requests} requests, {args.threads} threads')
+    results = {}
+    for enabled in (False, True):
+        practice_api.TOKEN_CACHE_ENABLED = enabled
+        practice_api.token_cache.clear()
+        run_requests(client, '/api/users/me', 100, args.threads, headers)  # Warm up
+        results[enabled] = run_requests(client, '/api/users/me', args.requests,
+                                        args.threads, headers)
+        label = 'cached' if enabled else 'uncached'
+        print(f'{label:>10}: {results[enabled]:10.1f} req/s')
+
+    print(f'{"speedup":>10}: {results[True] / results[False]:10.2f}x')
+    print(f'Cache stats: {practice_api.token_cache.stats()}')
+
+
+def bench_cache(args):
+    """Requests/sec on the public read endpoints with the response cache on and off"""
+    setup_database()
+    client = practice_api.app.test_client()
+
+    print_header(f'{args.requests} requests per endpoint, {args.threads} threads')
+    print(f'{"endpoint":>40} {"uncached":>10} {"cached":>10} {"speedup":>9}')
+    for path in ('/api/posts', '/api/posts?embed=comments,comment_count',
+                 '/api/posts/1', '/api/posts/1/comments'):
+        rates = []
+        for enabled in (False, True):
+            practice_api.response_cache.enabled = enabled
+            practice_api.response_cache.clear()
+            run_requests(client, path, 100, args.threads)  # Warm up
+            rates.append(run_requests(client, path, args.requests, args.threads))
+        print(f'{path:>40} {rates[0]:>10.1f} {rates[1]:>10.1f} {rates[1] / rates[0]:>8.1f}x')
+    practice_api.response_cache.enabled = False
+
+
+def bench_metrics(args):
+    """Per-request cost of the metrics hooks, and latency with metrics on and off"""
+    setup_database()
+    client = practice_api.app.test_client()
+
+    def per_call(fn):
+        # Best of 5 rounds, to keep scheduler noise out of the numbers
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                fn()
+            best = min(best, (time.perf_counter() - start) / args.repeat)
+        return best * 1e6
+
+    print_header(f'Best of 5 x {args.repeat} requests')
+    print(f'{"endpoint":>12} {"off (us)":>10} {"on (us)":>10} {"overhead":>9}')
+    for path in ('/api/health', '/api/posts'):
+        times = []
+        for enabled in (False, True):
+            practice_api.METRICS_ENABLED = enabled
+            client.get(path)  # Warm up
+            times.append(per_call(lambda: client.get(path)))
+        print(f'{path:>12} {times[0]:>10.1f} {times[1]:>10.1f} '
+              f'{(times[1] - times[0]) / times[0]:>8.1%}')
+
+    response = practice_api.app.response_class()
+    with practice_api.app.test_request_context('/api/health'):
+        def hooks():
+            practice_api.start_request_metrics()
+            practice_api.record_request_metrics(response)
+            practice_api.end_request_metrics(None)
+        print(f'{"hooks alone":>12} {per_call(hooks):>21.1f}')
+
+
+def bench_export(args):
+    """Time and peak memory of /api/posts/export vs one JSON list of every post"""
+    print(f'Seeding {args.posts} posts...')
+    setup_database(num_posts=args.posts)
+    client = practice_api.app.test_client()
+
+    def stream(path, headers=None):
+        # Read the body chunk by chunk, like a client on a real connection
+        response = client.get(path, headers=headers, buffered=False)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return size
+
+    def all_at_once(path, headers=None):
+        # What get_posts() would do without its limit: list, then jsonify
+        with practice_api.app.test_request_context():
+            conn = practice_api.acquire_db()
+            sql, params = practice_api.export_query()
+            posts = [dict(row) for row in conn.execute(sql, params).fetchall()]
+            size = len(practice_api.jsonify(posts).get_data())
+            practice_api.release_db(conn)
+        return size
+
+    runs = [
+        ('list + jsonify', all_at_once, '', None),
+        ('export ndjson', stream, '/api/posts/export', None),
+        ('export json', stream, '/api/posts/export?format=json', None),
+        ('export ndjson+gzip', stream, '/api/posts/export', {'Accept-Encoding': 'gzip'}),
+    ]
+    print_header(f'Exporting {args.posts} posts')
+    print(f'{"method":>20} {"time (s)":>10} {"rows/s":>10} {"peak MiB":>10} {"body MiB":>10}')
+    for label, run, path, headers in runs:
+        start = time.perf_counter()
+        run(path, headers)
+        elapsed = time.perf_counter() - start
+
+        # Memory is measured on a separate run, tracemalloc slows everything down
+        tracemalloc.start()
+        size = run(path, headers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f'{label:>20} {elapsed:>10.2f} {args.posts / elapsed:>10.0f} '
+              f'{peak / 2**20:>10.1f} {size / 2**20:>10.1f}')
+
+
+def bench_kdf(args):
+    """Login latency, 503s and read latency during a login burst, inline vs KDF pool"""
+    setup_database(num_posts=100)
+    client = practice_api.app.test_client()
+    login_headers(client)
+    credentials = {'username': 'bench', 'password': 'password123'}
+
+    print_header(f'{args.logins} logins from {args.threads} threads, '
+                 f'{practice_api.KDF_ITERATIONS} PBKDF2 iterations')
+    print(f'{"mode":>8} {"logins/s":>9} {"503s":>6} {"login p50":>10} {"login p99":>10} '
+          f'{"read p50":>9} {"read p99":>9}')
+    for enabled in (False, True):
+        practice_api.KDF_POOL_ENABLED = enabled
+        login_ms, read_ms, statuses = [], [], []
+        done = False
+
+        def login(_):
+            start = time.perf_counter()
+            status = client.post('/api/auth/login', json=credentials).status_code
+            login_ms.append((time.perf_counter() - start) * 1000)
+            statuses.append(status)
+
+        def reader():
+            # Meanwhile, how long do ordinary requests take? (~50/s)
+            while not done:
+                start = time.perf_counter()
+                client.get('/api/posts')
+                read_ms.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.02)
+
+        with ThreadPoolExecutor(max_workers=1) as background:
+            reading = background.submit(reader)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as executor:
+                list(executor.map(login, range(args.logins)))
+            elapsed = time.perf_counter() - start
+            done = True
+            reading.result()
+
+        login_ms.sort()
+        read_ms.sort()
+        label = 'pool' if enabled else 'inline'
+        print(f'{label:>8} {statuses.count(200) / elapsed:>9.1f} {statuses.count(503):>6} '
+              f'{percentile(login_ms, 0.5):>10.1f} {percentile(login_ms, 0.99):>10.1f} '
+              f'{percentile(read_ms, 0.5):>9.1f} {percentile(read_ms, 0.99):>9.1f}')
+
+    print(f'KDF pool: {practice_api.kdf_pool.stats()}')
+    practice_api.kdf_pool.shutdown()
+
+
+def make_vocabulary(size, rng):
+    """Distinct pronounceable made-up words, most common first"""
+    syllables = [c + v for c in 'bcdfghklmnprstvz' for v in 'aeiou']
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)  # Set order changes between runs
+    rng.shuffle(words)
+    return words
+
+
+def bench_search(args):
+    """Latency of FTS5 search (/api/search) vs LIKE '%term%' on the same rows"""
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(20000, rng)
+    # Zipf-like word frequencies, like real text: a few words are everywhere
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+
+    database = setup_database(num_posts=0)
+    conn = sqlite3.connect(database)
+    conn.row_factory = sqlite3.Row
+    print(f'Seeding {args.rows} posts (the FTS triggers index them as they go)...')
+    start = time.perf_counter()
+    batch = 10000
+    for offset in range(0, args.rows, batch):
+        count = min(batch, args.rows - offset)
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=count * 15)
+        conn.executemany(
+            '''
+            INSERT INTO posts (title, content, author_id, created_at)
+            VALUES (?, ?, ?, datetime(1700000000 + ?, 'unixepoch'))
+            ''',
+            ((' '.join(words[i * 15:i * 15 + 3]), ' '.join(words[i * 15 + 3:i * 15 + 15]),
+              i % 10 + 1, offset + i) for i in range(count))
+        )
+        conn.commit()
+    print(f'Seeded in {time.perf_counter() - start:.1f}s')
+
+    def fts(text):
+        options, error = practice_api.parse_search_args({'q': text, 'type': 'posts'})
+        assert error is None, error
+        return conn.execute(*practice_api.search_query(options)).fetchall()
+
+    def like(text):
+        # Every word must appear in the title or content, newest first
+        words = text.split()
+        conditions = ' AND '.join(['(p.title LIKE ? OR p.content LIKE ?)'] * len(words))
+        params = [f'%{word}%' for word in words for _ in range(2)]
+        return conn.execute(f'''
+            SELECT p.id, p.title, p.content, u.username as author, p.created_at
+            FROM posts p
+            JOIN users u ON p.author_id = u.id
+            WHERE {conditions}
+            ORDER BY p.created_at DESC, p.id DESC
+            LIMIT 11
+        ''', params).fetchall()
+
+    def average_ms(search, text):
+        search(text)  # Warm up
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            search(text)
+        return (time.perf_counter() - start) / args.repeat * 1000
+
+    queries = [
+        ('most common word', vocabulary[0]),
+        ('100th word', vocabulary[99]),
+        ('rare word', vocabulary[-1]),
+        ('two words', f'{vocabulary[9]} {vocabulary[199]}'),
+        ('prefix', vocabulary[500][:4] + '*'),
+        ('no match', 'zzzzzz'),
+    ]
+    print_header(f'First page of results, {args.rows} posts - average of {args.repeat} runs')
+    print(f'{"query":>18} {"matches":>9} {"fts5 (ms)":>11} {"like (ms)":>11} {"speedup":>9}')
+    for label, text in queries:
+        matches = conn.execute('SELECT COUNT(*) FROM posts_fts WHERE posts_fts MATCH ?',
+                               (practice_api.fts_query(text),)).fetchone()[0]
+        fts_ms = average_ms(fts, text)
+        if text.endswith('*'):
+            # LIKE has no word boundaries, so '%abc%' is the closest it gets
+            text = text[:-1]
+        like_ms = average_ms(like, text)
+        print(f'{label:>18} {matches:>9} {fts_ms:>11.2f} {like_ms:>11.2f} '
+              f'{like_ms / fts_ms:>8.1f}x')
+    conn.close()
+
+
+# Started with `python -c`, so each server gets its own process and the
+# benchmark's settings (seeded database, no rate limit, no response cache)
+SERVER_SCRIPT = '''
+import sys
+import app as practice_api
+practice_api.DATABASE = sys.argv[2]
+practice_api.RATE_LIMIT_ENABLED = False
+practice_api.response_cache.enabled = False
+if sys.argv[1] == 'flask':
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    practice_api.app.run(port=int(sys.argv[3]), threaded=True)
+else:
+    import uvicorn
+    import asgi_app
+    uvicorn.run(asgi_app.app, port=int(sys.argv[3]), log_level='warning',
+                backlog=4096)
+'''
+
+
+def start_server(kind, port, database):
+    """Start the 'flask' or 'asgi' server and wait until it answers"""
+    import urllib.request
+
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_SCRIPT, kind, database, str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f'{kind} server did not start on port {port}')
+
+
+async def load_server(url, connections, duration):
+    """
+    Keep `connections` keep-alive connections busy for `duration` seconds
+
+    Each connection sends its next request as soon as the previous one is
+    answered. Returns (latencies in ms, errors, elapsed seconds).
+    """
+    import aiohttp
+
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=connections)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        ok = response.status == 200
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - sent) * 1000)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, errors, elapsed
+
+
+def bench_servers(args):
+    """p50/p99 latency and requests/sec of the Flask and ASGI servers under load"""
+    database = setup_database()
+
+    print_header(f'GET {args.path} - {args.connections} connections, {args.duration}s')
+    print(f'{"server":>8} {"req/s":>10} {"p50 ms":>10} {"p99 ms":>10} {"errors":>8}')
+    for kind, port in (('flask', args.port), ('asgi', args.port + 1)):
+        process = start_server(kind, port, database)
+        try:
+            url = f'http://127.0.0.1:{port}{args.path}'
+            asyncio.run(load_server(url, 10, 1))  # Warm up
+            latencies, errors, elapsed = asyncio.run(
+                load_server(url, args.connections, args.duration)
+            )
+        finally:
+            process.terminate()
+            process.wait()
+
+        latencies.sort()
+        print(f'{kind:>8} {len(latencies) / elapsed:>10.1f} '
+              f'{percentile(latencies, 0.50):>10.1f} {percentile(latencies, 0.99):>10.1f} '
+              f'{errors:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Practice API benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    pool_parser = subparsers.add_parser('pool', help=bench_pool.__doc__)
+    pool_parser.add_argument('--requests', type=int, default=2000)
+    pool_parser.add_argument('--threads', type=int, default=8)
+    pool_parser.set_defaults(func=bench_pool)
+
+    pagination_parser = subparsers.add_parser('pagination', help=bench_pagination.__doc__)
+    pagination_parser.add_argument('--posts', type=int, default=200000)
+    pagination_parser.add_argument('--repeat', type=int, default=20)
+    pagination_parser.set_defaults(func=bench_pagination)
+
+    bulk_parser = subparsers.add_parser('bulk', help=bench_bulk.__doc__)
+    bulk_parser.add_argument('--items', type=int, default=2000)
+    bulk_parser.add_argument('--batch', type=int, default=100)
+    bulk_parser.set_defaults(func=bench_bulk)
+
+    ratelimit_parser = subparsers.add_parser('ratelimit', help=bench_ratelimit.__doc__)
+    ratelimit_parser.add_argument('--clients', type=int, default=100000)
+    ratelimit_parser.add_argument('--hits', type=int, default=10,
+                                  help='requests per client')
+    ratelimit_parser.set_defaults(func=bench_ratelimit)
+
+    jwt_parser = subparsers.add_parser('jwt', help=bench_jwt.__doc__)
+    jwt_parser.add_argument('--requests', type=int, default=5000)
+    jwt_parser.add_argument('--threads', type=int, default=4)
+    jwt_parser.set_defaults(func=bench_jwt)
+
+    cache_parser = subparsers.add_parser('cache', help=bench_cache.__doc__)
+    cache_parser.add_argument('--requests', type=int, default=5000)
+    cache_parser.add_argument('--threads', type=int, default=4)
+    cache_parser.set_defaults(func=bench_cache)
+
+    metrics_parser = subparsers.add_parser('metrics', help=bench_metrics.__doc__)
+    metrics_parser.add_argument('--repeat', type=int, default=500)
+    metrics_parser.set_defaults(func=bench_metrics)
+
+    servers_parser = subparsers.add_parser('servers', help=bench_servers.__doc__)
+    servers_parser.add_argument('--connections', type=int, default=1000)
+    servers_parser.add_argument('--duration', type=float, default=10,
+                                help='seconds of load per server')
+    servers_parser.add_argument('--path', default='/api/posts')
+    servers_parser.add_argument('--port', type=int, default=5100,
+                                help='Flask port (ASGI uses the next one)')
+    servers_parser.set_defaults(func=bench_servers)
+
+    search_parser = subparsers.add_parser('search', help=bench_search.__doc__)
+    search_parser.add_argument('--rows', type=int, default=1000000)
+    search_parser.add_argument('--repeat', type=int, default=5)
+    search_parser.set_defaults(func=bench_search)
+
+    export_parser = subparsers.add_parser('export', help=bench_export.__doc__)
+    export_parser.add_argument('--posts', type=int, default=200000)
+    export_parser.set_defaults(func=bench_export)
+
+    kdf_parser = subparsers.add_parser('kdf', help=bench_kdf.__doc__)
+    kdf_parser.add_argument('--logins', type=int, default=200)
+    kdf_parser.add_argument('--threads', type=int, default=32)
+    kdf_parser.set_defaults(func=bench_kdf)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Streaming Export Encoder for the Practice API
+
+Exporting a table as one JSON document means holding every row in memory
+before the first byte goes out. The encoder here turns rows into bytes
+one batch at a time instead, so a response can be streamed while rows are
+still being read from the database, and memory use depends on the batch
+size rather than on the size of the table.
+
+Two formats:
+- ndjson: one JSON object per line (easy to process line by line)
+- json:   a single JSON array, written a piece at a time
+
+Output can optionally be gzip-compressed on the fly.
+"""
+
+import json
+import zlib
+
+# json.dumps() builds a new encoder on every call when given options, so
+# share one. Sorted keys match Flask's jsonify.
+_json_encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json'
+}
+
+
+class ExportEncoder:
+    """
+    Encode batches of rows for a streamed response
+
+    Call start(), then encode() for every batch, then finish(). Each call
+    returns the bytes to send next (possibly b'' while gzip is buffering).
+    """
+
+    def __init__(self, fmt='ndjson', gzip=False):
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown export format: {fmt}')
+        self.fmt = fmt
+        self.content_type = FORMATS[fmt]
+        self.gzip = gzip
+        self.rows = 0
+        # wbits=31 writes a gzip header and trailer around the deflate data
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def start(self):
+        return self._output(b'[' if self.fmt == 'json' else b'')
+
+    def encode(self, rows):
+        lines = [_json_encoder.encode(dict(row)) for row in rows]
+        if not lines:
+            return b''
+
+        if self.fmt == 'ndjson':
+            text = '\n'.join(lines) + '\n'
+        else:
+            text = (',' if self.rows else '') + ','.join(lines)
+        self.rows += len(lines)
+        return self._output(text.encode())
+
+    def finish(self):
+        data = self._output(b']\n' if self.fmt == 'json' else b'')
+        if self._compressor:
+            data += self._compressor.flush()
+        return data
+
+    def _output(self, data):
+        if self._compressor:
+            return self._compressor.compress(data)
+        return data
@@ -0,0 +1,221 @@
+"""
+Password Hashing Worker Pool for the Practice API
+
+A real password KDF is slow on purpose: PBKDF2 with hundreds of thousands
+of iterations takes a good fraction of a second of CPU. Running it on the
+request thread means a burst of logins ties up the whole server.
+
+This module runs KDF work in a pool of worker processes instead, with a
+bound on how many jobs may be queued or running at once. When the bound
+is reached, new work is refused right away (KDFPoolBusy) rather than
+piling up behind the backlog, so the server can answer 503 with a
+Retry-After hint while everything else keeps working.
+
+It also records how long jobs wait for a free worker (queue wait) and how
+long the hashing itself takes (compute), see KDFPool.stats().
+
+Password hashes are stored as
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+Older hashes (plain SHA-256 hex digests) are still accepted by
+verify_password(), and needs_rehash() tells the caller to upgrade them.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+ALGORITHM = 'pbkdf2_sha256'
+
+
+# ============================================================================
+# KDF (runs in the worker processes)
+# ============================================================================
+
+def hash_password(password, iterations):
+    """Hash a password with PBKDF2-SHA256 and a random salt"""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return '$'.join([
+        ALGORITHM,
+        str(iterations),
+        base64.b64encode(salt).decode(),
+        base64.b64encode(digest).decode()
+    ])
+
+
+def verify_password(password, encoded):
+    """Check a password against a stored hash (PBKDF2 or legacy SHA-256)"""
+    if not encoded.startswith(ALGORITHM + '$'):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, encoded)
+
+    try:
+        _, iterations, salt, expected = encoded.split('$')
+        salt = base64.b64decode(salt)
+        expected = base64.b64decode(expected)
+        iterations = int(iterations)
+    except ValueError:
+        return False
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return hmac.compare_digest(digest, expected)
+
+
+def needs_rehash(encoded, iterations):
+    """True if a stored hash is legacy or weaker than `iterations`"""
+    parts = encoded.split('$')
+    if len(parts) != 4 or parts[0] != ALGORITHM:
+        return True
+    try:
+        return int(parts[1]) < iterations
+    except ValueError:
+        return True
+
+
+def _timed_call(fn, *args):
+    """Run fn in a worker and report how long it took there"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+# ============================================================================
+# POOL
+# ============================================================================
+
+class KDFPoolBusy(Exception):
+    """Raised when the pool already has max_pending jobs"""
+
+    def __init__(self, retry_after):
+        super().__init__('KDF pool is saturated')
+        self.retry_after = retry_after
+
+
+class KDFPool:
+    """
+    Run CPU-heavy functions in worker processes, at most `max_pending`
+    at a time (queued plus running).
+
+    Thread-safe. The worker processes are started on first use.
+    """
+
+    def __init__(self, workers=2, max_pending=16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.pending = 0
+        self.wait_total = 0.0  # seconds
+        self.wait_max = 0.0
+        self.compute_total = 0.0
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a worker and return its result (blocking)"""
+        result, _ = self.submit(fn, *args).result()
+        return result
+
+    async def run_async(self, fn, *args):
+        """Run fn(*args) in a worker without blocking the event loop"""
+        result, _ = await asyncio.wrap_future(self.submit(fn, *args))
+        return result
+
+    def submit(self, fn, *args):
+        """
+        Queue fn(*args), raise KDFPoolBusy if the pool is full.
+
+        Returns a concurrent.futures.Future whose result is
+        (fn's result, seconds spent computing it).
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise KDFPoolBusy(self.retry_after())
+
+        with self._lock:
+            self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, *args)
+        except BaseException:
+            self._finish()
+            raise
+        future.add_done_callback(partial(self._record, submitted))
+        return future
+
+    def retry_after(self):
+        """Seconds until a full queue has probably drained"""
+        with self._lock:
+            average = self.compute_total / self.completed if self.completed else 0.1
+        return max(1, math.ceil(average * self.max_pending / self.workers))
+
+    def stats(self):
+        """Counters plus average/max queue wait and average compute time"""
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'queue_wait_ms': {
+                    'avg': round(self.wait_total / completed * 1000, 3),
+                    'max': round(self.wait_max * 1000, 3)
+                },
+                'compute_ms': {
+                    'avg': round(self.compute_total / completed * 1000, 3)
+                }
+            }
+
+    def shutdown(self):
+        """Stop the worker processes (they restart on next use)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _record(self, submitted, future):
+        # Runs when the job finishes. Time not spent computing was spent
+        # waiting for a worker (plus a little inter-process overhead).
+        total = time.perf_counter() - submitted
+        try:
+            _, compute = future.result()
+        except BaseException as e:
+            with self._lock:
+                self.failed += 1
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died; start a fresh pool for the next job
+                    self._executor = None
+            self._finish()
+            return
+
+        wait = max(0.0, total - compute)
+        with self._lock:
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.compute_total += compute
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
@@ -0,0 +1,306 @@
+"""
+Metrics for the Practice API
+
+A small, dependency-free take on the Prometheus client library: counters,
+gauges and histograms with labels, rendered in the Prometheus text
+exposition format so any Prometheus-compatible scraper can read them.
+
+    requests = Counter('requests_total', 'Requests handled', ['status'])
+    requests.inc(status='200')
+    print(registry.render())
+
+Recording a value is a dictionary lookup and an addition under a lock,
+so metrics can be updated on every request. Anything expensive to
+compute (cache sizes and so on) can instead be passed as a `function`
+that is only called when the metrics are scraped.
+
+This module also times SQLite: TimedConnection is a sqlite3.Connection
+factory that adds the time spent in execute/fetch/commit calls to
+query_timer, which the app reads once per request.
+"""
+
+import bisect
+import contextvars
+import sqlite3
+import threading
+import time
+
+# Request latency buckets in seconds (the Prometheus client's defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """A set of metrics that are rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f'Duplicate metric: {metric.name}')
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=(), function=None, registry=registry):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # function() returns the current value (or {label values: value})
+        # at scrape time, instead of the metric being updated as it goes
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f'{self.name} expects labels {self.labels}')
+        return tuple([str(labels[name]) for name in self.labels])
+
+    def value(self, **labels):
+        """Current value for these labels (mainly for tests)"""
+        return self._current().get(self._key(labels), 0)
+
+    def _current(self):
+        if self.function is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.function()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self):
+        for key, value in sorted(self._current().items()):
+            yield f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests handled"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. requests in progress"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    Counts observations (e.g. latencies) in buckets, plus their sum
+
+    Each observation increments one bucket; the cumulative `le` counts
+    Prometheus expects are only added up when rendering.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=registry):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        super().__init__(name, help, labels, registry=registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [count per bucket..., sum]
+                series = self._values[key] = [0] * len(self.buckets) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def value(self, **labels):
+        """(count, sum) for these labels"""
+        series = self._current().get(self._key(labels))
+        if series is None:
+            return 0, 0.0
+        return sum(series[:-1]), series[-1]
+
+    def _current(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._values.items()}
+
+    def samples(self):
+        for key, series in sorted(self._current().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labels, key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labels, key)
+            yield f'{self.name}_sum{labels} {_format_value(series[-1])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Summary(_Metric):
+    """
+    A running count and sum, from a function returning (count, sum)
+
+    Enough for an average over any time range; no quantiles.
+    """
+
+    kind = 'summary'
+
+    def samples(self):
+        for key, (count, total) in sorted(self._current().items()):
+            labels = _format_labels(self.labels, key)
+            yield f'{self.name}_sum{labels} {_format_value(float(total))}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+# ============================================================================
+# SQLITE TIMING
+# ============================================================================
+
+class QueryTimer:
+    """
+    Adds up time spent in SQLite for whatever is being measured
+
+    The running total lives in a context variable, so each request thread
+    (or asyncio task) has its own. Outside start()/stop() nothing is
+    recorded.
+    """
+
+    def __init__(self):
+        self._current = contextvars.ContextVar('query_time', default=None)
+
+    def start(self):
+        self._current.set([0.0, 0])
+
+    def add(self, seconds, queries=0):
+        totals = self._current.get()
+        if totals is not None:
+            totals[0] += seconds
+            totals[1] += queries
+
+    def stop(self):
+        """(seconds, number of queries) since start()"""
+        totals = self._current.get()
+        self._current.set(None)
+        return (totals[0], totals[1]) if totals else (0.0, 0)
+
+
+query_timer = QueryTimer()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """A cursor that reports its execute and fetch time to query_timer"""
+
+    def execute(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            query_timer.add(time.perf_counter() - start, 1)
+
+    def executemany(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            query_timer.add(time.perf_counter() - start, 1)
+
+    # SQLite does most of a SELECT's work while rows are fetched
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            query_timer.add(time.perf_counter() - start)
+
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            query_timer.add(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            query_timer.add(time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    A sqlite3.Connection whose queries are timed
+
+    Pass it as the factory of sqlite3.connect() (or of ConnectionPool).
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The Connection.execute*() shortcuts would bypass cursor()
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            query_timer.add(time.perf_counter() - start)
@@ -0,0 +1,114 @@
+"""
+Sliding-Window Rate Limiter for the Practice API
+
+A simple rate limiter stores a timestamp for every request each client
+made in the last minute. That costs O(requests) memory and time per client.
+
+The sliding-window counter used here stores just three numbers per client:
+which fixed window we're in, the request count in it, and the count in the
+previous window. The number of requests in the last `window` seconds is
+estimated by weighting the previous window by how much of it still
+overlaps the sliding window:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+Clients that have been quiet for two whole windows have nothing left to
+remember, so they are evicted.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class SlidingWindowRateLimiter:
+    """
+    Allow up to `limit` requests per `window` seconds for each key.
+
+    Thread-safe. Memory is constant per active key, and at most `max_keys`
+    keys are tracked (least recently seen keys are dropped first).
+    """
+
+    def __init__(self, limit, window=60.0, max_keys=100_000, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [window index, count in that window, count in the window before]
+        # Ordered from least to most recently seen
+        self._clients = OrderedDict()
+        self._swept_index = None
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """
+        Record a request for key if it is within the limit.
+
+        Returns (allowed, remaining, retry_after) where retry_after is the
+        number of seconds until a request would be allowed (0 if allowed).
+        """
+        now = self.clock()
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                entry = [index, 0, 0]
+                self._clients[key] = entry
+                if len(self._clients) > self.max_keys:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+                if entry[0] != index:
+                    # Only the window right before this one still overlaps
+                    entry[2] = entry[1] if index - entry[0] == 1 else 0
+                    entry[1] = 0
+                    entry[0] = index
+
+            _, current, previous = entry
+            estimate = previous * (1 - elapsed / self.window) + current
+
+            if estimate + 1 > self.limit:
+                allowed = False
+                retry_after = self._retry_after(current, previous, elapsed)
+            else:
+                entry[1] += 1
+                estimate += 1
+                allowed = True
+                retry_after = 0.0
+
+            # Keys only become idle when a new window starts
+            if index != self._swept_index:
+                self._evict_idle(index)
+                self._swept_index = index
+
+        remaining = max(0, int(self.limit - estimate))
+        return allowed, remaining, retry_after
+
+    def reset(self):
+        """Forget every client"""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def _evict_idle(self, index):
+        # Keys are ordered by last use, so the idle ones are all at the front
+        while self._clients:
+            oldest = next(iter(self._clients.values()))
+            if index - oldest[0] < 2:
+                break
+            self._clients.popitem(last=False)
+
+    def _retry_after(self, current, previous, elapsed):
+        """Seconds until the estimate drops low enough to allow one request"""
+        allowed = self.limit - 1
+        if current <= allowed and previous:
+            # Wait for more of the previous window to slide out
+            wait = self.window * (1 - (allowed - current) / previous) - elapsed
+        else:
+            # Wait for the next window, then for enough of this one to slide out
+            wait = (self.window - elapsed) + self.window * (1 - allowed / current)
+        return max(0.0, wait)
@@ -0,0 +1,251 @@
+"""
+Response Cache for the Practice API
+
+Public read endpoints return the same JSON to everyone until somebody
+writes. This module caches whole responses (body, status, headers) keyed
+on the route and its query string, so a repeat request skips the database
+and JSON serialization entirely.
+
+Invalidation is tag-based and write-through:
+- While building a response, a view tags it with what it depends on
+  (e.g. 'posts', 'post:7', 'comments:7') using tag()
+- After committing a write, the handler calls invalidate() with the tags
+  it changed, which drops exactly the cached responses carrying them
+
+Entries also expire after a TTL, as a safety net.
+
+Backends:
+- MemoryBackend: in-process TTL + LRU dictionary (default)
+- RedisBackend: any Redis-compatible server, so several worker processes
+  share one cache and see each other's invalidations
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import g, make_response, request
+
+
+class MemoryBackend:
+    """A thread-safe TTL + LRU store, private to one process"""
+
+    def __init__(self, max_entries=1024, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, entry, tags)
+        self._tags = {}  # tag -> set of keys
+        self._generation = 0  # Bumped by every invalidation
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= self.clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, entry, ttl, tags, generation):
+        """Store entry unless something was invalidated since `generation`"""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._remove(key)
+            self._entries[key] = (self.clock() + ttl, entry, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            return True
+
+    def invalidate(self, tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    """
+    Store entries in a Redis-compatible server
+
+    Each entry is a JSON string with a TTL, and each tag is a set of the
+    keys that carry it. `client` is a redis.Redis instance (or anything
+    with the same API).
+    """
+
+    def __init__(self, client, prefix='practice_api:cache:'):
+        self.client = client
+        self.prefix = prefix
+        self._generation_key = prefix + 'generation'
+
+    def generation(self):
+        return int(self.client.get(self._generation_key) or 0)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + 'entry:' + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, entry, ttl, tags, generation):
+        """Store entry unless something was invalidated since `generation`"""
+        from redis import WatchError
+
+        entry_key = self.prefix + 'entry:' + key
+        with self.client.pipeline() as pipe:
+            try:
+                # WATCH makes the write fail if an invalidation sneaks in
+                pipe.watch(self._generation_key)
+                if int(pipe.get(self._generation_key) or 0) != generation:
+                    return False
+                pipe.multi()
+                pipe.set(entry_key, json.dumps(entry), ex=ttl)
+                for tag in tags:
+                    tag_key = self.prefix + 'tag:' + tag
+                    pipe.sadd(tag_key, entry_key)
+                    pipe.expire(tag_key, ttl)
+                pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    def invalidate(self, tags):
+        # Bump the generation first: from here on, set() refuses entries
+        # built from data read before this write, so every entry that did
+        # get stored is already in its tag sets when they are read below
+        self.client.incr(self._generation_key)
+        tag_keys = [self.prefix + 'tag:' + tag for tag in tags]
+        entry_keys = set()
+        for tag_key in tag_keys:
+            entry_keys.update(self.client.smembers(tag_key))
+        with self.client.pipeline() as pipe:
+            if entry_keys:
+                pipe.delete(*entry_keys)
+            pipe.delete(*tag_keys)
+            pipe.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+def make_backend(url=None, max_entries=1024):
+    """Create the backend for a cache URL (None means in-process memory)"""
+    if not url:
+        return MemoryBackend(max_entries=max_entries)
+
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(
+            'A Redis cache URL needs the redis package: pip install redis'
+        ) from None
+    return RedisBackend(redis.Redis.from_url(url))
+
+
+class ResponseCache:
+    """Cache successful responses of Flask views in a backend"""
+
+    def __init__(self, backend, ttl=30, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Guards the counters
+
+    def cached(self, view):
+        """Decorator: serve the view from the cache when possible"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+
+            key = self.key_for_request()
+            entry = self.backend.get(key)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                return self._build_response(entry)
+
+            with self._lock:
+                self.misses += 1
+            generation = self.backend.generation()
+            g.cache_tags = set()
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                entry = {
+                    'body': response.get_data(as_text=True),
+                    'status': response.status_code,
+                    'headers': {
+                        'Content-Type': response.headers.get('Content-Type'),
+                        'ETag': response.headers.get('ETag')
+                    }
+                }
+                self.backend.set(key, entry, self.ttl, sorted(g.cache_tags), generation)
+            return response
+
+        return wrapper
+
+    @staticmethod
+    def tag(*tags):
+        """Record what the response being built depends on"""
+        if 'cache_tags' in g:
+            g.cache_tags.update(tags)
+
+    def invalidate(self, *tags):
+        """Drop every cached response carrying any of these tags"""
+        self.backend.invalidate(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    @staticmethod
+    def key_for_request():
+        """Route plus sorted query string, so ?a=1&b=2 and ?b=2&a=1 share a key"""
+        args = urlencode(sorted(request.args.items(multi=True)))
+        return f'{request.path}?{args}'
+
+    @staticmethod
+    def _build_response(entry):
+        headers = {name: value for name, value in entry['headers'].items() if value}
+        response = make_response(entry['body'], entry['status'], headers)
+        # Honour If-None-Match against the cached ETag too
+        etag, _ = response.get_etag()
+        if etag and request.if_none_match.contains_weak(etag):
+            not_modified = make_response('', 304)
+            not_modified.headers['ETag'] = headers['ETag']
+            return not_modified
+        return response
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+ASGI PARITY TESTS
+=================
+
+asgi_app.py promises the same status codes and JSON bodies as app.py.
+These tests send the same requests to both, against one database, and
+compare the answers. They are skipped unless the ASGI dependencies
+(starlette, aiosqlite, and httpx for Starlette's TestClient) are installed.
+
+Usage:
+    pytest test_asgi_app.py
+"""
+
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('aiosqlite')
+pytest.importorskip('httpx')
+
+from starlette.testclient import TestClient
+
+import app as practice_api
+import asgi_app
+
+
+@pytest.fixture
+def clients(tmp_path, monkeypatch):
+    """(Flask test client, Starlette TestClient) sharing a fresh database"""
+    monkeypatch.setattr(practice_api, 'DATABASE', str(tmp_path / 'test.db'))
+    monkeypatch.setattr(practice_api, 'RATE_LIMIT_ENABLED', False)
+    monkeypatch.setattr(practice_api, 'KDF_ITERATIONS', 1000)  # Fast hashes for tests
+    practice_api.init_db()
+    practice_api.response_cache.clear()
+    with TestClient(asgi_app.app) as asgi_client:
+        yield practice_api.app.test_client(), asgi_client
+    practice_api.get_pool().close()
+
+
+def assert_same(clients, method, path, **kwargs):
+    """Send one request to both apps; return the (shared) status and JSON body"""
+    flask_client, asgi_client = clients
+    flask_response = flask_client.open(path, method=method, **kwargs)
+    asgi_response = asgi_client.request(method, path, **kwargs)
+    flask_result = flask_response.status_code, flask_response.get_json()
+    asgi_result = asgi_response.status_code, asgi_response.json()
+    assert asgi_result == flask_result, f'{method} {path}'
+    return flask_result
+
+
+def login(clients):
+    """Register and log in through Flask; the token works for both apps"""
+    flask_client, _ = clients
+    flask_client.post('/api/auth/register', json={
+        'username': 'alice', 'email': 'alice@example.com', 'password': 'password123'
+    })
+    response = flask_client.post('/api/auth/login', json={
+        'username': 'alice', 'password': 'password123'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def posts(clients):
+    """Five posts, the first with two comments; returns auth headers"""
+    flask_client, _ = clients
+    headers = login(clients)
+    flask_client.post('/api/posts/bulk', headers=headers,
+                      json=[{'title': f'Post {i}', 'content': 'Content'} for i in range(5)])
+    for i in range(2):
+        flask_client.post('/api/posts/1/comments', headers=headers,
+                          json={'content': f'Comment {i}'})
+    return headers
+
+
+@pytest.mark.parametrize('path', [
+    '/api/posts',
+    '/api/posts?limit=2&page=2',
+    '/api/posts?embed=comments,comment_count&comments_limit=1',
+    '/api/posts?author=alice&include_total=false',
+    '/api/posts?limit=0',
+    '/api/posts?embed=likes',
+])
+def test_list_matches(clients, posts, path):
+    """Post listings, their metadata and validation errors match"""
+    assert_same(clients, 'GET', path)
+
+
+def test_cursor_pages_match(clients, posts):
+    """Following next_cursor gives the same pages from both apps"""
+    cursor = ''
+    pages = 0
+    while cursor is not None:
+        _, body = assert_same(clients, 'GET', f'/api/posts?limit=2&cursor={cursor}')
+        cursor = body['meta']['next_cursor']
+        pages += 1
+    assert pages == 3
+    status, _ = assert_same(clients, 'GET', '/api/posts?cursor=not-a-cursor!')
+    assert status == 400
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/posts/1', 200),
+    ('/api/posts/1?embed=comments', 200),
+    ('/api/posts/1/comments', 200),
+    ('/api/posts/999', 404),
+    ('/api/posts/999/comments', 404),
+])
+def test_detail_and_not_found_match(clients, posts, path, status):
+    """Single posts, their comments and missing ones match"""
+    assert assert_same(clients, 'GET', path)[0] == status
+
+
+def test_auth_matches(clients, posts):
+    """Missing, invalid and valid tokens get the same answers"""
+    assert assert_same(clients, 'GET', '/api/users/me')[0] == 401
+    assert assert_same(clients, 'GET', '/api/users/me',
+                       headers={'Authorization': 'Bearer not-a-token'})[0] == 401
+    assert assert_same(clients, 'POST', '/api/posts',
+                       json={'title': 'No', 'content': 'Token'})[0] == 401
+    status, body = assert_same(clients, 'GET', '/api/users/me', headers=posts)
+    assert (status, body['username']) == (200, 'alice')
+    status, _ = assert_same(clients, 'DELETE', '/api/posts/2',
+                            headers={'Authorization': posts['Authorization'] + 'x'})
+    assert status == 401
@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+"""
+PRACTICE API TESTS
+==================
+
+In-process tests for the practice API. They use Flask's test client and a
+temporary database, so no server needs to be running.
+
+Usage:
+    pytest test_practice_api.py
+"""
+
+import gzip
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+import pytest
+
+import app as practice_api
+from db_pool import ConnectionPool
+from kdf_pool import KDFPool
+from rate_limiter import SlidingWindowRateLimiter
+from token_cache import TokenCache
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client backed by a fresh, migrated database"""
+    monkeypatch.setattr(practice_api, 'DATABASE', str(tmp_path / 'test.db'))
+    monkeypatch.setattr(practice_api, 'RATE_LIMIT_ENABLED', False)
+    monkeypatch.setattr(practice_api, 'KDF_ITERATIONS', 1000)  # Fast hashes for tests
+    practice_api.init_db()
+    practice_api.response_cache.clear()
+    yield practice_api.app.test_client()
+    practice_api.get_pool().close()
+
+
+def register_and_login(client, username='alice'):
+    """Create a user and return an Authorization header for them"""
+    client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'password123'
+    })
+    response = client.post('/api/auth/login', json={
+        'username': username,
+        'password': 'password123'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+# ============================================================================
+# SCHEMA MIGRATIONS
+# ============================================================================
+
+def test_migrations_run_once(client):
+    """init_db() records the schema version and is safe to run again"""
+    conn = sqlite3.connect(practice_api.DATABASE)
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    assert version == len(practice_api.MIGRATIONS)
+
+    assert practice_api.migrate_db(conn) == 0
+    conn.close()
+
+
+def test_migrations_upgrade_existing_database(tmp_path):
+    """A database created before migrations existed gets the indexes"""
+    conn = sqlite3.connect(str(tmp_path / 'old.db'))
+    conn.execute('''
+        CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT, content TEXT,
+                            author_id INTEGER, created_at TIMESTAMP,
+                            updated_at TIMESTAMP)
+    ''')
+    conn.execute('''
+        CREATE TABLE comments (id INTEGER PRIMARY KEY, post_id INTEGER,
+                               author_id INTEGER, content TEXT,
+                               created_at TIMESTAMP)
+    ''')
+
+    assert practice_api.migrate_db(conn) == len(practice_api.MIGRATIONS)
+    indexes = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    )}
+    assert 'idx_posts_author_created' in indexes
+    assert 'idx_comments_post_created' in indexes
+    conn.close()
+
+
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+
+def test_pool_reuses_connections(client):
+    """Requests borrow the same pooled connection instead of opening new ones"""
+    pool = practice_api.get_pool()
+    client.get('/api/posts')
+    conn = pool.acquire()
+    pool.release(conn)
+
+    client.get('/api/posts')
+    client.get('/api/posts')
+    assert pool.idle_count() == 1
+    assert pool.acquire() is conn
+
+
+def test_pool_rolls_back_on_release(tmp_path):
+    """A connection given back mid-transaction is rolled back"""
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2)
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE items (name TEXT)')
+    conn.execute("INSERT INTO items VALUES ('uncommitted')")
+    assert conn.in_transaction
+
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+    pool.close()
+
+
+def test_pool_replaces_unhealthy_connection(tmp_path):
+    """An idle connection that fails the health check is swapped for a new one"""
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2)
+    broken = pool.acquire()
+    pool.release(broken)
+    broken.close()
+
+    conn = pool.acquire()
+    assert conn is not broken
+    assert conn.execute('SELECT 1').fetchone()[0] == 1
+    assert pool.idle_count() == 0
+    pool.close()
+
+
+# ============================================================================
+# PAGINATION
+# ============================================================================
+
+def test_cursor_pagination_walks_every_post(client):
+    """Following next_cursor visits every post once, even when timestamps tie"""
+    headers = register_and_login(client)
+    client.post('/api/posts/bulk', headers=headers,
+                json=[{'title': f'Post {i}', 'content': 'Content'} for i in range(8)])
+    # Most posts share a timestamp, so only the id tells them apart
+    conn = sqlite3.connect(practice_api.DATABASE)
+    conn.execute("UPDATE posts SET created_at = '2024-01-01 00:00:00' WHERE id > 2")
+    conn.execute("UPDATE posts SET created_at = '2023-01-01 00:00:00' WHERE id <= 2")
+    conn.commit()
+    expected = [row[0] for row in conn.execute(
+        'SELECT id FROM posts ORDER BY created_at DESC, id DESC')]
+    conn.close()
+
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        body = client.get(f'/api/posts?limit=3&cursor={cursor}').get_json()
+        assert len(body['data']) <= 3
+        seen += [post['id'] for post in body['data']]
+        cursor = body['meta']['next_cursor']
+    assert seen == expected
+
+
+def test_invalid_cursor_rejected(client):
+    """Cursors that weren't made by the API get a 400"""
+    for cursor in ('not-a-cursor!', practice_api.encode_cursor('2024-01-01'),
+                   practice_api.encode_cursor(1, 'x'),
+                   practice_api.encode_cursor('2024-01-01', 1)[:-2]):
+        response = client.get(f'/api/posts?cursor={cursor}')
+        assert response.status_code == 400
+        assert response.get_json()['error']['message'] == 'Invalid cursor'
+
+
+def test_include_total_false_skips_count(client):
+    """include_total=false leaves the total out of the metadata"""
+    headers = register_and_login(client)
+    client.post('/api/posts', headers=headers, json={'title': 'Hello', 'content': 'World'})
+
+    assert client.get('/api/posts').get_json()['meta']['total'] == 1
+    for path in ('/api/posts?include_total=false', '/api/posts?include_total=false&cursor='):
+        meta = client.get(path).get_json()['meta']
+        assert 'total' not in meta
+    assert client.get('/api/posts?include_total=maybe').status_code == 400
+
+
+# ============================================================================
+# EMBEDDED COMMENTS
+# ============================================================================
+
+def test_embed_groups_comments_by_post(client):
+    """Each post gets its own first comments, capped at comments_limit"""
+    headers = register_and_login(client)
+    first = client.post('/api/posts', headers=headers,
+                        json={'title': 'First', 'content': 'One'}).get_json()['id']
+    second = client.post('/api/posts', headers=headers,
+                         json={'title': 'Second', 'content': 'Two'}).get_json()['id']
+    for i in range(3):
+        client.post(f'/api/posts/{first}/comments', headers=headers,
+                    json={'content': f'First {i}'})
+    client.post(f'/api/posts/{second}/comments', headers=headers, json={'content': 'Second 0'})
+
+    body = client.get('/api/posts?embed=comments,comment_count&comments_limit=2').get_json()
+    posts = {post['id']: post for post in body['data']}
+    assert [c['content'] for c in posts[first]['comments']] == ['First 0', 'First 1']
+    assert posts[first]['comment_count'] == 3
+    assert [c['content'] for c in posts[second]['comments']] == ['Second 0']
+    assert posts[second]['comment_count'] == 1
+    assert all(c['post_id'] == post_id
+               for post_id, post in posts.items() for c in post['comments'])
+
+    post = client.get(f'/api/posts/{first}?embed=comments&comments_limit=1').get_json()
+    assert [c['content'] for c in post['comments']] == ['First 0']
+    assert 'comments' not in client.get(f'/api/posts/{first}').get_json()
+
+
+def test_embed_limits_validated(client):
+    """comments_limit is range-checked only when comments are embedded"""
+    for limit in ('0', '21', 'abc'):
+        assert client.get(f'/api/posts?embed=comments&comments_limit={limit}').status_code == 400
+        assert client.get(f'/api/posts?comments_limit={limit}').status_code == 200
+        assert client.get('/api/posts?embed=comment_count'
+                          f'&comments_limit={limit}').status_code == 200
+    assert client.get('/api/posts?embed=likes').status_code == 400
+
+
+# ============================================================================
+# BULK CREATE
+# ============================================================================
+
+def test_bulk_create_statuses(client, monkeypatch):
+    """201 when every item is created, 207 for a mix, 400 when none are"""
+    headers = register_and_login(client)
+    valid = {'title': 'Valid', 'content': 'Body'}
+
+    response = client.post('/api/posts/bulk', headers=headers, json=[valid, valid])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['meta'] == {'created': 2, 'failed': 0}
+    assert all(result['status'] == 201 and result['data']['id'] for result in body['results'])
+
+    response = client.post('/api/posts/bulk', headers=headers,
+                           json=[{'title': 'Missing content'}, valid])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body['meta'] == {'created': 1, 'failed': 1}
+    assert body['results'][0]['status'] == 400 and 'error' in body['results'][0]
+    assert body['results'][1]['data']['title'] == 'Valid'
+    assert client.get('/api/posts').get_json()['meta']['total'] == 3
+
+    post_id = body['results'][1]['data']['id']
+    response = client.post(f'/api/posts/{post_id}/comments/bulk', headers=headers,
+                           json=[{}, {'content': 42}])
+    assert response.status_code == 400
+    assert response.get_json()['meta'] == {'created': 0, 'failed': 2}
+
+    monkeypatch.setattr(practice_api, 'MAX_BULK_ITEMS', 3)
+    response = client.post('/api/posts/bulk', headers=headers, json=[valid] * 4)
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'VALIDATION_ERROR'
+    assert client.post('/api/posts/bulk', headers=headers, json=[]).status_code == 400
+    assert client.get('/api/posts').get_json()['meta']['total'] == 3
+
+
+def test_bulk_ids_match_stored_rows(client):
+    """The ids handed back belong to the rows that were just inserted"""
+    headers = register_and_login(client)
+    post_id = client.post('/api/posts', headers=headers,
+                          json={'title': 'Single', 'content': 'One'}).get_json()['id']
+    client.delete(f'/api/posts/{post_id}', headers=headers)
+
+    returned = []
+    for batch in range(2):
+        items = [{'title': f'Batch {batch} #{i}', 'content': 'Body'} for i in range(3)]
+        items.insert(1, {'title': 'Invalid'})
+        body = client.post('/api/posts/bulk', headers=headers, json=items).get_json()
+        returned += [result['data'] for result in body['results'] if result['status'] == 201]
+    post_id = returned[0]['id']
+    body = client.post(f'/api/posts/{post_id}/comments/bulk', headers=headers,
+                       json=[{'content': f'Comment {i}'} for i in range(3)]).get_json()
+    comments = [result['data'] for result in body['results']]
+
+    conn = sqlite3.connect(practice_api.DATABASE)
+    posts = dict(conn.execute('SELECT id, title FROM posts').fetchall())
+    stored_comments = dict(conn.execute('SELECT id, content FROM comments').fetchall())
+    conn.close()
+    assert posts == {post['id']: post['title'] for post in returned}
+    assert stored_comments == {comment['id']: comment['content'] for comment in comments}
+
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+def test_rate_limiter_sliding_window():
+    """Requests from the previous window count less as it slides away"""
+    now = [0.0]
+    limiter = SlidingWindowRateLimiter(10, window=60, clock=lambda: now[0])
+
+    assert all(limiter.hit('1.2.3.4')[0] for _ in range(10))
+    allowed, remaining, retry_after = limiter.hit('1.2.3.4')
+    assert not allowed and remaining == 0 and retry_after > 0
+    assert limiter.hit('5.6.7.8')[0]
+
+    # Halfway through the next window, half of the old requests still count
+    now[0] = 90.0
+    assert sum(limiter.hit('1.2.3.4')[0] for _ in range(10)) == 5
+
+    # Two quiet windows later, idle clients are forgotten
+    now[0] = 300.0
+    limiter.hit('9.9.9.9')
+    assert len(limiter) == 1
+
+
+def test_rate_limit_enforced(client, monkeypatch):
+    """Requests over the limit get 429 with a Retry-After header"""
+    monkeypatch.setattr(practice_api, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(practice_api, 'rate_limiter', SlidingWindowRateLimiter(3))
+
+    statuses = [client.get('/api/health').status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+    response = client.get('/api/health')
+    assert int(response.headers['Retry-After']) > 0
+    assert response.headers['X-RateLimit-Remaining'] == '0'
+
+
+# ============================================================================
+# TOKEN CACHE
+# ============================================================================
+
+def test_token_cache_expires_and_evicts():
+    """Cached payloads are dropped at exp and when the cache is full"""
+    now = [1000.0]
+    cache = TokenCache(max_size=2, clock=lambda: now[0])
+
+    cache.put('token-a', {'user_id': 1, 'exp': 1060})
+    assert cache.get('token-a') == {'user_id': 1, 'exp': 1060}
+    now[0] = 1060.0
+    assert cache.get('token-a') is None
+
+    cache.put('token-b', {'user_id': 2, 'exp': 2000})
+    cache.put('token-c', {'user_id': 3, 'exp': 2000})
+    cache.get('token-b')
+    cache.put('token-d', {'user_id': 4, 'exp': 2000})
+    assert cache.get('token-c') is None
+    assert cache.get('token-b') is not None
+    assert cache.stats()['hits'] == 3
+
+
+def test_auth_uses_token_cache(client):
+    """Repeated requests with one token only verify it once"""
+    headers = register_and_login(client)
+    practice_api.token_cache.clear()
+    before = practice_api.token_cache.stats()
+
+    for _ in range(3):
+        assert client.get('/api/users/me', headers=headers).status_code == 200
+
+    after = practice_api.token_cache.stats()
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] == 2
+
+
+# ============================================================================
+# PASSWORD HASHING
+# ============================================================================
+
+def test_kdf_pool_rejects_when_saturated(client, monkeypatch):
+    """A full KDF queue answers 503 + Retry-After and records queue waits"""
+    pool = KDFPool(workers=1, max_pending=1)
+    monkeypatch.setattr(practice_api, 'kdf_pool', pool)
+    user = {'username': 'alice', 'email': 'alice@example.com', 'password': 'password123'}
+
+    blocker = pool.submit(time.sleep, 0.5)
+    response = client.post('/api/auth/register', json=user)
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+
+    blocker.result()
+    assert client.post('/api/auth/register', json=user).status_code == 201
+    stats = client.get('/api/health').get_json()['kdf_pool']
+    assert stats['rejected'] == 1 and stats['completed'] == 2 and stats['pending'] == 0
+    pool.shutdown()
+
+
+def test_legacy_password_hash_upgraded_on_login(client):
+    """Accounts with an old SHA-256 hash can log in and get a PBKDF2 hash"""
+    conn = sqlite3.connect(practice_api.DATABASE)
+    conn.execute(
+        'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+        ('old', 'old@example.com', hashlib.sha256(b'password123').hexdigest())
+    )
+    conn.commit()
+
+    credentials = {'username': 'old', 'password': 'password123'}
+    assert client.post('/api/auth/login', json=credentials).status_code == 200
+    stored = conn.execute("SELECT password_hash FROM users WHERE username = 'old'").fetchone()[0]
+    assert stored.startswith('pbkdf2_sha256$')
+    assert client.post('/api/auth/login', json=credentials).status_code == 200
+    assert client.post('/api/auth/login', json={**credentials, 'password': 'nope'}).status_code == 401
+    conn.close()
+
+
+# ============================================================================
+# CONDITIONAL REQUESTS
+# ============================================================================
+
+def test_etag_returns_304_until_data_changes(client):
+    """If-None-Match gets a 304 until a write bumps the version counter"""
+    headers = register_and_login(client)
+    post_id = client.post('/api/posts', headers=headers,
+                          json={'title': 'Hello', 'content': 'World'}).get_json()['id']
+
+    for path in ('/api/posts', f'/api/posts/{post_id}', f'/api/posts/{post_id}/comments'):
+        etag = client.get(path).headers['ETag']
+        assert etag.startswith('W/')
+
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    # A new comment changes the comments, but not the post itself
+    post_etag = client.get(f'/api/posts/{post_id}').headers['ETag']
+    comments_etag = client.get(f'/api/posts/{post_id}/comments').headers['ETag']
+    client.post(f'/api/posts/{post_id}/comments', headers=headers, json={'content': 'Hi'})
+    assert client.get(f'/api/posts/{post_id}',
+                      headers={'If-None-Match': post_etag}).status_code == 304
+    assert client.get(f'/api/posts/{post_id}/comments',
+                      headers={'If-None-Match': comments_etag}).status_code == 200
+
+    # Different query strings are different representations
+    assert (client.get('/api/posts?page=2').headers['ETag']
+            != client.get('/api/posts').headers['ETag'])
+
+    client.delete(f'/api/posts/{post_id}', headers=headers)
+    assert client.get(f'/api/posts/{post_id}',
+                      headers={'If-None-Match': post_etag}).status_code == 404
+
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+def test_response_cache_invalidated_by_writes(client):
+    """Cached reads are served until a write invalidates their tags"""
+    headers = register_and_login(client)
+    first = client.post('/api/posts', headers=headers,
+                        json={'title': 'First', 'content': 'One'}).get_json()['id']
+    second = client.post('/api/posts', headers=headers,
+                         json={'title': 'Second', 'content': 'Two'}).get_json()['id']
+
+    for path in ('/api/posts', f'/api/posts/{first}', f'/api/posts/{second}',
+                 f'/api/posts/{first}/comments'):
+        client.get(path)
+    stats = practice_api.response_cache.stats()
+    client.get(f'/api/posts/{second}')
+    assert practice_api.response_cache.stats()['hits'] == stats['hits'] + 1
+
+    # Commenting on the first post only invalidates its comments
+    client.post(f'/api/posts/{first}/comments', headers=headers, json={'content': 'Hi'})
+    assert len(client.get(f'/api/posts/{first}/comments').get_json()) == 1
+    stats = practice_api.response_cache.stats()
+    client.get(f'/api/posts/{second}')
+    client.get(f'/api/posts/{first}')
+    assert practice_api.response_cache.stats()['hits'] == stats['hits'] + 2
+
+    # Updating a post invalidates it and the listing
+    client.put(f'/api/posts/{first}', headers=headers,
+               json={'title': 'Updated', 'content': 'One'})
+    assert client.get(f'/api/posts/{first}').get_json()['title'] == 'Updated'
+    titles = [post['title'] for post in client.get('/api/posts').get_json()['data']]
+    assert 'Updated' in titles
+
+    client.delete(f'/api/posts/{first}', headers=headers)
+    assert client.get(f'/api/posts/{first}').status_code == 404
+    assert client.get(f'/api/posts/{first}/comments').status_code == 404
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def test_export_streams_every_post(client, monkeypatch):
+    """The export spans many batches, in both formats, with and without gzip"""
+    monkeypatch.setattr(practice_api, 'EXPORT_BATCH_SIZE', 4)
+    headers = register_and_login(client)
+    client.post('/api/posts/bulk', headers=headers,
+                json=[{'title': f'Post {i}', 'content': 'Content'} for i in range(10)])
+
+    response = client.get('/api/posts/export')
+    assert response.content_type == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [row['title'] for row in rows] == [f'Post {i}' for i in range(10)]
+
+    response = client.get('/api/posts/export?format=json&author=alice',
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == rows
+
+    assert client.get('/api/posts/export?format=json&author=bob').get_json() == []
+    assert client.get('/api/posts/export?format=xml').status_code == 400
+    # The stream gave its connection back to the pool
+    assert practice_api.get_pool().idle_count() >= 1
+
+
+def test_abandoned_export_releases_its_snapshot(client, monkeypatch):
+    """A client that stops reading doesn't leave a read open on a pooled connection"""
+    monkeypatch.setattr(practice_api, 'EXPORT_BATCH_SIZE', 2)
+    headers = register_and_login(client)
+    client.post('/api/posts/bulk', headers=headers,
+                json=[{'title': f'Post {i}', 'content': 'Content'} for i in range(10)])
+
+    response = client.get('/api/posts/export', buffered=False)
+    next(iter(response.response))
+    response.close()
+
+    conn = sqlite3.connect(practice_api.DATABASE)
+    conn.execute("UPDATE posts SET title = 'Changed'")
+    conn.commit()
+    # A checkpoint can't finish while any connection still reads an old snapshot
+    busy = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()[0]
+    conn.close()
+    assert busy == 0
+
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+def test_search_ranks_and_follows_writes(client):
+    """Search results are ranked, paginated, and track updates and deletes"""
+    headers = register_and_login(client)
+    for title, content in (('Sockets', 'TCP sockets and TCP ports'),
+                           ('HTTP', 'Runs on top of TCP'),
+                           ('Cooking', 'Pasta "al dente"')):
+        client.post('/api/posts', headers=headers, json={'title': title, 'content': content})
+    client.post('/api/posts/3/comments', headers=headers, json={'content': 'More TCP please'})
+
+    # Two mentions of "tcp" outrank one
+    first = client.get('/api/search?q=tcp&type=posts').get_json()['data']
+    assert [r['id'] for r in first] == [1, 2]
+    assert '<mark>TCP</mark>' in first[0]['snippet']
+
+    page = client.get('/api/search?q=tcp&limit=2').get_json()
+    rest = client.get(f"/api/search?q=tcp&limit=2&cursor={page['meta']['next_cursor']}")
+    assert rest.get_json()['meta']['next_cursor'] is None
+    found = [(r['type'], r['id']) for r in page['data'] + rest.get_json()['data']]
+    assert sorted(found) == [('comment', 1), ('post', 1), ('post', 2)]
+
+    # Query syntax in the input is searched for as text, not parsed
+    assert client.get('/api/search?q=" OR NEAR(').status_code == 200
+    assert len(client.get('/api/search?q=dente"').get_json()['data']) == 1
+
+    client.put('/api/posts/3', headers=headers, json={'title': 'Cooking', 'content': 'Risotto'})
+    assert client.get('/api/search?q=pasta').get_json()['data'] == []
+    client.delete('/api/posts/1', headers=headers)
+    ids = [r['id'] for r in client.get('/api/search?q=tcp&type=posts').get_json()['data']]
+    assert ids == [2]
+
+    assert client.get('/api/search').status_code == 400
+    assert client.get('/api/search?q=tcp&cursor=bogus').status_code == 400
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def test_metrics_exposition(client):
+    """/metrics counts requests per route and status and times the database"""
+    client.get('/api/posts')
+    client.get('/api/posts/42')
+    client.get('/api/nope')
+
+    assert practice_api.REQUESTS.value(
+        method='GET', endpoint='/api/posts/<int:post_id>', status=404) >= 1
+    count, db_time = practice_api.DB_DURATION.value(method='GET', endpoint='/api/posts')
+    assert count >= 1 and db_time > 0
+    assert practice_api.DB_QUERIES.value(method='GET', endpoint='/api/posts') >= 1
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE practice_api_request_duration_seconds histogram' in text
+    assert re.search(r'^practice_api_requests_total\{method="GET",'
+                     r'endpoint="<unmatched>",status="404"\} \d+$', text, re.M)
+    assert re.search(r'^practice_api_request_duration_seconds_bucket\{method="GET",'
+                     r'endpoint="/api/posts",le="\+Inf"\} \d+$', text, re.M)
+    # Only the /metrics request itself is in flight while rendering
+    assert 'practice_api_requests_in_flight 1\n' in text
+
+
+def test_metrics_disabled_skips_instrumentation(client, monkeypatch):
+    """With METRICS_ENABLED off, requests record nothing and use plain connections"""
+    monkeypatch.setattr(practice_api, 'METRICS_ENABLED', False)
+    labels = {'method': 'GET', 'endpoint': '/api/posts', 'status': 200}
+    before = practice_api.REQUESTS.value(**labels)
+    queries = practice_api.DB_QUERIES.value(method='GET', endpoint='/api/posts')
+
+    assert client.get('/api/posts').status_code == 200
+    assert practice_api.REQUESTS.value(**labels) == before
+    assert practice_api.DB_QUERIES.value(method='GET', endpoint='/api/posts') == queries
+    assert practice_api.get_pool().factory is sqlite3.Connection
+
+
+# ============================================================================
+# QUERY PLANS
+# ============================================================================
+
+# "SCAN posts" is a full table scan. "SCAN posts USING INDEX ..." walks an
+# index in order, and "SEARCH ..." seeks, so neither of those match.
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def test_hot_queries_do_not_scan_tables(client, monkeypatch):
+    """
+    Exercise the API and check the query plan of every statement it runs.
+
+    This catches new queries (or changed ones) that aren't backed by an
+    index, before the tables are big enough for anyone to notice.
+    """
+    statements = []
+    pool = practice_api.get_pool()
+    connect = pool.connect
+
+    def traced_connect():
+        conn = connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(pool, 'connect', traced_connect)
+
+    headers = register_and_login(client)
+    register_and_login(client, 'bob')
+    for i in range(30):
+        response = client.post('/api/posts', headers=headers, json={
+            'title': f'Post {i}',
+            'content': f'Content {i}'
+        })
+        post_id = response.get_json()['id']
+        client.post(f'/api/posts/{post_id}/comments', headers=headers,
+                    json={'content': f'Comment on {i}'})
+
+    client.post('/api/posts/bulk', headers=headers,
+                json=[{'title': f'Bulk {i}', 'content': 'Content'} for i in range(5)])
+    client.post(f'/api/posts/{post_id}/comments/bulk', headers=headers,
+                json=[{'content': f'Bulk comment {i}'} for i in range(5)])
+    client.get('/api/users/me', headers=headers)
+    client.patch('/api/users/me', headers=headers, json={'email': 'new@example.com'})
+    client.get('/api/posts?page=2&limit=5')
+    client.get('/api/posts?author=alice')
+    next_cursor = client.get('/api/posts?cursor=&limit=5').get_json()['meta']['next_cursor']
+    client.get(f'/api/posts?cursor={next_cursor}&limit=5&author=alice')
+    client.get(f'/api/posts/{post_id}')
+    client.get('/api/posts/export')
+    client.get('/api/posts/export?author=alice')
+    client.get('/api/posts?embed=comments,comment_count&comments_limit=2')
+    client.get(f'/api/posts/{post_id}?embed=comments,comment_count')
+    client.get(f'/api/posts/{post_id}/comments')
+    next_cursor = client.get('/api/search?q=post&limit=5').get_json()['meta']['next_cursor']
+    client.get(f'/api/search?q=post&limit=5&cursor={next_cursor}')
+    client.get('/api/search?q=comm*&type=comments')
+    etag = client.get('/api/posts').headers['ETag']
+    client.get('/api/posts', headers={'If-None-Match': etag})
+    client.put(f'/api/posts/{post_id}', headers=headers,
+               json={'title': 'Updated', 'content': 'Updated'})
+    client.delete(f'/api/posts/{post_id}', headers=headers)
+
+    queries = {sql for sql in statements
+               if sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))}
+    assert queries, 'no queries were traced'
+
+    conn = sqlite3.connect(practice_api.DATABASE)
+    for sql in queries:
+        for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+            detail = row[3]
+            assert not FULL_SCAN.match(detail), f'{detail} in:\n{sql}'
+    conn.close()
@@ -0,0 +1,83 @@
+"""
+Verified-Token Cache for the Practice API
+
+Verifying a JWT means checking its HMAC signature and parsing its JSON
+payload. Clients send the same token on every request until it expires, so
+the API ends up verifying the same few tokens over and over.
+
+This cache remembers the decoded payload of tokens that already passed
+verification. It is keyed by a SHA-256 digest of the token (so raw tokens
+aren't kept in memory as dictionary keys), bounded in size with LRU
+eviction, and an entry is never returned after the token's `exp` time.
+
+NOTE: Only successfully verified tokens are cached. If you change the
+signing key, call clear() so old tokens are verified again.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """A thread-safe LRU cache of verified JWT payloads"""
+
+    def __init__(self, max_size=1024, clock=time.time):
+        self.max_size = max_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        # digest -> (payload, exp), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Return the cached payload for token, or None"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            payload, exp = entry
+            if exp is not None and self.clock() >= exp:
+                # Expired tokens must go through full verification (and fail)
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token, payload):
+        """Remember the payload of a token that passed verification"""
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, payload.get('exp'))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every cached token"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size
+            }
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Load Generator
+==============
+
+Drive steady HTTP load at a server and report what happened: how many
+requests got through, how many were rate limited, and the latency
+percentiles.
+
+Two workload models:
+
+- closed: a fixed number of virtual users, each sending a request and
+  waiting for the answer before sending the next one (like browsers).
+  When the server slows down, the offered load drops with it.
+- open:   requests arrive at a target rate no matter how fast the server
+  answers (like independent clients on the internet). When the server
+  slows down, requests queue up and latency grows.
+
+In open mode latency is measured from when a request was *scheduled* to
+be sent, not from when it got a connection. Otherwise a stalled server
+would hide its own queueing delay (the "coordinated omission" problem).
+
+Requests run on asyncio with a pool of keep-alive connections (aiohttp),
+so one process can keep thousands of requests in flight.
+
+Usage:
+    python3 load_generator.py http://localhost:5006/api/data --rps 50 --duration 30
+    python3 load_generator.py http://localhost:5006/api/unlimited --model closed --users 20
+    python3 load_generator.py http://localhost:5000/api/posts --rps 500 --ramp-up 10 \\
+        --json results.json --csv timeline.csv
+
+Works against any of the course's Flask apps started locally.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import sys
+import time
+from collections import Counter
+
+import aiohttp
+
+# ============================================================================
+# LATENCY HISTOGRAM
+# ============================================================================
+
+
+class LatencyHistogram:
+    """
+    An HDR-style histogram of latencies in microseconds.
+
+    Values are counted in buckets whose width grows with the value, so
+    every value is stored with the same *relative* precision (three
+    significant digits by default) in a small, fixed amount of memory,
+    however many requests are recorded. Percentiles are exact to that
+    precision, unlike an average of per-second percentiles.
+    """
+
+    def __init__(self, significant_digits=3):
+        # Enough linear sub-buckets per power of two for the precision
+        self.sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_count = 1 << self.sub_bits
+        self.half_count = self.sub_count >> 1
+        self.counts = Counter()
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1_000_000))
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, percent):
+        """Latency in milliseconds at or below which `percent`% of requests fell"""
+        if not self.total:
+            return 0.0
+        # percent * total / 100, not percent / 100 * total: 99.9 / 100 * 1000
+        # rounds up to 999.0000000000001, which would skip a whole sample
+        target = max(1, math.ceil(percent * self.total / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_value(index), self.max) / 1000
+        return self.max / 1000
+
+    def mean(self):
+        return self.sum / self.total / 1000 if self.total else 0.0
+
+    def _index(self, value):
+        # Values below sub_count get a bucket each. Above that, a value is
+        # shifted right until it fits in sub_bits, and the shift picks the
+        # bucket group (each group covers one more power of two).
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _highest_value(self, index):
+        if index < self.sub_count:
+            return index
+        shift, offset = divmod(index - self.sub_count, self.half_count)
+        shift += 1
+        return ((offset + self.half_count + 1) << shift) - 1
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class Results:
+    """Outcome counts and latencies, overall and per second of the run"""
+
+    def __init__(self):
+        self.start = None
+        self.histogram = LatencyHistogram()
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.dropped = 0
+        self.intervals = {}  # second of the run -> [histogram, statuses, errors]
+
+    def record(self, latency, status=None, error=None):
+        second = int(time.perf_counter() - self.start)
+        if second not in self.intervals:
+            self.intervals[second] = [LatencyHistogram(), Counter(), Counter()]
+        histogram, statuses, errors = self.intervals[second]
+
+        if error is not None:
+            self.errors[error] += 1
+            errors[error] += 1
+            return
+        self.histogram.record(latency)
+        histogram.record(latency)
+        self.statuses[status] += 1
+        statuses[status] += 1
+
+    def completed(self):
+        return self.histogram.total
+
+    def summary(self, config, elapsed):
+        return {
+            'config': config,
+            'elapsed_seconds': round(elapsed, 3),
+            'requests': self.completed() + sum(self.errors.values()),
+            'throughput_rps': round(self.completed() / elapsed, 1) if elapsed else 0.0,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'errors': dict(self.errors),
+            'dropped': self.dropped,
+            'latency_ms': latency_summary(self.histogram)
+        }
+
+    def timeline(self):
+        rows = []
+        for second in sorted(self.intervals):
+            histogram, statuses, errors = self.intervals[second]
+            row = {
+                'second': second,
+                'completed': histogram.total,
+                'ok': sum(n for status, n in statuses.items() if 200 <= status < 300),
+                'rate_limited': statuses[429],
+                'other_status': sum(n for status, n in statuses.items()
+                                    if status != 429 and not 200 <= status < 300),
+                'errors': sum(errors.values())
+            }
+            row.update(latency_summary(histogram))
+            rows.append(row)
+        return rows
+
+
+def latency_summary(histogram):
+    summary = {
+        'min': (histogram.min or 0) / 1000,
+        'mean': round(histogram.mean(), 3),
+        'max': histogram.max / 1000
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent:g}'] = histogram.percentile(percent)
+    return summary
+
+
+# ============================================================================
+# WORKLOADS
+# ============================================================================
+
+
+def arrival_time(n, rps, ramp_up):
+    """
+    When the n-th request (from 0) should start in an open workload.
+
+    The rate climbs linearly from 0 to `rps` over `ramp_up` seconds and
+    then stays there, so the number of arrivals by time t is the area
+    under that line.
+    """
+    ramp_arrivals = rps * ramp_up / 2
+    if n < ramp_arrivals:
+        return math.sqrt(2 * ramp_up * n / rps)
+    return ramp_up + (n - ramp_arrivals) / rps
+
+
+async def send(session, options, results, scheduled):
+    """Send one request; latency is counted from `scheduled`"""
+    try:
+        async with session.request(options.method, options.url,
+                                   data=options.data, headers=options.headers) as response:
+            await response.read()
+            results.record(time.perf_counter() - scheduled, status=response.status)
+    except asyncio.TimeoutError:
+        results.record(None, error='timeout')
+    except aiohttp.ClientError as e:
+        results.record(None, error=type(e).__name__)
+
+
+async def run_open(session, options, results, deadline):
+    in_flight = set()
+    n = 0
+    while True:
+        scheduled = results.start + arrival_time(n, options.rps, options.ramp_up)
+        if scheduled >= deadline or (options.requests and n >= options.requests):
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        n += 1
+
+        if len(in_flight) >= options.max_in_flight:
+            # The server has fallen this far behind; don't pile on forever
+            results.dropped += 1
+            continue
+        task = asyncio.create_task(send(session, options, results, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.wait(in_flight)
+
+
+async def run_closed(session, options, results, deadline):
+    sent = 0
+
+    async def user(index):
+        nonlocal sent
+        # Users join evenly spread over the ramp-up period
+        await asyncio.sleep(options.ramp_up * index / options.users)
+        while time.perf_counter() < deadline:
+            if options.requests and sent >= options.requests:
+                return
+            sent += 1
+            await send(session, options, results, time.perf_counter())
+            if options.think_time:
+                await asyncio.sleep(options.think_time)
+
+    await asyncio.gather(*(user(i) for i in range(options.users)))
+
+
+async def run(options):
+    """Run the configured workload and return (summary, timeline)"""
+    connector = aiohttp.TCPConnector(limit=options.connections, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=options.timeout)
+    results = Results()
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results.start = time.perf_counter()
+        deadline = results.start + options.duration
+        if options.model == 'open':
+            await run_open(session, options, results, deadline)
+        else:
+            await run_closed(session, options, results, deadline)
+        elapsed = time.perf_counter() - results.start
+
+    config = {name: value for name, value in vars(options).items()
+              if name not in ('json', 'csv', 'data', 'header', 'headers')}
+    return results.summary(config, elapsed), results.timeline()
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+
+def print_summary(summary):
+    config = summary['config']
+    print(f"\n{'='*60}")
+    print(f"Load test: {config['method']} {config['url']}")
+    if config['model'] == 'open':
+        print(f"Open model: {config['rps']} req/s, {config['ramp_up']}s ramp-up, "
+              f"{config['duration']}s")
+    else:
+        print(f"Closed model: {config['users']} users, {config['ramp_up']}s ramp-up, "
+              f"{config['duration']}s")
+    print(f"{'='*60}\n")
+
+    print(f"Requests:     {summary['requests']} in {summary['elapsed_seconds']}s "
+          f"({summary['throughput_rps']} completed/s)")
+    for status, count in summary['statuses'].items():
+        label = ' (rate limited)' if status == '429' else ''
+        print(f"  {status}:         {count}{label}")
+    for error, count in summary['errors'].items():
+        print(f"  {error}: {count}")
+    if summary['dropped']:
+        print(f"  Not sent:    {summary['dropped']} (more than --max-in-flight outstanding)")
+
+    latency = summary['latency_ms']
+    print("\nLatency (ms):")
+    print(f"  min {latency['min']:.2f}  mean {latency['mean']:.2f}  max {latency['max']:.2f}")
+    print('  ' + '  '.join(f"p{p:g} {latency[f'p{p:g}']:.2f}" for p in PERCENTILES))
+    print(f"{'='*60}\n")
+
+
+def write_csv(path, timeline):
+    if not timeline:
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(timeline[0]))
+        writer.writeheader()
+        writer.writerows(timeline)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP load generator')
+    parser.add_argument('url', help='URL to request, e.g. http://localhost:5006/api/data')
+    parser.add_argument('--model', choices=['open', 'closed'], default='open',
+                        help='open: fixed arrival rate; closed: fixed number of users')
+    parser.add_argument('--rps', type=float, default=100,
+                        help='Target requests per second (open model)')
+    parser.add_argument('--users', type=int, default=10,
+                        help='Concurrent virtual users (closed model)')
+    parser.add_argument('--think-time', type=float, default=0,
+                        help='Seconds each user waits between requests (closed model)')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds to run, including ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=0,
+                        help='Seconds to climb to the full rate or user count')
+    parser.add_argument('--requests', type=int, default=0,
+                        help='Stop after this many requests (0 = no limit)')
+    parser.add_argument('--connections', type=int, default=100,
+                        help='Keep-alive connections in the pool')
+    parser.add_argument('--max-in-flight', type=int, default=10000,
+                        help='Open model: skip arrivals while this many are outstanding')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout')
+    parser.add_argument('-X', '--method', default='GET')
+    parser.add_argument('-H', '--header', action='append', default=[],
+                        help="Extra header, e.g. -H 'Authorization: Bearer TOKEN'")
+    parser.add_argument('-d', '--data', help='Request body')
+    parser.add_argument('--json', help='Write the summary (and timeline) to this JSON file')
+    parser.add_argument('--csv', help='Write per-second results to this CSV file')
+    options = parser.parse_args(argv)
+
+    if options.rps <= 0 or options.users <= 0 or options.duration <= 0:
+        parser.error('--rps, --users and --duration must be positive')
+    if options.ramp_up >= options.duration:
+        parser.error('--ramp-up must be shorter than --duration')
+    try:
+        options.headers = dict(
+            (name.strip(), value.strip())
+            for name, value in (header.split(':', 1) for header in options.header)
+        )
+    except ValueError:
+        parser.error("headers must look like 'Name: value'")
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    summary, timeline = asyncio.run(run(options))
+
+    print_summary(summary)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(dict(summary, timeline=timeline), f, indent=2)
+        print(f"Summary written to {options.json}")
+    if options.csv:
+        write_csv(options.csv, timeline)
+        print(f"Per-second results written to {options.csv}")
+
+    # Non-zero exit if nothing got through, handy in scripts
+    return 0 if summary['statuses'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Load Generator Unit Tests
+=========================
+
+Checks the latency histogram and the open-model arrival schedule of
+load_generator.py. Nothing is sent over the network.
+
+Usage:
+    pytest test_load_generator.py
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip('aiohttp')  # load_generator imports it at the top
+
+from load_generator import LatencyHistogram, arrival_time
+
+
+def test_bucket_upper_bound_within_precision():
+    """Every value lands in a bucket whose upper bound is within 0.1% of it"""
+    histogram = LatencyHistogram(significant_digits=3)
+    rng = random.Random(1)
+    values = list(range(5000)) + [rng.randrange(1, 10 ** 9) for _ in range(5000)]
+    for value in values:
+        upper = histogram._highest_value(histogram._index(value))
+        assert value <= upper <= value + value / 1000, value
+
+
+def test_bucket_indexes_are_contiguous():
+    """Buckets never overlap or leave gaps: each ends just before the next"""
+    histogram = LatencyHistogram(significant_digits=2)
+    previous = -1
+    for index in range(histogram.sub_count * 6):
+        upper = histogram._highest_value(index)
+        assert upper > previous
+        assert histogram._index(previous + 1) == index
+        assert histogram._index(upper) == index
+        previous = upper
+
+
+def test_percentiles():
+    """Percentiles of 1..1000 ms come out within the histogram's precision"""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+
+    for percent, expected in ((50, 500), (90, 900), (99, 990), (99.9, 999), (100, 1000)):
+        assert histogram.percentile(percent) == pytest.approx(expected, rel=1e-3)
+    assert histogram.percentile(100) == histogram.max / 1000
+    assert histogram.mean() == pytest.approx(500.5)
+    assert (histogram.min, histogram.total) == (1000, 1000)
+
+
+def test_percentile_never_above_max():
+    """A single value is reported as itself, not as its bucket's upper bound"""
+    histogram = LatencyHistogram()
+    histogram.record(0.123457)
+    assert histogram.percentile(50) == histogram.percentile(99.9) == 123.457
+
+
+def test_arrival_time_without_ramp_up():
+    """With no ramp-up, requests are evenly spaced at 1/rps"""
+    assert [arrival_time(n, rps=4, ramp_up=0) for n in range(5)] == [0, 0.25, 0.5, 0.75, 1.0]
+
+
+def test_arrival_time_ramp_up_area():
+    """During the ramp, arrivals by time t equal the area under the rate line"""
+    rps, ramp_up = 100, 10
+    # The ramp holds rps * ramp_up / 2 arrivals, then the rate is steady
+    assert arrival_time(rps * ramp_up / 2, rps, ramp_up) == pytest.approx(ramp_up)
+    assert arrival_time(rps * ramp_up / 2 + rps, rps, ramp_up) == pytest.approx(ramp_up + 1)
+    for t in (1, 2.5, 5, 9):
+        area = rps * t * t / (2 * ramp_up)  # rate climbs to rps * t / ramp_up by t
+        assert arrival_time(area, rps, ramp_up) == pytest.approx(t)
+
+    times = [arrival_time(n, rps, ramp_up) for n in range(2000)]
+    assert times == sorted(times)
+    # Gaps shrink during the ramp and settle at 1 / rps afterwards
+    assert times[1] - times[0] > times[101] - times[100] > 1 / rps
+    assert times[1999] - times[1998] == pytest.approx(1 / rps)
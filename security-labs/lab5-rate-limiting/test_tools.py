@@ -86,6 +86,23 @@ def test_concurrent_requests(url, num_requests=10):
     print(f"  Rate Limited: {rate_limited}/{num_requests}")
     print(f"{'='*60}\n")
 
+def run_sustained_load(url, rps=20, duration=10, ramp_up=2):
+    """
+    Test with steady load from load_generator.py.
+    
+    Unlike the tests above, requests arrive at a fixed rate whether or not
+    earlier ones have finished, so this shows when the limiter starts
+    answering 429 and what that does to latency.
+    """
+    import load_generator  # Needs aiohttp, only this test uses it
+    
+    return load_generator.main([
+        url,
+        '--rps', str(rps),
+        '--duration', str(duration),
+        '--ramp-up', str(ramp_up)
+    ])
+
 if __name__ == '__main__':
     BASE_URL = "http://localhost:5006"
     
@@ -103,6 +120,9 @@ if __name__ == '__main__':
     # Test 2: Concurrent requests
     test_concurrent_requests(f"{BASE_URL}/api/data", num_requests=20)
     
+    # Test 3: Sustained load against the unlimited endpoint
+    run_sustained_load(f"{BASE_URL}/api/unlimited", rps=20, duration=10)
+    
     print("\nTesting complete!")
     print("\nNext steps:")
     print("  1. Review the results")